@@ -0,0 +1,561 @@
+"""
+Asynchronous Simulation Runner Module
+
+This module runs the Verilator simulations and GTKWave through asyncio
+subprocesses, so a Jupyter kernel, which already runs an event loop, stays
+responsive during a simulation and can await several of them at once.
+The printed output is streamed to the caller through an async iterator.
+
+A run stops when it exceeds its timeout, when the awaiting task is
+cancelled, or when the caller leaves the ``async for`` loop inside
+``async with``. Stopping kills the whole process group, force-removes the
+Docker container and deletes the example's obj_dir.
+
+Usage in a notebook cell:
+    await run_docker_compose_async(target_dir=target_dir, strip_lines=True)
+
+    async with AsyncSimulation(target_dir=target_dir, timeout=60) as run:
+        async for line in run:
+            print(line)
+    run.report.returncode
+
+    results = await run_batch_async(["ex_a/", "ex_b/"], max_concurrent=2)
+"""
+
+import asyncio
+import contextlib
+import os
+import signal
+import subprocess
+import time
+import uuid
+from typing import AsyncIterator, Iterable, List, Optional
+
+from batch_runner import SimulationResult, default_worker_count
+from fst_reader import waveform_file
+from run_metrics import PhaseTimer, RunReport, start_report
+from simulation_backends import (
+    CACHE_STATS_FILE,
+    Command,
+    build_settings,
+    read_env_file,
+    select_backend,
+)
+from verilator_runner import (
+    StreamingOutput,
+    _complete_run,
+    _prepare_run,
+    _remove_cache_stats,
+    _remove_obj_dir,
+)
+
+# Output lines longer than this are split by the stream reader
+LINE_LIMIT = 1024 * 1024
+CONTAINER_PREFIX = "systemverilog-learning"
+
+
+def container_name(service: str) -> str:
+    """Return a unique container name for one run of a compose service."""
+    return f"{CONTAINER_PREFIX}-{service}-{uuid.uuid4().hex[:12]}"
+
+
+class _Process:
+    """Output, kill and wait for an asyncio or threaded child process.
+
+    Event loops without subprocess support (the selector loop Jupyter uses
+    on Windows) fall back to subprocess.Popen, read from worker threads.
+    """
+
+    def __init__(self, process, threaded: bool):
+        self._process = process
+        self._threaded = threaded
+
+    @classmethod
+    async def start(cls, command: List[str], cwd: Optional[str]):
+        options = dict(
+            cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        if os.name == "posix":
+            # Own process group, so the build's compiler children die too
+            options["start_new_session"] = True
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, limit=LINE_LIMIT, **options
+            )
+        except NotImplementedError:
+            return cls(subprocess.Popen(command, **options), threaded=True)
+        return cls(process, threaded=False)
+
+    @property
+    def running(self) -> bool:
+        if self._threaded:
+            return self._process.poll() is None
+        return self._process.returncode is None
+
+    async def readline(self) -> bytes:
+        if self._threaded:
+            return await asyncio.to_thread(self._process.stdout.readline)
+        return await self._process.stdout.readline()
+
+    async def wait(self) -> int:
+        if self._threaded:
+            return await asyncio.to_thread(self._process.wait)
+        return await self._process.wait()
+
+    def kill(self) -> None:
+        if not self.running:
+            return
+        try:
+            if os.name == "posix":
+                os.killpg(self._process.pid, signal.SIGKILL)
+            else:
+                self._process.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def stream_commands(
+    commands: Iterable[Command],
+    outcome: dict,
+    deadline: Optional[float] = None,
+    backend=None,
+    container: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Run commands one after another and yield their output lines.
+
+    The asyncio counterpart of simulation_backends.run_commands. Every
+    command must exit with 0 for the next one to start.
+
+    Args:
+        commands (list): (command, cwd) pairs
+        outcome (dict): Receives "returncode" and "timed_out" once the
+            commands are done
+        deadline (float): Event loop time at which the run is killed
+        backend: Backend whose cleanup() removes ``container``
+        container (str): Name of the container the commands run in
+
+    Yields:
+        str: Every stdout/stderr line, with its line ending
+    """
+    loop = asyncio.get_running_loop()
+    outcome.update(returncode=0, timed_out=False)
+    for command, cwd in commands:
+        process = await _Process.start(list(command), cwd)
+        # Cleared only when the output ends on its own; otherwise the run
+        # timed out, was cancelled or was abandoned by the consumer
+        stopped = True
+        try:
+            while True:
+                remaining = None
+                if deadline is not None:
+                    remaining = max(0.0, deadline - loop.time())
+                try:
+                    raw_line = await asyncio.wait_for(
+                        process.readline(), remaining
+                    )
+                except asyncio.TimeoutError:
+                    outcome["timed_out"] = True
+                    break
+                if not raw_line:
+                    stopped = False
+                    break
+                line = raw_line.decode(errors="replace")
+                yield line.replace("\r\n", "\n")
+        finally:
+            if stopped:
+                process.kill()
+            outcome["returncode"] = await process.wait()
+            if stopped and container:
+                await asyncio.to_thread(backend.cleanup, container)
+        if stopped or outcome["returncode"] != 0:
+            return
+
+
+class _AsyncRun:
+    """Printed lines of a run as an async iterator, awaitable for the result.
+
+    Subclasses implement the run as the async generator ``_run`` and
+    expose its outcome as ``result``.
+    """
+
+    def __init__(self):
+        self._lines = self._run()
+
+    def __aiter__(self):
+        return self._lines
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    async def wait(self):
+        """Run to completion, discarding lines not yet iterated over."""
+        async for _ in self._lines:
+            pass
+        return self.result
+
+    async def aclose(self) -> None:
+        """Stop the run if it is still going, and clean up."""
+        await self._lines.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class AsyncSimulation(_AsyncRun):
+    """One Verilator simulation driven by asyncio subprocesses.
+
+    Iterating yields the lines run_docker_compose would print. Once the
+    run is over, ``report`` holds its RunReport; awaiting the object runs
+    it to completion and returns the report.
+    """
+
+    def __init__(
+        self,
+        *,
+        target_dir: str,
+        strip_lines: bool = False,
+        incremental: bool = False,
+        log_file: Optional[str] = None,
+        backend="auto",
+        metrics_file: Optional[str] = None,
+        timeout: Optional[float] = None,
+        jobs=None,
+        threads=None,
+        opt_level=None,
+        trace_format=None,
+        compiler_cache=None,
+        count_changes: bool = True,
+    ):
+        """
+        Configure the run. Nothing starts until it is iterated or awaited.
+
+        Args:
+            target_dir (str): Path to the target directory containing .env
+            strip_lines (bool): Whether to strip first and last lines
+            incremental (bool): Keep obj_dir between unchanged builds
+            log_file (str): Optional path receiving the complete output
+            backend: "auto", "docker", "local" or a backend object
+            metrics_file (str): Optional JSON-lines file for the report
+            timeout (float): Seconds after which the run is killed and
+                reported as failed. None waits indefinitely.
+            jobs, threads, opt_level, trace_format, compiler_cache: Build
+                settings overriding the .env file, as for
+                run_docker_compose
+            count_changes (bool): Whether the report counts the value
+                changes of the waveform, which reads the whole file again
+        """
+        self.target_dir = target_dir
+        self.strip_lines = strip_lines
+        self.incremental = incremental
+        self.log_file = log_file
+        self.backend = backend
+        self.metrics_file = metrics_file
+        self.timeout = timeout
+        self.count_changes = count_changes
+        self.settings = dict(
+            jobs=jobs,
+            threads=threads,
+            opt_level=opt_level,
+            trace_format=trace_format,
+            compiler_cache=compiler_cache,
+        )
+        self.report: Optional[RunReport] = None
+        super().__init__()
+
+    @property
+    def result(self) -> RunReport:
+        return self.report
+
+    async def _run(self) -> AsyncIterator[str]:
+        pending: List[str] = []
+        target_dir = self.target_dir
+        deadline = (
+            None
+            if self.timeout is None
+            else asyncio.get_running_loop().time() + self.timeout
+        )
+
+        # Reading and writing the env file and hashing the sources block,
+        # so the preparation runs off the event loop too
+        prepared = await asyncio.to_thread(
+            _prepare_run,
+            target_dir,
+            pending.append,
+            self.incremental,
+            self.backend,
+            self.settings,
+        )
+        if prepared is None:
+            self.report = start_report(
+                target_dir, getattr(self.backend, "name", self.backend)
+            )
+            for line in pending:
+                yield line
+            return
+        env_file_path, env, backend, build, fingerprint = prepared
+        report = start_report(target_dir, backend.name, build_settings(env))
+        container = container_name("verilator")
+        commands = backend.simulation_commands(
+            target_dir, env_file_path, env, build, container
+        )
+        timer = PhaseTimer(build=build)
+        outcome: dict = {}
+        completed = False
+
+        try:
+            with StreamingOutput(
+                self.strip_lines, pending.append, self.log_file
+            ) as output:
+                while pending:
+                    yield pending.pop(0)
+                async with contextlib.aclosing(
+                    stream_commands(
+                        commands, outcome, deadline, backend, container
+                    )
+                ) as lines:
+                    async for line in lines:
+                        timer.observe(line)
+                        output.write(line)
+                        while pending:
+                            yield pending.pop(0)
+
+            if outcome["timed_out"]:
+                pending.append(f"Timed out after {self.timeout} s")
+            # Counting the VCD changes and removing obj_dir block, so they
+            # run off the event loop
+            self.report = await asyncio.to_thread(
+                _complete_run,
+                target_dir=target_dir,
+                env=env,
+                backend=backend,
+                report=report,
+                timer=timer,
+                returncode=outcome["returncode"],
+                output=output,
+                print_fn=pending.append,
+                incremental=self.incremental,
+                fingerprint=fingerprint,
+                metrics_file=self.metrics_file,
+                explain_failure=not outcome["timed_out"],
+                count_changes=self.count_changes,
+            )
+            completed = True
+            for line in pending:
+                yield line
+        finally:
+            if not completed:
+                _remove_obj_dir(target_dir + "obj_dir", lambda line: None)
+                _remove_cache_stats(
+                    os.path.join(target_dir, CACHE_STATS_FILE)
+                )
+
+
+class AsyncWaveformViewer(_AsyncRun):
+    """GTKWave for one example, driven by an asyncio subprocess.
+
+    Iterating yields the lines gtkwave_runner.run_docker_compose would
+    print; awaiting the object returns the viewer's return code.
+    """
+
+    def __init__(self, target_dir: str, backend="auto"):
+        """
+        Args:
+            target_dir (str): Path to the target directory containing .env
+            backend: "auto", "docker", "local" or a backend object
+        """
+        self.target_dir = target_dir
+        self.backend = backend
+        self.returncode: Optional[int] = None
+        super().__init__()
+
+    @property
+    def result(self) -> Optional[int]:
+        return self.returncode
+
+    async def _run(self) -> AsyncIterator[str]:
+        target_dir = self.target_dir
+        obj_dir = target_dir + "obj_dir"
+        env_file_path = os.path.join(target_dir, ".env")
+        if not os.path.isdir(target_dir):
+            self.returncode = 1
+            yield f"Directory not found: {target_dir}"
+            return
+        if not os.path.exists(env_file_path):
+            self.returncode = 1
+            yield f"Error: Environment file not found at {env_file_path}"
+            return
+
+        yield "Docker Compose Output:"
+        yield "=" * 80
+        env = read_env_file(env_file_path)
+        env["VCD_FILE"] = waveform_file(target_dir, env.get("VCD_FILE", ""))
+        backend = select_backend(self.backend, tool="gtkwave")
+        container = container_name("gtkwave")
+        commands = backend.waveform_commands(
+            target_dir, env_file_path, env, container
+        )
+        pending: List[str] = []
+        outcome: dict = {}
+        with StreamingOutput(print_fn=pending.append) as output:
+            async with contextlib.aclosing(
+                stream_commands(
+                    commands, outcome, backend=backend, container=container
+                )
+            ) as lines:
+                async for line in lines:
+                    output.write(line)
+                    while pending:
+                        yield pending.pop(0)
+        self.returncode = outcome["returncode"]
+
+        pending.append("=" * 80)
+        pending.append(
+            f"Process finished with return code: {self.returncode}"
+        )
+        if self.returncode != 0:
+            backend.explain_failure(list(output.recent_lines), pending.append)
+        _remove_obj_dir(obj_dir, pending.append)
+        for line in pending:
+            yield line
+
+
+async def run_docker_compose_async(
+    *,
+    target_dir: str,
+    strip_lines: bool = False,
+    print_fn=print,
+    incremental: bool = False,
+    log_file: Optional[str] = None,
+    backend="auto",
+    metrics_file: Optional[str] = None,
+    timeout: Optional[float] = None,
+    jobs=None,
+    threads=None,
+    opt_level=None,
+    trace_format=None,
+    compiler_cache=None,
+) -> int:
+    """
+    Await a Verilator simulation, printing its output as it arrives.
+
+    The asyncio counterpart of verilator_runner.run_docker_compose, with
+    the same arguments plus ``timeout`` (see AsyncSimulation).
+
+    Returns:
+        int: Return code of the run, 0 for success
+    """
+    async with AsyncSimulation(
+        target_dir=target_dir,
+        strip_lines=strip_lines,
+        incremental=incremental,
+        log_file=log_file,
+        backend=backend,
+        metrics_file=metrics_file,
+        timeout=timeout,
+        jobs=jobs,
+        threads=threads,
+        opt_level=opt_level,
+        trace_format=trace_format,
+        compiler_cache=compiler_cache,
+        count_changes=metrics_file is not None,
+    ) as run:
+        async for line in run:
+            print_fn(line)
+    return run.report.returncode
+
+
+async def view_waveform_async(
+    target_dir: str, backend="auto", print_fn=print
+) -> int:
+    """
+    Await GTKWave for an example without blocking the event loop.
+
+    The asyncio counterpart of gtkwave_runner.run_docker_compose.
+
+    Returns:
+        int: Return code of the viewer, 0 for success
+    """
+    async with AsyncWaveformViewer(target_dir, backend) as viewer:
+        async for line in viewer:
+            print_fn(line)
+    return viewer.returncode
+
+
+async def run_batch_async(
+    target_dirs: Iterable[str],
+    max_concurrent: Optional[int] = None,
+    strip_lines: bool = True,
+    incremental: bool = False,
+    backend="auto",
+    metrics_file: Optional[str] = None,
+    timeout: Optional[float] = None,
+    verbose: bool = True,
+) -> List[SimulationResult]:
+    """
+    Await many simulations concurrently, keeping their outputs separate.
+
+    The asyncio counterpart of batch_runner.run_batch. Cancelling the
+    awaiting task stops and cleans up every run still in progress.
+
+    Args:
+        target_dirs: Example directories to run.
+        max_concurrent: Number of simulations running at once. Defaults
+            to the core count.
+        strip_lines: Whether to strip Docker/Verilator banner lines.
+        incremental: Whether to reuse obj_dir when the build is unchanged.
+        backend: "auto", "docker", "local" or a backend object.
+        metrics_file: Optional JSON-lines file receiving one run report
+            per example.
+        timeout: Per-simulation timeout in seconds.
+        verbose: Whether to print one progress line per finished run.
+
+    Returns:
+        Results in the same order as the target directories.
+    """
+    target_dirs = list(target_dirs)
+    limit = asyncio.Semaphore(max(1, max_concurrent or default_worker_count()))
+    finished = 0
+
+    async def run_one(target_dir: str) -> SimulationResult:
+        nonlocal finished
+        async with limit:
+            output: List[str] = []
+            start = time.perf_counter()
+            try:
+                async with AsyncSimulation(
+                    target_dir=target_dir,
+                    strip_lines=strip_lines,
+                    incremental=incremental,
+                    backend=backend,
+                    metrics_file=metrics_file,
+                    timeout=timeout,
+                ) as run:
+                    async for line in run:
+                        output.append(line)
+                report = run.report
+                returncode = report.returncode
+            except OSError as error:
+                output.append(f"Error: could not start the run: {error}")
+                report = None
+                returncode = 1
+            result = SimulationResult(
+                target_dir=target_dir,
+                returncode=returncode,
+                duration=time.perf_counter() - start,
+                output=output,
+                report=report,
+            )
+        finished += 1
+        if verbose:
+            status = "✓" if result.succeeded else "❌"
+            print(
+                f"[{finished}/{len(target_dirs)}] {status} "
+                f"{result.target_dir} ({result.duration:.1f} s)"
+            )
+        return result
+
+    return list(await asyncio.gather(*map(run_one, target_dirs)))
@@ -0,0 +1,205 @@
+"""
+Batch Simulation Runner Module
+
+This module discovers every example directory that contains a .env file and
+runs its Verilator simulation on a bounded thread pool. Each run's output is
+collected separately and returned together with its return code and
+duration, so results can be summarized without interleaved logs.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from run_metrics import RunReport
+from verilator_runner import run_simulation_report
+
+
+@dataclass
+class SimulationResult:
+    """Outcome of one example simulation."""
+
+    target_dir: str
+    returncode: int
+    duration: float
+    output: List[str] = field(default_factory=list)
+    report: Optional[RunReport] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.returncode == 0
+
+
+def discover_example_dirs(root: str = ".") -> List[str]:
+    """Find every directory below ``root`` that contains a .env file.
+
+    Args:
+        root: Directory to search. Paths are returned relative to the
+            current directory, as docker-compose expects.
+
+    Returns:
+        Sorted list of directory paths, each with a trailing separator as
+        run_docker_compose expects.
+    """
+    example_dirs = []
+    for directory, _, files in os.walk(root):
+        if ".env" in files and directory != root:
+            example_dirs.append(os.path.join(os.path.relpath(directory), ""))
+    return sorted(example_dirs)
+
+
+def default_worker_count() -> int:
+    """Return the worker pool size used when none is given."""
+    return os.cpu_count() or 1
+
+
+def run_example(
+    target_dir: str,
+    strip_lines: bool = True,
+    incremental: bool = False,
+    metrics_file: Optional[str] = None,
+) -> SimulationResult:
+    """Run one example simulation and capture its output.
+
+    Args:
+        target_dir: Example directory containing the .env file.
+        strip_lines: Whether to strip Docker/Verilator banner lines.
+        incremental: Whether to reuse obj_dir when the build is unchanged.
+        metrics_file: Optional JSON-lines file receiving the run report.
+
+    Returns:
+        The simulation result, with the output kept in memory.
+    """
+    output: List[str] = []
+    report = None
+    start = time.perf_counter()
+    try:
+        report = run_simulation_report(
+            target_dir=target_dir,
+            strip_lines=strip_lines,
+            print_fn=output.append,
+            incremental=incremental,
+            metrics_file=metrics_file,
+        )
+        returncode = report.returncode
+    except OSError as error:
+        output.append(f"Error: could not start docker-compose: {error}")
+        returncode = 1
+    return SimulationResult(
+        target_dir=target_dir,
+        returncode=returncode,
+        duration=time.perf_counter() - start,
+        output=output,
+        report=report,
+    )
+
+
+def run_batch(
+    target_dirs: Optional[Iterable[str]] = None,
+    root: str = ".",
+    max_workers: Optional[int] = None,
+    strip_lines: bool = True,
+    verbose: bool = True,
+    incremental: bool = False,
+    changed_files: Optional[Iterable[str]] = None,
+    metrics_file: Optional[str] = None,
+) -> List[SimulationResult]:
+    """Run many example simulations concurrently.
+
+    Args:
+        target_dirs: Example directories to run. Defaults to every
+            directory found by discover_example_dirs(root).
+        root: Directory searched when target_dirs is not given.
+        max_workers: Size of the worker pool. Defaults to the core count.
+        strip_lines: Whether to strip Docker/Verilator banner lines.
+        verbose: Whether to print one progress line per finished run.
+        incremental: Whether to reuse obj_dir when the build is unchanged.
+        changed_files: When given, only the targets whose sources depend on
+            one of these files (per sv_dependencies) are run.
+        metrics_file: Optional JSON-lines file receiving one run report
+            per example.
+
+    Returns:
+        Results in the same order as the target directories.
+    """
+    if target_dirs is None:
+        target_dirs = discover_example_dirs(root)
+    target_dirs = list(target_dirs)
+    if changed_files is not None:
+        from sv_dependencies import DependencyGraph
+
+        graph = DependencyGraph(root)
+        graph.scan()
+        target_dirs = graph.affected_targets(changed_files, target_dirs)
+        if verbose:
+            print(f"{len(target_dirs)} example(s) affected by the changes")
+    workers = max(1, max_workers or default_worker_count())
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                run_example,
+                target_dir,
+                strip_lines,
+                incremental,
+                metrics_file,
+            ): target_dir
+            for target_dir in target_dirs
+        }
+        for finished, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results[futures[future]] = result
+            if verbose:
+                status = "✓" if result.succeeded else "❌"
+                print(
+                    f"[{finished}/{len(target_dirs)}] {status} "
+                    f"{result.target_dir} ({result.duration:.1f} s)"
+                )
+
+    return [results[target_dir] for target_dir in target_dirs]
+
+
+def print_batch_summary(
+    results: List[SimulationResult], show_failed_output: bool = True
+) -> None:
+    """Print a summary table of batch results.
+
+    Args:
+        results: Results returned by run_batch.
+        show_failed_output: Whether to print the output of failed runs.
+    """
+    failed = [result for result in results if not result.succeeded]
+    total_time = sum(result.duration for result in results)
+
+    print("=" * 80)
+    print("Batch Simulation Summary")
+    print("=" * 80)
+    for result in results:
+        status = "PASS" if result.succeeded else "FAIL"
+        print(
+            f"{status}  rc={result.returncode:<4d}"
+            f"{result.duration:8.1f} s  {result.target_dir}"
+        )
+    print("-" * 80)
+    print(
+        f"{len(results) - len(failed)} passed, {len(failed)} failed, "
+        f"{total_time:.1f} s total simulation time"
+    )
+
+    if show_failed_output:
+        for result in failed:
+            print(f"\n--- Output: {result.target_dir} ---")
+            for line in result.output:
+                print(line)
+
+
+if __name__ == "__main__":
+    # Optional arguments are changed files; only affected examples run
+    changed = sys.argv[1:] or None
+    batch_results = run_batch(changed_files=changed)
+    print_batch_summary(batch_results)
+    exit(0 if all(result.succeeded for result in batch_results) else 1)
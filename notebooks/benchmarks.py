@@ -0,0 +1,577 @@
+"""
+Helper Module Benchmark Suite
+
+This module times the notebook helpers on the real corpus (the example VCD
+files and the chapter notebooks) and on synthetic, scaled-up VCD files with
+millions of value changes. It also measures the runner's process and output
+handling against a fake subprocess and a scripted backend, and the time a
+fresh interpreter needs to import each helper. Results are
+written as JSON and can be compared against a saved baseline to catch
+performance regressions.
+
+Usage:
+    python benchmarks.py --output results.json
+    python benchmarks.py --save-baseline
+    python benchmarks.py --baseline benchmark_baseline.json
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+RESULTS_VERSION = 1
+DEFAULT_BASELINE_FILE = "benchmark_baseline.json"
+DEFAULT_TOLERANCE = 0.25
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.02
+SYNTHETIC_SIGNALS = 64
+SYNTHETIC_CHANGES = 2_000_000
+RUNNER_OUTPUT_LINES = 100_000
+# Helpers imported by notebook cells or run with python -c
+STARTUP_MODULES = (
+    "sv_helpers",
+    "verilator_runner",
+    "read_files_utils",
+    "list_vcd_signals",
+    "gtkwave_runner",
+    "notebook_spliter",
+    "batch_runner",
+    "waveform_plot",
+)
+# Dependencies that only specific helper functions need
+HEAVY_MODULES = ("IPython", "langgraph", "numpy", "plotly")
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of one benchmark, in seconds per repeat."""
+
+    name: str
+    times: List[float]
+    items: int = 0
+    info: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    def to_dict(self) -> Dict[str, object]:
+        payload = asdict(self)
+        payload.update(best=self.best, median=self.median)
+        return payload
+
+
+def time_repeats(
+    function: Callable[[], object], repeats: int, quiet: bool = True
+) -> List[float]:
+    """Call ``function`` ``repeats`` times and return each duration.
+
+    Args:
+        function: Callable to time.
+        repeats: Number of timed calls.
+        quiet: Whether to discard anything the callable prints.
+
+    Returns:
+        List of durations in seconds.
+    """
+    times = []
+    for _ in range(repeats):
+        with (
+            contextlib.redirect_stdout(io.StringIO())
+            if quiet
+            else contextlib.nullcontext()
+        ):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def write_synthetic_vcd(
+    vcd_filename: str,
+    signal_count: int = SYNTHETIC_SIGNALS,
+    change_count: int = SYNTHETIC_CHANGES,
+    seed: int = 1,
+) -> None:
+    """Write a VCD file with a given number of signals and value changes.
+
+    A quarter of the signals are 8-bit vectors, the rest are scalars, all
+    inside a two-level ``tb.dut`` hierarchy. Every timestamp changes a few
+    randomly chosen signals.
+
+    Args:
+        vcd_filename: Output path.
+        signal_count: Number of signals to declare.
+        change_count: Total number of value changes, excluding the
+            initial dump.
+        seed: Random seed, so files are reproducible between runs.
+    """
+    rng = random.Random(seed)
+    codes = [_identifier_code(index) for index in range(signal_count)]
+    widths = [8 if index % 4 == 0 else 1 for index in range(signal_count)]
+
+    with open(vcd_filename, "w", encoding="utf-8") as vcd_file:
+        vcd_file.write("$date synthetic $end\n$version benchmarks $end\n")
+        vcd_file.write("$timescale 1ps $end\n$scope module tb $end\n")
+        vcd_file.write("$var wire 1 ! clk $end\n$scope module dut $end\n")
+        for index, (code, width) in enumerate(zip(codes[1:], widths[1:])):
+            suffix = f" [{width - 1}:0]" if width > 1 else ""
+            vcd_file.write(
+                f"$var wire {width} {code} sig_{index}{suffix} $end\n"
+            )
+        vcd_file.write("$upscope $end\n$upscope $end\n")
+        vcd_file.write("$enddefinitions $end\n#0\n$dumpvars\n")
+        for code, width in zip(codes, widths):
+            vcd_file.write(_value_line(code, width, 0))
+        vcd_file.write("$end\n")
+
+        written = 0
+        timestamp = 0
+        chunk = []
+        while written < change_count:
+            timestamp += 5
+            chunk.append(f"#{timestamp}\n")
+            for _ in range(min(rng.randint(1, 8), change_count - written)):
+                index = rng.randrange(signal_count)
+                value = rng.getrandbits(widths[index])
+                chunk.append(_value_line(codes[index], widths[index], value))
+                written += 1
+            if len(chunk) > 10_000:
+                vcd_file.write("".join(chunk))
+                chunk = []
+        vcd_file.write("".join(chunk))
+        vcd_file.write(f"#{timestamp + 5}\n")
+
+
+def _identifier_code(index: int) -> str:
+    # Printable identifier codes, the same scheme simulators use
+    code = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 94)
+        code += chr(33 + remainder)
+    return code
+
+
+def _value_line(code: str, width: int, value: int) -> str:
+    if width == 1:
+        return f"{value}{code}\n"
+    return f"b{value:b} {code}\n"
+
+
+def example_vcd_files(root: str = ".") -> List[str]:
+    """Return every VCD file below ``root``, sorted."""
+    return sorted(
+        glob.glob(os.path.join(root, "**", "*.vcd"), recursive=True)
+    )
+
+
+def chapter_notebooks(root: str = ".") -> List[str]:
+    """Return the chapter and appendix notebooks in ``root``, sorted."""
+    return sorted(
+        glob.glob(os.path.join(root, "Chapter_*.ipynb"))
+        + glob.glob(os.path.join(root, "Appendix_*.ipynb"))
+    )
+
+
+def bench_list_vcd_signals(
+    vcd_files: List[str], repeats: int
+) -> BenchmarkResult:
+    from list_vcd_signals import list_vcd_signals
+
+    def run():
+        for vcd_filename in vcd_files:
+            list_vcd_signals(vcd_filename)
+
+    return BenchmarkResult(
+        "list_vcd_signals/corpus", time_repeats(run, repeats), len(vcd_files)
+    )
+
+
+def bench_list_signals_by_hierarchy(
+    vcd_files: List[str], repeats: int
+) -> BenchmarkResult:
+    from list_vcd_signals import list_signals_by_hierarchy
+
+    def run():
+        for vcd_filename in vcd_files:
+            list_signals_by_hierarchy(vcd_filename)
+
+    return BenchmarkResult(
+        "list_signals_by_hierarchy/corpus",
+        time_repeats(run, repeats),
+        len(vcd_files),
+    )
+
+
+def bench_synthetic_vcd(
+    vcd_filename: str, change_count: int, repeats: int
+) -> List[BenchmarkResult]:
+    from list_vcd_signals import list_signals_by_hierarchy, list_vcd_signals
+    from signal_activity import signal_activity
+
+    info = {"bytes": os.path.getsize(vcd_filename)}
+    return [
+        BenchmarkResult(
+            "list_vcd_signals/synthetic",
+            time_repeats(lambda: list_vcd_signals(vcd_filename), repeats),
+            change_count,
+            info,
+        ),
+        BenchmarkResult(
+            "list_signals_by_hierarchy/synthetic",
+            time_repeats(
+                lambda: list_signals_by_hierarchy(vcd_filename), repeats
+            ),
+            change_count,
+            info,
+        ),
+        BenchmarkResult(
+            "signal_activity/synthetic",
+            time_repeats(
+                lambda: signal_activity(vcd_filename, use_cache=False),
+                repeats,
+            ),
+            change_count,
+            info,
+        ),
+    ]
+
+
+def bench_split_notebook(
+    notebooks: List[str], repeats: int, work_dir: str
+) -> List[BenchmarkResult]:
+    """Time splitting into empty and into already split directories.
+
+    The cold run writes every section into a fresh directory on each
+    repeat. The warm run splits again into one populated directory, where
+    the manifest leaves every unchanged section file alone.
+    """
+    from notebook_spliter import NotebookSplitter
+
+    splitter = NotebookSplitter()
+    output_root = os.path.join(work_dir, "split")
+    os.makedirs(output_root, exist_ok=True)
+
+    def split_into(output_dir):
+        for index, notebook in enumerate(notebooks):
+            result = splitter.split_notebook(
+                notebook, os.path.join(output_dir, str(index)), 2
+            )
+            if result.get("error_message"):
+                raise RuntimeError(result["error_message"])
+
+    def cold():
+        split_into(tempfile.mkdtemp(prefix="cold_", dir=output_root))
+
+    warm_dir = os.path.join(output_root, "warm")
+    os.makedirs(warm_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        split_into(warm_dir)
+
+    return [
+        BenchmarkResult(
+            "NotebookSplitter.split_notebook/chapters_cold",
+            time_repeats(cold, repeats),
+            len(notebooks),
+        ),
+        BenchmarkResult(
+            "NotebookSplitter.split_notebook/chapters_warm",
+            time_repeats(lambda: split_into(warm_dir), repeats),
+            len(notebooks),
+        ),
+    ]
+
+
+def bench_stream_process(line_count: int, repeats: int) -> BenchmarkResult:
+    from simulation_backends import stream_process
+
+    # A child process that prints simulation-like output as fast as it can
+    fake_simulator = [
+        sys.executable,
+        "-c",
+        "import sys\n"
+        f"for i in range({line_count}):\n"
+        "    sys.stdout.write(f'[{i * 10}] count = {i & 15:4b}\\n')\n",
+    ]
+    lines = []
+
+    def run():
+        lines.clear()
+        stream_process(fake_simulator, lines.append)
+        if len(lines) != line_count:
+            raise RuntimeError(
+                f"Expected {line_count} lines, got {len(lines)}"
+            )
+
+    return BenchmarkResult(
+        "runner.stream_process/fake_subprocess",
+        time_repeats(run, repeats),
+        line_count,
+    )
+
+
+def bench_runner_output(
+    line_count: int, repeats: int, work_dir: str
+) -> BenchmarkResult:
+    from simulation_backends import ScriptedBackend
+    from verilator_runner import run_docker_compose
+
+    target_dir = os.path.join(work_dir, "runner_example", "")
+    os.makedirs(target_dir, exist_ok=True)
+    with open(os.path.join(target_dir, ".env"), "w", encoding="utf-8") as f:
+        f.write("TOP_MODULE=tb\nTESTBENCH_FILE=tb.sv\n")
+    backend = ScriptedBackend(
+        [f"[{i * 10}] count = {i & 15:4b}\n" for i in range(line_count)]
+    )
+
+    def run():
+        run_docker_compose(
+            target_dir=target_dir,
+            strip_lines=True,
+            print_fn=lambda line: None,
+            backend=backend,
+        )
+
+    return BenchmarkResult(
+        "runner.run_docker_compose/scripted_backend",
+        time_repeats(run, repeats),
+        line_count,
+    )
+
+
+def bench_import_startup(
+    module: Optional[str], repeats: int, root: str
+) -> BenchmarkResult:
+    """Time a fresh interpreter importing one helper module.
+
+    Each repeat starts a new process, so nothing is cached in memory. With
+    ``module`` set to None the bare interpreter start is timed, which is
+    the floor every import time should be compared against. The heavy
+    dependencies the import pulled in are recorded in the result info.
+    """
+    statement = f"import {module}" if module else "pass"
+    report = (
+        "import sys\n"
+        f"print(','.join(sorted({HEAVY_MODULES!r} & sys.modules.keys())))"
+    )
+    command = [sys.executable, "-c", statement]
+
+    def run():
+        subprocess.run(command, cwd=root, check=True)
+
+    times = time_repeats(run, repeats)
+    loaded = subprocess.run(
+        [sys.executable, "-c", f"{statement}\n{report}"],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    return BenchmarkResult(
+        f"startup.import/{module or 'python'}",
+        times,
+        1,
+        {"heavy_modules": loaded.split(",") if loaded else []},
+    )
+
+
+BENCHMARK_GROUPS = ("corpus", "synthetic", "notebooks", "runner", "startup")
+
+
+def run_benchmarks(
+    groups=BENCHMARK_GROUPS,
+    repeats: int = 3,
+    root: str = ".",
+    change_count: int = SYNTHETIC_CHANGES,
+    runner_lines: int = RUNNER_OUTPUT_LINES,
+    verbose: bool = True,
+) -> List[BenchmarkResult]:
+    """Run the selected benchmark groups.
+
+    Args:
+        groups: Any of "corpus", "synthetic", "notebooks", "runner" and
+            "startup".
+        repeats: Timed repeats per benchmark; the median is compared.
+        root: Notebooks directory holding the corpus.
+        change_count: Value changes in the synthetic VCD file.
+        runner_lines: Output lines produced by the runner benchmarks.
+        verbose: Whether to print each result as it finishes.
+
+    Returns:
+        Results in the order they were run.
+    """
+    results: List[BenchmarkResult] = []
+
+    def record(*new_results):
+        for result in new_results:
+            results.append(result)
+            if verbose:
+                print(
+                    f"{result.name:<48} median {result.median:9.4f} s  "
+                    f"best {result.best:9.4f} s  ({result.items} items)"
+                )
+
+    with tempfile.TemporaryDirectory(prefix="sv_benchmarks_") as work_dir:
+        if "corpus" in groups:
+            vcd_files = example_vcd_files(root)
+            record(
+                bench_list_vcd_signals(vcd_files, repeats),
+                bench_list_signals_by_hierarchy(vcd_files, repeats),
+            )
+        if "synthetic" in groups:
+            vcd_filename = os.path.join(work_dir, "synthetic.vcd")
+            write_synthetic_vcd(vcd_filename, change_count=change_count)
+            record(*bench_synthetic_vcd(vcd_filename, change_count, repeats))
+        if "notebooks" in groups:
+            record(
+                *bench_split_notebook(
+                    chapter_notebooks(root), repeats, work_dir
+                )
+            )
+        if "runner" in groups:
+            record(
+                bench_stream_process(runner_lines, repeats),
+                bench_runner_output(runner_lines, repeats, work_dir),
+            )
+        if "startup" in groups:
+            record(
+                *(
+                    bench_import_startup(module, repeats, root)
+                    for module in (None,) + STARTUP_MODULES
+                )
+            )
+    return results
+
+
+def results_payload(results: List[BenchmarkResult]) -> Dict[str, object]:
+    """Build the machine-readable report for a benchmark run."""
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": {result.name: result.to_dict() for result in results},
+    }
+
+
+def save_results(results: List[BenchmarkResult], path: str) -> None:
+    """Write a benchmark report to a JSON file."""
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(results_payload(results), results_file, indent=2)
+        results_file.write("\n")
+
+
+def load_results(path: str) -> Dict[str, object]:
+    """Read a benchmark report written by save_results."""
+    with open(path, "r", encoding="utf-8") as results_file:
+        return json.load(results_file)
+
+
+def compare_to_baseline(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, object],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """Print median times against a baseline and list the regressions.
+
+    Args:
+        results: Results of the current run.
+        baseline: Report loaded with load_results.
+        tolerance: Allowed slowdown as a fraction, 0.25 meaning 25 %.
+
+    Returns:
+        Names of the benchmarks slower than the baseline by more than the
+        tolerance.
+    """
+    baseline_results = baseline.get("results", {})
+    regressions = []
+    print("=" * 80)
+    print(f"Comparison against baseline from {baseline.get('created', '?')}")
+    print("=" * 80)
+    for result in results:
+        reference = baseline_results.get(result.name)
+        if reference is None:
+            print(f"NEW        {result.name}")
+            continue
+        ratio = result.median / reference["median"]
+        regressed = (
+            ratio > 1 + tolerance
+            and result.median - reference["median"] > MIN_REGRESSION_SECONDS
+        )
+        if regressed:
+            regressions.append(result.name)
+        status = "SLOWER" if regressed else "ok"
+        print(
+            f"{status:<10} {result.name:<48} "
+            f"{reference['median']:8.4f} -> {result.median:8.4f} s "
+            f"({ratio:5.2f}x)"
+        )
+    print("-" * 80)
+    print(f"{len(regressions)} regression(s), tolerance {tolerance:.0%}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--group",
+        action="append",
+        choices=BENCHMARK_GROUPS,
+        help="benchmark group to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--changes", type=int, default=SYNTHETIC_CHANGES)
+    parser.add_argument(
+        "--runner-lines", type=int, default=RUNNER_OUTPUT_LINES
+    )
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument(
+        "--baseline", help="compare against this results file"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"also write the results to {DEFAULT_BASELINE_FILE}",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        groups=args.group or BENCHMARK_GROUPS,
+        repeats=max(1, args.repeat),
+        change_count=args.changes,
+        runner_lines=args.runner_lines,
+    )
+    if args.output:
+        save_results(results, args.output)
+    if args.save_baseline:
+        save_results(results, DEFAULT_BASELINE_FILE)
+    if args.baseline:
+        regressions = compare_to_baseline(
+            results, load_results(args.baseline), args.tolerance
+        )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
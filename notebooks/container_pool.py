@@ -0,0 +1,518 @@
+"""
+Warm Verilator Container Pool Module
+
+This module keeps one or more Verilator containers running and dispatches
+builds and simulations into them with ``docker exec``, instead of paying
+container creation and teardown on every ``docker-compose run --rm``.
+Containers are health-checked before reuse and stopped after sitting idle.
+A local fake executor allows the pool to be exercised without Docker.
+
+The pool is not one of the simulation_backends backends, but the command
+it execs is the Docker backend's verilator_shell_command. The build
+settings (jobs, model threads, optimization level, trace format and
+compiler cache) therefore resolve the same way for pooled runs.
+"""
+
+import atexit
+import itertools
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from fst_reader import store_fst_trace
+from run_metrics import PhaseTimer, RunReport, finish_report, start_report
+from simulation_backends import (
+    CACHE_STATS_FILE,
+    CONTAINER_CACHE_DIR,
+    VERILATOR_IMAGE,
+    apply_build_settings,
+    build_settings,
+    image_has_ccache,
+    verilator_shell_command,
+)
+from verilator_runner import (
+    StreamingOutput,
+    _remove_cache_stats,
+    read_env_file,
+)
+
+CONTAINER_WORKDIR = "/work"
+# Named volume holding the compiler cache, shared with docker-compose.yml
+CACHE_VOLUME = "verilator_cache"
+POOL_LABEL = "systemverilog-learning.pool=1"
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+class DockerExecutor:
+    """Start, exec into and stop long-lived Verilator containers."""
+
+    def __init__(
+        self, project_root: str = ".", image: str = VERILATOR_IMAGE
+    ):
+        """Configure the containers started by this executor.
+
+        Args:
+            project_root: Host directory mounted at /work. Example
+                PROJECT_DIR paths are resolved relative to it.
+            image: Docker image providing Verilator.
+        """
+        self.project_root = os.path.abspath(project_root)
+        self.image = image
+
+    def start(self) -> str:
+        """Start a detached container and return its id."""
+        result = subprocess.run(
+            [
+                "docker",
+                "run",
+                "--detach",
+                "--rm",
+                "--label",
+                POOL_LABEL,
+                "--volume",
+                f"{self.project_root}:{CONTAINER_WORKDIR}",
+                "--volume",
+                f"{CACHE_VOLUME}:{CONTAINER_CACHE_DIR}",
+                "--workdir",
+                CONTAINER_WORKDIR,
+                "--env",
+                "VERILATOR_ROOT=/usr/local/share/verilator",
+                "--env",
+                f"CCACHE_DIR={CONTAINER_CACHE_DIR}",
+                "--entrypoint",
+                "sleep",
+                self.image,
+                "infinity",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip()
+
+    def exec(
+        self,
+        container_id: str,
+        shell_command: str,
+        workdir: str,
+        on_line: Callable[[str], None],
+    ) -> int:
+        """Run a shell command inside a container.
+
+        Args:
+            container_id: Container to run in.
+            shell_command: Command passed to ``bash -c``.
+            workdir: Working directory relative to the project root.
+            on_line: Called with every output line as it arrives.
+
+        Returns:
+            Exit code of the command.
+        """
+        process = subprocess.Popen(
+            [
+                "docker",
+                "exec",
+                "--workdir",
+                f"{CONTAINER_WORKDIR}/{workdir}".rstrip("/"),
+                container_id,
+                "bash",
+                "-c",
+                shell_command,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1,
+        )
+        for line in process.stdout:
+            on_line(line)
+        return process.wait()
+
+    def is_healthy(self, container_id: str) -> bool:
+        """Check that a container is still running."""
+        result = subprocess.run(
+            [
+                "docker",
+                "inspect",
+                "--format",
+                "{{.State.Running}}",
+                container_id,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        return result.returncode == 0 and result.stdout.strip() == "true"
+
+    def stop(self, container_id: str) -> None:
+        """Remove a container, killing it if needed."""
+        subprocess.run(
+            ["docker", "rm", "--force", container_id],
+            capture_output=True,
+        )
+
+
+class FakeExecutor:
+    """Local stand-in for DockerExecutor, used to test without Docker.
+
+    "Containers" are plain ids. Commands run on the host through bash in
+    the matching project directory, or through a custom handler.
+    """
+
+    def __init__(
+        self,
+        project_root: str = ".",
+        handler: Optional[Callable[[str, str], tuple]] = None,
+    ):
+        """Configure the fake executor.
+
+        Args:
+            project_root: Directory that stands in for the /work mount.
+            handler: Optional callable taking (shell_command, workdir) and
+                returning (exit_code, output_lines). When omitted, commands
+                are run locally with bash.
+        """
+        self.project_root = os.path.abspath(project_root)
+        self.handler = handler
+        self.running: Dict[str, bool] = {}
+        self.calls: List[tuple] = []
+        self._ids = itertools.count(1)
+
+    def start(self) -> str:
+        container_id = f"fake-{next(self._ids)}"
+        self.running[container_id] = True
+        return container_id
+
+    def exec(
+        self,
+        container_id: str,
+        shell_command: str,
+        workdir: str,
+        on_line: Callable[[str], None],
+    ) -> int:
+        if not self.running.get(container_id):
+            raise RuntimeError(f"Container {container_id} is not running")
+        self.calls.append((container_id, shell_command, workdir))
+        if self.handler is not None:
+            returncode, lines = self.handler(shell_command, workdir)
+            for line in lines:
+                on_line(line)
+            return returncode
+
+        process = subprocess.Popen(
+            ["bash", "-c", shell_command],
+            cwd=os.path.join(self.project_root, workdir),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1,
+        )
+        for line in process.stdout:
+            on_line(line)
+        return process.wait()
+
+    def is_healthy(self, container_id: str) -> bool:
+        return self.running.get(container_id, False)
+
+    def stop(self, container_id: str) -> None:
+        self.running[container_id] = False
+
+
+class ContainerPool:
+    """Bounded pool of warm containers with health checks and idle expiry."""
+
+    def __init__(
+        self,
+        executor=None,
+        size: int = 1,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        """Create an empty pool. Containers are started on demand.
+
+        Args:
+            executor: DockerExecutor (default) or FakeExecutor.
+            size: Maximum number of containers running at once.
+            idle_timeout: Seconds a container may sit unused before it is
+                stopped. Use 0 or None to keep containers until shutdown.
+        """
+        self.executor = executor if executor is not None else DockerExecutor()
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[str, float] = {}
+        self._busy: set = set()
+        self._starting = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._reaper = None
+        if idle_timeout:
+            self._reaper = threading.Thread(
+                target=self._reap_idle_loop, daemon=True
+            )
+            self._reaper.start()
+
+    @property
+    def container_count(self) -> int:
+        with self._condition:
+            return len(self._idle) + len(self._busy)
+
+    @contextmanager
+    def acquire(self) -> Iterator[str]:
+        """Borrow a healthy container for the duration of a ``with`` block.
+
+        Blocks while every container in a full pool is busy.
+
+        Yields:
+            The id of the borrowed container.
+        """
+        container_id = self._checkout()
+        try:
+            yield container_id
+        finally:
+            with self._condition:
+                self._busy.discard(container_id)
+                if self._closed:
+                    self.executor.stop(container_id)
+                else:
+                    self._idle[container_id] = time.monotonic()
+                self._condition.notify()
+
+    def _checkout(self) -> str:
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Container pool is shut down")
+                    if self._idle:
+                        container_id, _ = self._idle.popitem()
+                        self._busy.add(container_id)
+                        break
+                    if len(self._busy) + self._starting < self.size:
+                        container_id = None
+                        self._starting += 1
+                        break
+                    self._condition.wait()
+
+            # Docker calls happen outside the lock so releases never wait
+            if container_id is None:
+                try:
+                    container_id = self.executor.start()
+                finally:
+                    with self._condition:
+                        self._starting -= 1
+                        if container_id is not None:
+                            self._busy.add(container_id)
+                        self._condition.notify()
+                return container_id
+
+            if self.executor.is_healthy(container_id):
+                return container_id
+
+            # Replace containers that died while idle
+            self.executor.stop(container_id)
+            with self._condition:
+                self._busy.discard(container_id)
+                self._condition.notify()
+
+    def stop_idle(self, older_than: float = 0.0) -> int:
+        """Stop idle containers unused for at least ``older_than`` seconds.
+
+        Returns:
+            Number of containers stopped.
+        """
+        now = time.monotonic()
+        with self._condition:
+            expired = [
+                container_id
+                for container_id, since in self._idle.items()
+                if now - since >= older_than
+            ]
+            for container_id in expired:
+                del self._idle[container_id]
+        for container_id in expired:
+            self.executor.stop(container_id)
+        return len(expired)
+
+    def _reap_idle_loop(self) -> None:
+        interval = max(1.0, min(self.idle_timeout / 4, 30.0))
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                self._condition.wait(interval)
+            self.stop_idle(self.idle_timeout)
+
+    def shutdown(self) -> None:
+        """Stop all idle containers; busy ones stop when released."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self.stop_idle()
+
+
+_default_pool: Optional[ContainerPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> ContainerPool:
+    """Return the shared Docker-backed pool, creating it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ContainerPool()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
+
+
+def run_in_pool_report(
+    *,
+    target_dir: str,
+    strip_lines: bool = False,
+    print_fn=print,
+    pool: Optional[ContainerPool] = None,
+    log_file: Optional[str] = None,
+    metrics_file: Optional[str] = None,
+    jobs=None,
+    threads=None,
+    opt_level=None,
+    trace_format=None,
+    compiler_cache=None,
+    count_changes: bool = True,
+) -> RunReport:
+    """
+    Build and simulate an example inside a warm pooled container.
+
+    Takes the same arguments as run_in_pool, plus:
+
+    Args:
+        metrics_file (str): Optional JSON-lines file the report is
+            appended to
+        count_changes (bool): Whether to count the value changes of the
+            waveform, which reads the whole file once more after the run
+
+    Returns:
+        RunReport: Return code and timings. Waiting for a free container
+            counts as startup.
+    """
+    env_file_path = os.path.join(target_dir, ".env")
+    if not os.path.exists(env_file_path):
+        print_fn(f"Error: Environment file not found at {env_file_path}")
+        return start_report(target_dir, "pool")
+
+    pool = pool if pool is not None else get_default_pool()
+    # Only Docker executors have an image that may provide ccache
+    image = getattr(pool.executor, "image", None)
+    env = apply_build_settings(
+        read_env_file(env_file_path),
+        jobs=jobs,
+        threads=threads,
+        opt_level=opt_level,
+        trace_format=trace_format,
+        compiler_cache=compiler_cache,
+        compiler_cache_default=image is not None and image_has_ccache(image),
+    )
+    workdir = os.path.normpath(env.get("PROJECT_DIR", target_dir))
+    shell_command = verilator_shell_command(env)
+    # Remove the build directory inside the container, where it is owned
+    # by the same user that created it
+    cleanup = "status=$?; rm -rf obj_dir; exit $status"
+    report = start_report(target_dir, "pool", build_settings(env))
+    timer = PhaseTimer()
+    cache_stats_log = os.path.join(target_dir, CACHE_STATS_FILE)
+    _remove_cache_stats(cache_stats_log)
+
+    print_fn("Verilator Simulation Output:")
+    print_fn("=" * 80)
+
+    with StreamingOutput(strip_lines, print_fn, log_file) as output:
+
+        def on_line(line):
+            timer.observe(line)
+            output.write(line)
+
+        try:
+            with pool.acquire() as container_id:
+                returncode = pool.executor.exec(
+                    container_id,
+                    f"{shell_command}; {cleanup}",
+                    workdir,
+                    on_line,
+                )
+        except (OSError, subprocess.CalledProcessError) as error:
+            output.write(f"Error: could not start container: {error}")
+            returncode = 1
+
+    print_fn("=" * 80)
+    print_fn(f"Process finished with return code: {returncode}")
+
+    vcd_file = env.get("VCD_FILE", "")
+    finish_report(
+        report,
+        timer,
+        returncode,
+        output.line_count,
+        store_fst_trace(os.path.join(target_dir, vcd_file))
+        if vcd_file and returncode == 0
+        else "",
+        metrics_file,
+        cache_stats_log,
+        count_changes,
+    )
+    _remove_cache_stats(cache_stats_log)
+    if report.cache_hits or report.cache_misses:
+        print_fn(
+            f"Compiler cache: {report.cache_hits} hits, "
+            f"{report.cache_misses} misses"
+        )
+    return report
+
+
+def run_in_pool(
+    *,
+    target_dir: str,
+    strip_lines: bool = False,
+    print_fn=print,
+    pool: Optional[ContainerPool] = None,
+    log_file: Optional[str] = None,
+    metrics_file: Optional[str] = None,
+    jobs=None,
+    threads=None,
+    opt_level=None,
+    trace_format=None,
+    compiler_cache=None,
+) -> int:
+    """
+    Build and simulate an example inside a warm pooled container.
+
+    Behaves like verilator_runner.run_docker_compose, but execs into a
+    running container instead of creating a new one for every call.
+
+    Args:
+        target_dir (str): Path to the target directory containing .env file
+        strip_lines (bool): Whether to strip first and last lines from output
+        print_fn (callable): Function receiving each output line
+        pool (ContainerPool): Pool to use, the shared pool by default
+        log_file (str): Optional path that receives the complete output
+        metrics_file (str): Optional JSON-lines file that receives the
+            run's RunReport
+        jobs, threads, opt_level, trace_format, compiler_cache: Build
+            settings overriding the .env file, as for run_docker_compose
+
+    Returns:
+        int: Return code of the simulation, 0 for success.
+    """
+    return run_in_pool_report(
+        target_dir=target_dir,
+        strip_lines=strip_lines,
+        print_fn=print_fn,
+        pool=pool,
+        log_file=log_file,
+        metrics_file=metrics_file,
+        jobs=jobs,
+        threads=threads,
+        opt_level=opt_level,
+        trace_format=trace_format,
+        compiler_cache=compiler_cache,
+        count_changes=metrics_file is not None,
+    ).returncode
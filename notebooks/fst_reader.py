@@ -0,0 +1,391 @@
+"""
+FST Waveform Reader Module
+
+This module reads the Fast Signal Trace files Verilator writes with
+``--trace-fst`` through the libfst bindings of the pylibfst package,
+installed by the project's optional fst extra. FstStream offers the
+same interface as vcd_stream.VcdStream (a parsed VcdHeader and a
+changes() generator yielding (time, identifier code, value) tuples), so
+vcd_stream.open_vcd() hands FST files to the signal listing, waveform
+store, plotting and diff tools unchanged.
+Identifier codes are the FST signal handles, as strings.
+"""
+
+import os
+import queue
+import struct
+import threading
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from vcd_stream import (
+    SignalSelector,
+    VcdHeader,
+    VcdVariable,
+    parse_timescale,
+    select_variables,
+)
+
+FST_SUFFIX = ".fst"
+# Every FST file starts with its header block: type 0, length 329
+FST_MAGIC = b"\x00" + (329).to_bytes(8, "big")
+# Start and end time, endian test, memory, scope, variable, handle and
+# block counts, timescale exponent, version and date
+_HEADER_BLOCK = struct.Struct(">QQdQQQQQb128s119s")
+# Value changes are handed from the libfst callback in batches this big
+CHANGE_BATCH = 4096
+
+_TIME_UNITS = ("s", "ms", "us", "ns", "ps", "fs", "as")
+
+
+def _import_pylibfst():
+    try:
+        import pylibfst
+    except ImportError:
+        raise ImportError(
+            "Reading .fst files requires the pylibfst package from the "
+            "fst extra (uv sync --extra fst, or pip install pylibfst)"
+        ) from None
+    return pylibfst
+
+
+def is_fst_file(filename: str) -> bool:
+    """Check whether a file name is an FST waveform."""
+    return filename.endswith(FST_SUFFIX)
+
+
+def has_fst_content(filename: str) -> bool:
+    """Check whether a file holds FST data, whatever its name."""
+    try:
+        with open(filename, "rb") as file:
+            return file.read(len(FST_MAGIC)) == FST_MAGIC
+    except OSError:
+        return False
+
+
+def fst_path_for(vcd_filename: str) -> str:
+    """Return the FST name of a waveform file: counter.vcd -> counter.fst."""
+    return os.path.splitext(vcd_filename)[0] + FST_SUFFIX
+
+
+def store_fst_trace(vcd_path: str) -> str:
+    """Give an FST trace written under a VCD name its .fst name.
+
+    With --trace-fst, Verilator writes FST data to the file named by the
+    testbench's $dumpfile, which is the VCD_FILE of the example. The file
+    is renamed so that every tool recognizes it by its suffix.
+
+    Args:
+        vcd_path: Waveform file the simulation wrote.
+
+    Returns:
+        Path of the waveform: the .fst file, or ``vcd_path`` unchanged
+        when it holds VCD text (or does not exist).
+    """
+    if not has_fst_content(vcd_path):
+        return vcd_path
+    fst_path = fst_path_for(vcd_path)
+    os.replace(vcd_path, fst_path)
+    return fst_path
+
+
+def waveform_file(target_dir: str, vcd_file: str) -> str:
+    """Pick the waveform to open for an example's VCD_FILE entry.
+
+    Returns:
+        The .fst sibling of ``vcd_file`` when it is missing or older than
+        that FST file, else ``vcd_file``. Both are relative to
+        ``target_dir``.
+    """
+    if not vcd_file or is_fst_file(vcd_file):
+        return vcd_file
+    fst_file = fst_path_for(vcd_file)
+    try:
+        fst_mtime = os.path.getmtime(os.path.join(target_dir, fst_file))
+    except OSError:
+        return vcd_file
+    try:
+        vcd_mtime = os.path.getmtime(os.path.join(target_dir, vcd_file))
+    except OSError:
+        return fst_file
+    return fst_file if fst_mtime >= vcd_mtime else vcd_file
+
+
+def _timescale_text(exponent: int) -> str:
+    """Convert an FST timescale exponent (-12 for 1ps) to VCD text."""
+    unit = min(-(exponent // 3), len(_TIME_UNITS) - 1)
+    return f"{10 ** (exponent + 3 * unit)}{_TIME_UNITS[unit]}"
+
+
+def _read_header_block(fst_filename: str) -> Tuple[VcdHeader, int, int]:
+    """Parse the fixed-size header block at the start of an FST file.
+
+    libfst refuses to open files without any variable (testbenches that
+    dump nothing), but their header block still holds the timescale and
+    time range.
+
+    Returns:
+        Tuple of (header without variables, start time, end time).
+    """
+    with open(fst_filename, "rb") as file:
+        data = file.read(len(FST_MAGIC) + _HEADER_BLOCK.size)
+    if not data.startswith(FST_MAGIC):
+        raise ValueError(f"Not an FST file: {fst_filename}")
+    fields = _HEADER_BLOCK.unpack_from(data, len(FST_MAGIC))
+    start, end, exponent, version, date = fields[0], fields[1], *fields[8:]
+    header = VcdHeader(
+        timescale=parse_timescale(_timescale_text(exponent)),
+        version=version.split(b"\0")[0].decode(errors="replace"),
+        date=date.split(b"\0")[0].decode(errors="replace"),
+    )
+    return header, start, end
+
+
+def _var_type_names(lib) -> Dict[int, str]:
+    """Map libfst variable types to VCD names (FST_VT_VCD_WIRE: wire)."""
+    names = {}
+    for name in dir(lib):
+        for prefix in ("FST_VT_VCD_", "FST_VT_SV_", "FST_VT_GEN_"):
+            if name.startswith(prefix):
+                names[getattr(lib, name)] = name[len(prefix) :].lower()
+    return names
+
+
+def _read_header(pylibfst, reader) -> VcdHeader:
+    lib = pylibfst.lib
+    var_types = _var_type_names(lib)
+    header = VcdHeader(
+        timescale=parse_timescale(
+            _timescale_text(lib.fstReaderGetTimescale(reader))
+        ),
+        version=pylibfst.string(lib.fstReaderGetVersionString(reader)),
+        date=pylibfst.string(lib.fstReaderGetDateString(reader)),
+    )
+    hierarchy: List[str] = []
+    lib.fstReaderIterateHierRewind(reader)
+    while True:
+        item = lib.fstReaderIterateHier(reader)
+        if item == pylibfst.ffi.NULL:
+            break
+        if item.htyp == lib.FST_HT_SCOPE:
+            hierarchy.append(pylibfst.string(item.u.scope.name))
+            header.scopes.append(".".join(hierarchy))
+        elif item.htyp == lib.FST_HT_UPSCOPE:
+            if hierarchy:
+                hierarchy.pop()
+        elif item.htyp == lib.FST_HT_VAR:
+            scope = ".".join(hierarchy)
+            # Names may carry their range as "count [3:0]", VCD style
+            name = pylibfst.string(item.u.var.name).replace(" ", "")
+            header.variables.append(
+                VcdVariable(
+                    reference=f"{scope}.{name}" if scope else name,
+                    identifier_code=str(item.u.var.handle),
+                    size=item.u.var.length,
+                    var_type=var_types.get(item.u.var.typ, "wire"),
+                    scope=scope,
+                )
+            )
+    return header
+
+
+class FstStream:
+    """Reader over an FST file with the interface of VcdStream.
+
+    libfst delivers value changes through a callback, so changes() runs
+    the decoder on a worker thread and passes the changes over a bounded
+    queue. Memory use therefore stays flat, as with VCD streaming.
+    Decoding can be limited to a time range with limit_time_range().
+    """
+
+    def __init__(self, fst_filename: str):
+        """Open the file and read its hierarchy.
+
+        Args:
+            fst_filename: Path to the FST file.
+        """
+        self._pylibfst = _import_pylibfst()
+        lib = self._pylibfst.lib
+        self.begintime: Optional[int] = None
+        self._time_range: Optional[Tuple[int, int]] = None
+        self._decoder: Optional[Tuple[threading.Thread, Callable]] = None
+        self._reader = lib.fstReaderOpen(os.fsencode(fst_filename))
+        if self._reader == self._pylibfst.ffi.NULL:
+            self._reader = None
+            self.header, self.endtime, self._endtime = _read_header_block(
+                fst_filename
+            )
+            return
+        self.header = _read_header(self._pylibfst, self._reader)
+        self.endtime = lib.fstReaderGetStartTime(self._reader)
+        self._endtime = lib.fstReaderGetEndTime(self._reader)
+
+    def limit_time_range(self, t_start: int, t_end: int) -> None:
+        """Only decode the value change blocks overlapping a time range.
+
+        libfst works on whole blocks, so changes() may still yield times
+        outside the range.
+        """
+        self._time_range = (max(t_start, 0), max(t_end, 0))
+
+    def close(self) -> None:
+        if self._decoder is not None:
+            # Never free the reader under a running decoder
+            self._decoder[1]()
+        if self._reader is not None:
+            self._pylibfst.lib.fstReaderClose(self._reader)
+            self._reader = None
+
+    def changes(
+        self, identifier_codes: Optional[Collection[str]] = None
+    ) -> Iterator[Tuple[int, str, str]]:
+        """Yield value changes in time order.
+
+        Args:
+            identifier_codes: When given, libfst only decodes the value
+                chains of these signals.
+
+        Yields:
+            Tuples of (time, identifier_code, value). Vector values are
+            full-width bit strings, real values decimal text.
+        """
+        if self._reader is None:
+            # No variables, so no changes
+            self.endtime = max(self.endtime, self._endtime)
+            return
+        lib = self._pylibfst.lib
+        string = self._pylibfst.ffi.string
+        if self._decoder is not None:
+            self._decoder[1]()
+        if self._time_range is None:
+            lib.fstReaderSetUnlimitedTimeRange(self._reader)
+        else:
+            lib.fstReaderSetLimitTimeRange(self._reader, *self._time_range)
+        if identifier_codes is None:
+            lib.fstReaderSetFacProcessMaskAll(self._reader)
+        else:
+            lib.fstReaderClrFacProcessMaskAll(self._reader)
+            for code in identifier_codes:
+                lib.fstReaderSetFacProcessMask(self._reader, int(code))
+
+        batches: "queue.Queue[Optional[list]]" = queue.Queue(maxsize=16)
+        stopped = threading.Event()
+        batch: list = []
+        errors: list = []
+
+        def on_change(_, time, handle, value):
+            if stopped.is_set():
+                # Skip the value chains of the remaining blocks
+                lib.fstReaderClrFacProcessMaskAll(self._reader)
+                lib.fstReaderSetLimitTimeRange(self._reader, 0, 0)
+                return
+            batch.append((time, str(handle), string(value).decode()))
+            if len(batch) >= CHANGE_BATCH:
+                batches.put(batch.copy())
+                batch.clear()
+
+        def decode():
+            try:
+                self._pylibfst.fstReaderIterBlocks(
+                    self._reader, on_change, None
+                )
+                if batch:
+                    batches.put(batch.copy())
+            except Exception as error:  # re-raised in the consumer
+                errors.append(error)
+            finally:
+                batches.put(None)
+
+        def stop():
+            # Let an abandoned decoder run to its end without blocking
+            stopped.set()
+            while worker.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            worker.join()
+            self._decoder = None
+
+        worker = threading.Thread(target=decode, daemon=True)
+        worker.start()
+        self._decoder = (worker, stop)
+        try:
+            while True:
+                changes = batches.get()
+                if changes is None:
+                    break
+                if self.begintime is None:
+                    self.begintime = changes[0][0]
+                self.endtime = changes[-1][0]
+                yield from changes
+        finally:
+            stop()
+        if errors:
+            raise errors[0]
+        self.endtime = max(self.endtime, self._endtime)
+
+
+@contextmanager
+def open_fst(fst_filename: str) -> Iterator[FstStream]:
+    """Open an FST file for streaming, like vcd_stream.open_vcd."""
+    stream = FstStream(fst_filename)
+    try:
+        yield stream
+    finally:
+        stream.close()
+
+
+def read_fst_window(
+    fst_filename: str,
+    t_start: int,
+    t_end: int,
+    signals: Optional[Iterable[SignalSelector]] = None,
+) -> Dict[str, List[Tuple[int, str]]]:
+    """Read the value changes of a time window, like vcd_index.read_window.
+
+    libfst seeks to the value change blocks covering the window itself,
+    so no sidecar index is needed.
+
+    Returns:
+        Dictionary mapping each reference to a list of (time, value)
+        tuples, starting with the value in effect at ``t_start``.
+    """
+    with open_fst(fst_filename) as stream:
+        header = stream.header
+        if signals is None:
+            variables = header.variables
+        else:
+            variables = select_variables(header, signals)
+        references_to_ids = {
+            variable.reference: variable.identifier_code
+            for variable in variables
+        }
+        current: Dict[str, str] = {}
+        changes: Dict[str, List[Tuple[int, str]]] = {
+            code: [] for code in references_to_ids.values()
+        }
+        stream.limit_time_range(t_start, t_end)
+        for time, code, value in stream.changes(changes.keys()):
+            # The limit only selects whole value change blocks
+            if time > t_end:
+                break
+            if time <= t_start:
+                current[code] = value
+            else:
+                changes[code].append((time, value))
+
+    window = {}
+    for reference, code in references_to_ids.items():
+        initial = [(t_start, current[code])] if code in current else []
+        window[reference] = initial + changes[code]
+    return window
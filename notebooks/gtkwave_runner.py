@@ -7,16 +7,23 @@ in a specified target directory with proper error handling and cleanup.
 
 import os
 import shutil
-import subprocess
-import textwrap
 
+from fst_reader import waveform_file
+from simulation_backends import read_env_file, select_backend
+from verilator_runner import StreamingOutput
 
-def run_docker_compose(target_dir):
+
+def run_docker_compose(target_dir, backend="auto"):
     """
     Run Docker Compose with Verilator in the specified target directory.
 
+    GTKWave runs natively when it is on PATH and through Docker Compose
+    otherwise. When the simulation traced to FST, the .fst file next to
+    VCD_FILE is opened instead.
+
     Args:
         target_dir (str): Path to the target directory containing .env file
+        backend: "auto", "docker", "local" or a backend object
 
     Returns:
         int:
@@ -35,54 +42,23 @@ def run_docker_compose(target_dir):
             print("Docker Compose Output:")
             print("=" * 80)
 
-            docker_output = []
-            process = subprocess.Popen(
-                [
-                    "docker-compose",
-                    "--env-file",
-                    env_file_path,
-                    "run",
-                    "--rm",
-                    "gtkwave",
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1,
+            env = read_env_file(env_file_path)
+            env["VCD_FILE"] = waveform_file(
+                target_dir, env.get("VCD_FILE", "")
             )
+            backend = select_backend(backend, tool="gtkwave")
 
-            for line in process.stdout:
-                clean_line = line.rstrip()
-                docker_output.append(clean_line)
-                if len(clean_line) > 80:
-                    wrapped_lines = textwrap.fill(clean_line, width=80)
-                    print(wrapped_lines)
-                else:
-                    print(clean_line)
+            with StreamingOutput(print_fn=print) as output:
+                returncode = backend.view_waveform(
+                    target_dir, env_file_path, env, output.write
+                )
 
-            process.wait()
             print("=" * 80)
-            print(f"Process finished with return code: {process.returncode}")
-
-            # Check for specific Docker connection issues
-            if process.returncode != 0:
-                output_text = " ".join(docker_output)
-                if (
-                    "dockerDesktopLinuxEngine" in output_text
-                    or "cannot find the file specified" in output_text
-                ):
-                    print("\n🐳 Docker Connection Error Detected:")
-                    print("- Please start Docker Desktop")
-                    print("- Wait for Docker to fully initialize")
-                    print(
-                        "- Try running 'docker ps' "
-                        "to verify Docker is working"
-                    )
-                else:
-                    print("\nDocker command failed. Common issues:")
-                    print("- Docker Desktop is not running")
-                    print("- Docker daemon is not accessible")
-                    print("- Docker service needs to be started")
+            print(f"Process finished with return code: {returncode}")
+
+            # Check for specific backend issues
+            if returncode != 0:
+                backend.explain_failure(list(output.recent_lines), print)
 
             # Cleanup
             if os.path.isdir(obj_dir):
@@ -92,7 +68,7 @@ def run_docker_compose(target_dir):
             else:
                 print(f"{obj_dir} directory not found, skipping cleanup.")
 
-            return process.returncode
+            return returncode
     else:
         print(f"Directory not found: {target_dir}")
         return 1
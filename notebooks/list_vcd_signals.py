@@ -1,56 +1,77 @@
-import vcdvcd
+from vcd_stream import select_variables, summarize_signals
 
 
-def list_vcd_signals(vcd_filename):
+def _load_summaries(vcd_filename, use_cache, signals=None):
+    """
+    Return (header, end time, summaries, references to ids) for the
+    selected signals, from the cache or a single pass
+    """
+    if use_cache:
+        from waveform_store import load_waveform
+
+        waveform = load_waveform(vcd_filename, signals=signals)
+        header, endtime = waveform.header, waveform.endtime
+        summaries = waveform.summaries()
+    else:
+        # Stream the VCD file once, keeping only per-signal summaries
+        header, endtime, summaries = summarize_signals(vcd_filename, signals)
+
+    if signals is None:
+        references_to_ids = header.references_to_ids
+    else:
+        references_to_ids = {
+            var.reference: var.identifier_code
+            for var in select_variables(header, signals)
+        }
+    return header, endtime, summaries, references_to_ids
+
+
+def list_vcd_signals(vcd_filename, use_cache=False, signals=None):
     """
     Parse a VCD file and list all signals with their properties
+
+    With use_cache=True the columnar waveform store is used, which writes a
+    sidecar cache next to the VCD and reuses it on later calls.
+
+    signals limits the listing to matching signals: exact references,
+    scope paths ("tb.dut"), globs ("*.dut.state*") or regular expressions
+    ("re:count|state"). Value changes of other signals are not decoded.
     """
     try:
-        # Parse the VCD file
-        vcd = vcdvcd.VCDVCD(vcd_filename)
+        header, endtime, summaries, references_to_ids = _load_summaries(
+            vcd_filename, use_cache, signals
+        )
 
         print(f"VCD File: {vcd_filename}")
-        print(f"Timescale: {vcd.timescale}")
-        print(f"End time: {vcd.endtime}")
+        print(f"Timescale: {header.timescale}")
+        print(f"End time: {endtime}")
         print("-" * 50)
 
         # Get all signals
-        signals = vcd.references_to_ids.keys()
+        signals = references_to_ids.keys()
         print(signals)
 
         print(f"Total signals found: {len(signals)}")
         print("-" * 50)
 
+        sizes = {var.reference: var.size for var in header.variables}
+
         # List each signal with details
         for signal_name in sorted(signals):
-            signal_id = vcd.references_to_ids[signal_name]
-            signal_data = vcd[signal_name]
-
-            # Get signal size/width
-            size = signal_data.size if hasattr(signal_data, "size") else "N/A"
-
-            # Get number of value changes
-            num_changes = len(signal_data.tv)
+            signal_id = references_to_ids[signal_name]
+            summary = summaries[signal_id]
 
             # Get initial and final values (if available)
-            if num_changes > 0:
-                initial_val = (
-                    signal_data.tv[0][1]
-                    if len(signal_data.tv[0]) > 1
-                    else "N/A"
-                )
-                final_val = (
-                    signal_data.tv[-1][1]
-                    if len(signal_data.tv[-1]) > 1
-                    else "N/A"
-                )
+            if summary.changes > 0:
+                initial_val = summary.initial_value
+                final_val = summary.final_value
             else:
                 initial_val = final_val = "N/A"
 
             print(f"Signal: {signal_name}")
             print(f"  ID: {signal_id}")
-            print(f"  Size: {size} bits")
-            print(f"  Changes: {num_changes}")
+            print(f"  Size: {sizes[signal_name]} bits")
+            print(f"  Changes: {summary.changes}")
             print(f"  Initial value: {initial_val}")
             print(f"  Final value: {final_val}")
             print()
@@ -61,12 +82,16 @@ def list_vcd_signals(vcd_filename):
         print(f"Error parsing VCD file: {e}")
 
 
-def list_signals_by_hierarchy(vcd_filename):
+def list_signals_by_hierarchy(vcd_filename, use_cache=False, signals=None):
     """
     Alternative function to list signals organized by hierarchy
+
+    signals selects a subset of signals, as in list_vcd_signals.
     """
     try:
-        vcd = vcdvcd.VCDVCD(vcd_filename)
+        _, _, summaries, references_to_ids = _load_summaries(
+            vcd_filename, use_cache, signals
+        )
 
         print(f"VCD File: {vcd_filename}")
         print("Signals organized by hierarchy:")
@@ -75,7 +100,7 @@ def list_signals_by_hierarchy(vcd_filename):
         # Group signals by hierarchy (module path)
         hierarchy = {}
 
-        for signal_name in vcd.references_to_ids.keys():
+        for signal_name in references_to_ids.keys():
             # Split signal name by hierarchy separator (usually '.')
             parts = signal_name.split(".")
             if len(parts) > 1:
@@ -96,8 +121,7 @@ def list_signals_by_hierarchy(vcd_filename):
                 full_name = (
                     f"{module}.{signal}" if module != "top" else signal
                 )
-                signal_data = vcd[full_name]
-                num_changes = len(signal_data.tv)
+                num_changes = summaries[references_to_ids[full_name]].changes
                 print(f"  {signal} ({num_changes} changes)")
 
     except Exception as e:
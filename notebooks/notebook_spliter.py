@@ -1,10 +1,27 @@
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
 import json
 import os
 import re
+import time
 from pathlib import Path
-from typing import Any, Dict, List, TypedDict
-
-from langgraph.graph import END, StateGraph
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
 
 
 class NotebookSplitterState(TypedDict):
@@ -13,10 +30,25 @@ class NotebookSplitterState(TypedDict):
     notebook_content: Dict[str, Any]
     sections: List[Dict[str, Any]]
     created_notebooks: List[str]
+    written_notebooks: List[str]
+    removed_notebooks: List[str]
     error_message: str
     split_level: int
 
 
+class BatchSplitResult(TypedDict):
+    input_notebook_path: str
+    output_directory: str
+    created_notebooks: List[str]
+    written_notebooks: List[str]
+    removed_notebooks: List[str]
+    error_message: str
+    duration: float
+
+
+MANIFEST_FILE = ".split_manifest.json"
+
+
 def load_notebook(state: NotebookSplitterState) -> NotebookSplitterState:
     """Load the input Jupyter notebook.
 
@@ -100,11 +132,83 @@ def extract_sections(state: NotebookSplitterState) -> NotebookSplitterState:
         return state
 
 
+def section_filename(title: str) -> str:
+    """Build the output notebook filename for a section title.
+
+    Args:
+        title: Heading text of the section.
+
+    Returns:
+        File name with unsafe characters replaced.
+    """
+    safe_title = re.sub(r"[^\w\s-]", "_", title)
+    safe_title = re.sub(r"[-\s]+", "__", safe_title)
+    return f"{safe_title}.ipynb"
+
+
+def load_manifest(output_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Load the record of notebooks written by previous splits.
+
+    Args:
+        output_dir: Directory holding the split notebooks.
+
+    Returns:
+        Mapping of filename to its content hash, size and mtime, or an
+        empty mapping when there is no readable manifest.
+    """
+    try:
+        with open(output_dir / MANIFEST_FILE, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write a file through a temporary file and an atomic rename.
+
+    Args:
+        path: Destination file.
+        text: Complete file content.
+    """
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def _is_unchanged(
+    output_path: Path, entry: Dict[str, Any], content_hash: str
+) -> bool:
+    """Check a previous output against the manifest without reading it."""
+    if entry.get("hash") != content_hash:
+        return False
+    try:
+        stat = output_path.stat()
+    except OSError:
+        return False
+    # Files edited by hand since the last split are rewritten
+    return (
+        stat.st_size == entry.get("size")
+        and stat.st_mtime_ns == entry.get("mtime_ns")
+    )
+
+
 def create_output_notebooks(
     state: NotebookSplitterState,
 ) -> NotebookSplitterState:
     """Create individual notebooks for each section.
 
+    Notebooks are only rewritten when their content changed. Each section
+    is hashed from a compact serialization and compared with the manifest
+    kept in the output directory. Changed notebooks are written atomically,
+    and notebooks from earlier splits whose headings disappeared are
+    removed.
+
     Args:
         state: The current state containing sections and output directory.
 
@@ -116,9 +220,35 @@ def create_output_notebooks(
         output_dir = Path(state["output_directory"])
         output_dir.mkdir(exist_ok=True)
 
+        # Stored relative to the output so the manifest survives moves
+        source = os.path.relpath(state["input_notebook_path"], output_dir)
+        previous_manifest = load_manifest(output_dir)
+        # Several notebooks may share an output directory; only the
+        # entries of this source are replaced
+        manifest = {
+            filename: entry
+            for filename, entry in previous_manifest.items()
+            if entry.get("source") != source
+        }
         created_notebooks = []
+        written_notebooks = []
+        current_files = set()
+
+        # Sections with the same title map to one file; the last one wins
+        last_section = {
+            section_filename(section["title"]): index
+            for index, section in enumerate(state["sections"])
+        }
+
+        for index, section in enumerate(state["sections"]):
+            # Generate filename
+            filename = section_filename(section["title"])
+            output_path = output_dir / filename
+            created_notebooks.append(str(output_path))
+            current_files.add(filename)
+            if last_section[filename] != index:
+                continue
 
-        for _, section in enumerate(state["sections"]):
             # Create new notebook structure
             new_notebook = {
                 "cells": section["cells"],
@@ -127,20 +257,58 @@ def create_output_notebooks(
                 "nbformat_minor": original_notebook.get("nbformat_minor", 2),
             }
 
-            # Generate filename
-            safe_title = re.sub(r"[^\w\s-]", "_", section["title"])
-            safe_title = re.sub(r"[-\s]+", "__", safe_title)
-            filename = f"{safe_title}.ipynb"
-            output_path = output_dir / filename
+            # The compact form uses the C encoder and is much cheaper than
+            # the indented output, so unchanged sections cost only a hash
+            content_hash = hashlib.sha256(
+                json.dumps(new_notebook, separators=(",", ":")).encode()
+            ).hexdigest()
+            entry = previous_manifest.get(filename, {})
 
-            # Write notebook
-            with open(output_path, "w", encoding="utf-8") as file:
-                json.dump(new_notebook, file, indent=2)
+            if _is_unchanged(output_path, entry, content_hash):
+                print(f"✓ Unchanged: {filename}")
+            else:
+                text = json.dumps(new_notebook, indent=2)
+                # Files from before the manifest existed are compared
+                # directly so identical content keeps its mtime
+                try:
+                    existing = output_path.read_text(encoding="utf-8")
+                except OSError:
+                    existing = None
+                if existing != text:
+                    write_atomic(output_path, text)
+                    written_notebooks.append(str(output_path))
+                    print(f"✓ Created: {filename}")
+                else:
+                    print(f"✓ Unchanged: {filename}")
+
+            stat = output_path.stat()
+            manifest[filename] = {
+                "hash": content_hash,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "source": source,
+            }
 
-            created_notebooks.append(str(output_path))
-            print(f"✓ Created: {filename}")
+        # Remove notebooks written for headings that no longer exist
+        removed_notebooks = []
+        for filename, entry in sorted(previous_manifest.items()):
+            if entry.get("source") != source or filename in current_files:
+                continue
+            stale_path = output_dir / filename
+            if stale_path.exists():
+                stale_path.unlink()
+                removed_notebooks.append(str(stale_path))
+                print(f"✓ Removed stale: {filename}")
+
+        if manifest != previous_manifest:
+            write_atomic(
+                output_dir / MANIFEST_FILE,
+                json.dumps(manifest, indent=2, sort_keys=True),
+            )
 
         state["created_notebooks"] = created_notebooks
+        state["written_notebooks"] = written_notebooks
+        state["removed_notebooks"] = removed_notebooks
         return state
 
     except Exception as error:
@@ -183,61 +351,100 @@ def finalize_success(state: NotebookSplitterState) -> NotebookSplitterState:
         The unchanged state after printing success information.
     """
     print(f"\n✅ Created {len(state['created_notebooks'])} notebooks")
+    print(
+        f"✏️ Written: {len(state.get('written_notebooks', []))}, "
+        f"removed: {len(state.get('removed_notebooks', []))}"
+    )
     print(f"📁 Output: {state['output_directory']}")
     return state
 
 
+# Linear pipeline shared by the direct engine and the LangGraph workflow
+PIPELINE: Tuple[Tuple[str, Callable], ...] = (
+    ("load_notebook", load_notebook),
+    ("extract_sections", extract_sections),
+    ("create_notebooks", create_output_notebooks),
+)
+
+ENGINES = ("direct", "graph")
+
+
+def run_pipeline(state: NotebookSplitterState) -> NotebookSplitterState:
+    """Run the pipeline nodes directly, without LangGraph.
+
+    Routing matches the graph: after every node check_errors decides
+    whether to continue or to end in handle_error; a run that passes all
+    nodes ends in finalize_success.
+
+    Args:
+        state: Initial workflow state.
+
+    Returns:
+        The final state.
+    """
+    for _, node in PIPELINE:
+        state = node(state)
+        if check_errors(state) == "error":
+            return handle_error(state)
+    return finalize_success(state)
+
+
 class NotebookSplitter:
     """Main class for the notebook splitter application.
 
     This class provides functionality to split Jupyter notebooks into smaller
-    notebooks based on markdown heading levels using a LangGraph workflow.
+    notebooks based on markdown heading levels. By default the pipeline
+    nodes run directly; the equivalent LangGraph workflow is only imported
+    and compiled for graph mode or view_graph.
     """
 
-    def __init__(self):
-        """Initialize the NotebookSplitter with a compiled workflow."""
-        self.workflow = self._create_workflow()
+    def __init__(self, engine: str = "direct"):
+        """Initialize the NotebookSplitter.
 
-    def _create_workflow(self) -> StateGraph:
+        Args:
+            engine: "direct" runs the nodes in sequence, "graph" invokes
+                the compiled LangGraph workflow. Defaults to "direct".
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}")
+        self.engine = engine
+        self._workflow = None
+
+    @property
+    def workflow(self):
+        """Compiled LangGraph workflow, created on first use."""
+        if self._workflow is None:
+            self._workflow = self._create_workflow()
+        return self._workflow
+
+    def _create_workflow(self) -> "StateGraph":
         """Create the LangGraph workflow.
 
         Returns:
             Compiled StateGraph workflow for notebook splitting.
         """
+        from langgraph.graph import END, StateGraph
+
         workflow = StateGraph(NotebookSplitterState)
 
         # Add nodes
-        workflow.add_node("load_notebook", load_notebook)
-        workflow.add_node("extract_sections", extract_sections)
-        workflow.add_node("create_notebooks", create_output_notebooks)
+        for name, node in PIPELINE:
+            workflow.add_node(name, node)
         workflow.add_node("handle_error", handle_error)
         workflow.add_node("finalize_success", finalize_success)
 
-        # Add edges
-        workflow.add_edge("load_notebook", "extract_sections")
-        workflow.add_edge("extract_sections", "create_notebooks")
-
-        # Add conditional edges for error handling
-        workflow.add_conditional_edges(
-            "load_notebook",
-            check_errors,
-            {"error": "handle_error", "success": "extract_sections"},
-        )
-
-        workflow.add_conditional_edges(
-            "extract_sections",
-            check_errors,
-            {"error": "handle_error", "success": "create_notebooks"},
-        )
-
-        workflow.add_conditional_edges(
-            "create_notebooks",
-            check_errors,
-            {"error": "handle_error", "success": "finalize_success"},
-        )
+        # Conditional edges route every step to the next node or to
+        # error handling; plain edges alongside them would run both
+        targets = [name for name, _ in PIPELINE[1:]] + ["finalize_success"]
+        for (name, _), target in zip(PIPELINE, targets):
+            workflow.add_conditional_edges(
+                name,
+                check_errors,
+                {"error": "handle_error", "success": target},
+            )
 
         # Set entry point and end nodes
-        workflow.set_entry_point("load_notebook")
+        workflow.set_entry_point(PIPELINE[0][0])
         workflow.add_edge("handle_error", END)
         workflow.add_edge("finalize_success", END)
 
@@ -267,12 +474,15 @@ class NotebookSplitter:
             notebook_content={},
             sections=[],
             created_notebooks=[],
+            written_notebooks=[],
+            removed_notebooks=[],
             error_message="",
             split_level=split_level,
         )
 
-        result = self.workflow.invoke(initial_state)
-        return result
+        if self.engine == "graph":
+            return self.workflow.invoke(initial_state)
+        return run_pipeline(initial_state)
 
     def view_graph(self):
         """Display the workflow graph structure in ASCII format."""
@@ -300,6 +510,132 @@ def discover_notebooks(directory: str = ".") -> List[str]:
     return sorted(notebook_files)
 
 
+def resolve_notebooks(patterns: Iterable[str]) -> List[str]:
+    """Expand notebook paths, glob patterns and directories.
+
+    Args:
+        patterns: Notebook paths, glob patterns such as "Chapter_*.ipynb",
+            or directories searched with discover_notebooks.
+
+    Returns:
+        Sorted list of unique notebook paths.
+    """
+    notebooks = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            notebooks.update(discover_notebooks(pattern))
+        elif not glob.has_magic(pattern):
+            # Kept even when missing, so the batch reports the error
+            notebooks.add(pattern)
+        else:
+            notebooks.update(
+                path
+                for path in glob.glob(pattern, recursive=True)
+                if path.endswith(".ipynb")
+            )
+    return sorted(notebooks)
+
+
+_worker_splitter = None
+
+
+def _split_one(arguments) -> BatchSplitResult:
+    """Split one notebook in a worker process, capturing its output."""
+    global _worker_splitter
+    input_path, output_dir, split_level = arguments
+    start = time.perf_counter()
+    # One splitter per worker process, reused for all of its notebooks.
+    # It runs the default direct engine, so workers never import
+    # LangGraph.
+    if _worker_splitter is None:
+        _worker_splitter = NotebookSplitter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = _worker_splitter.split_notebook(
+                input_path, output_dir, split_level
+            )
+    except Exception as error:
+        state = {"error_message": f"Split error: {str(error)}"}
+    return BatchSplitResult(
+        input_notebook_path=input_path,
+        output_directory=output_dir,
+        created_notebooks=list(state.get("created_notebooks", [])),
+        written_notebooks=list(state.get("written_notebooks", [])),
+        removed_notebooks=list(state.get("removed_notebooks", [])),
+        error_message=state.get("error_message", ""),
+        duration=time.perf_counter() - start,
+    )
+
+
+def split_notebooks_batch(
+    notebooks: Iterable[str],
+    output_dir: str = "split_notebooks",
+    split_level: int = 1,
+    max_workers: Optional[int] = None,
+) -> List[BatchSplitResult]:
+    """Split many notebooks without prompts, across a process pool.
+
+    Each notebook is split into its own subdirectory of ``output_dir``,
+    named after the notebook, so section titles such as "Introduction"
+    do not collide between notebooks.
+
+    Args:
+        notebooks: Notebook paths, e.g. from discover_notebooks or
+            resolve_notebooks.
+        output_dir: Parent directory for the per-notebook outputs.
+        split_level: Heading level to split on (1-6).
+        max_workers: Number of worker processes. Defaults to the core
+            count; 1 splits in the current process.
+
+    Returns:
+        One result per notebook, in input order.
+    """
+    notebooks = list(notebooks)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    tasks = [
+        (notebook, os.path.join(output_dir, Path(notebook).stem), split_level)
+        for notebook in notebooks
+    ]
+    workers = max(1, max_workers or os.cpu_count() or 1)
+    if workers == 1 or len(tasks) <= 1:
+        return [_split_one(task) for task in tasks]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(pool.map(_split_one, tasks))
+
+
+def print_batch_report(results: List[BatchSplitResult]) -> None:
+    """Print per-notebook counts and errors for a batch split.
+
+    Args:
+        results: Results returned by split_notebooks_batch.
+    """
+    failed = [result for result in results if result["error_message"]]
+    print("=" * 60)
+    print("📚 Batch Split Report")
+    print("=" * 60)
+    for result in results:
+        status = "❌" if result["error_message"] else "✓"
+        print(
+            f"{status} {result['input_notebook_path']}: "
+            f"{len(result['created_notebooks'])} notebooks, "
+            f"{len(result['written_notebooks'])} written, "
+            f"{len(result['removed_notebooks'])} removed "
+            f"({result['duration']:.2f} s)"
+        )
+        if result["error_message"]:
+            print(f"   {result['error_message']}")
+    print("-" * 60)
+    created = sum(len(result["created_notebooks"]) for result in results)
+    written = sum(len(result["written_notebooks"]) for result in results)
+    print(
+        f"{len(results) - len(failed)} split, {len(failed)} failed, "
+        f"{created} notebooks ({written} written)"
+    )
+
+
 def select_notebook_interactive() -> str:
     """Interactive notebook selection from current directory.
 
@@ -480,12 +816,49 @@ def explain_split_levels():
     print("=" * 30)
 
 
+def parse_batch_arguments(argv: Optional[List[str]] = None):
+    """Parse the command line options of the non-interactive batch mode.
+
+    Args:
+        argv: Arguments to parse. Defaults to sys.argv[1:].
+
+    Returns:
+        Parsed arguments namespace.
+    """
+    parser = argparse.ArgumentParser(
+        description="Split notebooks on markdown headings. Without "
+        "notebook arguments an interactive session starts."
+    )
+    parser.add_argument(
+        "notebooks",
+        nargs="*",
+        help="notebook paths, glob patterns or directories",
+    )
+    parser.add_argument("--level", type=int, default=1, choices=range(1, 7))
+    parser.add_argument("--output", default="split_notebooks")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
     """Interactive usage of the notebook splitter.
 
     Main entry point that provides a command-line interface for splitting
     Jupyter notebooks with interactive selection and configuration options.
+    Passing notebooks (paths, globs or directories) runs the
+    non-interactive batch mode instead.
     """
+    arguments = parse_batch_arguments()
+    if arguments.notebooks:
+        batch_results = split_notebooks_batch(
+            resolve_notebooks(arguments.notebooks),
+            arguments.output,
+            arguments.level,
+            arguments.jobs,
+        )
+        print_batch_report(batch_results)
+        exit(1 if any(r["error_message"] for r in batch_results) else 0)
+
     print("🚀 Notebook Splitter")
     print("=" * 30)
 
@@ -2,14 +2,142 @@
 Read SystemVerilog files and display their content in Jupyter Notebook.
 This utility function reads all SystemVerilog files from a specified path
 and displays their content in a formatted manner using Markdown.
+
+Directory listings and source files are cached for the lifetime of the
+kernel. A directory is listed again only when its modification time
+changes, and a file is read again only when its modification time or size
+changes, so re-running a chapter notebook costs a few stat calls per cell
+instead of re-reading every source file.
 """
 
-import glob
+import os
+from typing import Dict, List, Optional, Tuple
+
+SOURCE_SUFFIX = ".sv"
+
+# directory -> (mtime_ns, sorted .sv file names)
+_directory_index: Dict[str, Tuple[int, List[str]]] = {}
+# file path -> (mtime_ns, size, source text)
+_source_cache: Dict[str, Tuple[int, int, str]] = {}
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _listed_sources(directory: str) -> List[str]:
+    """Return the sorted .sv file names of a directory, listing it once."""
+    key = os.path.abspath(directory)
+    try:
+        mtime_ns = os.stat(key).st_mtime_ns
+    except OSError:
+        _directory_index.pop(key, None)
+        return []
+    cached = _directory_index.get(key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    with os.scandir(key) as entries:
+        names = sorted(
+            entry.name
+            for entry in entries
+            if entry.name.endswith(SOURCE_SUFFIX) and entry.is_file()
+        )
+    _directory_index[key] = (mtime_ns, names)
+    return names
+
+
+def find_sv_files(files_path: str) -> List[str]:
+    """Return the .sv files whose path starts with ``files_path``, sorted.
+
+    Matches the files of ``glob(f"{files_path}*.sv")``: ``files_path`` is
+    normally a directory ending in a separator, but may also end with a
+    file name prefix.
+    """
+    directory, prefix = os.path.split(files_path)
+    return [
+        os.path.join(directory, name)
+        for name in _listed_sources(directory or ".")
+        if name.startswith(prefix) and (prefix or not name.startswith("."))
+    ]
+
+
+def _source_text(path: str) -> str:
+    """Return the content of a source file, reading it only when changed."""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    cached = _source_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        _cache_stats["hits"] += 1
+        return cached[2]
+    _cache_stats["misses"] += 1
+    with open(path, "r") as source_file:
+        text = source_file.read()
+    _source_cache[key] = (stat.st_mtime_ns, stat.st_size, text)
+    return text
+
+
+def render_sv_file(
+    path: str, max_lines: Optional[int] = None, page: int = 1
+) -> str:
+    """Render one source file as a Markdown code block.
+
+    Args:
+        path: SystemVerilog file to render.
+        max_lines: Show at most this many lines, followed by a note with
+            the range shown. None shows the whole file.
+        page: Which block of ``max_lines`` lines to show, starting at 1.
+
+    Returns:
+        The Markdown text.
+    """
+    text = _source_text(path)
+    if max_lines is None or text.count("\n") < max_lines:
+        return f"```systemverilog\n{text}\n```"
+
+    lines = text.split("\n")
+    pages = -(-len(lines) // max_lines)
+    page = min(max(page, 1), pages)
+    first = (page - 1) * max_lines
+    last = min(first + max_lines, len(lines))
+    shown = "\n".join(lines[first:last])
+    return (
+        f"```systemverilog\n{shown}\n```\n\n"
+        f"*{os.path.basename(path)}: lines {first + 1}-{last} of "
+        f"{len(lines)} (page {page}/{pages})*"
+    )
+
+
+def read_sv_files(
+    files_path: str, max_lines: Optional[int] = None, page: int = 1
+) -> None:
+    """Display every .sv file under ``files_path`` in one Markdown output.
+
+    Args:
+        files_path: Directory (ending in a separator) or path prefix of the
+            files to show.
+        max_lines: Truncate each file to this many lines. None shows the
+            whole file.
+        page: Which block of ``max_lines`` lines to show, starting at 1.
+    """
+    # IPython is only needed once something is displayed
+    from IPython.display import Markdown, display
+
+    blocks = [
+        render_sv_file(path, max_lines, page)
+        for path in find_sv_files(files_path)
+    ]
+    if blocks:
+        display(Markdown("\n\n".join(blocks)))
+
 
-from IPython.display import Markdown, display
+def source_cache_info() -> Dict[str, int]:
+    """Return the number of cached directories and files, hits and misses."""
+    return {
+        "directories": len(_directory_index),
+        "files": len(_source_cache),
+        **_cache_stats,
+    }
 
 
-def read_sv_files(files_path: str) -> None:
-    for file in sorted(glob.glob(f"{files_path}*.sv")):
-        with open(file, "r") as source_file:
-            display(Markdown(f"```systemverilog\n{source_file.read()}\n```"))
+def clear_source_cache() -> None:
+    """Forget every cached directory listing and source file."""
+    _directory_index.clear()
+    _source_cache.clear()
+    _cache_stats.update(hits=0, misses=0)
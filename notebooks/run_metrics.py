@@ -0,0 +1,345 @@
+"""
+Simulation Run Metrics Module
+
+This module times the phases of a Verilator run (container or process
+startup, elaboration, C++ compile, simulation and teardown) by watching the
+tool output for the markers Verilator prints between phases. The timings,
+together with the size and, when asked for, the change count of the VCD
+file written by the run and the compiler cache hits and misses of its
+build, are collected in a RunReport that can be appended to a JSON-lines
+metrics file for later charting.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+PHASES = ("startup", "elaboration", "compile", "simulation", "teardown")
+
+_COMPILE_START = re.compile(
+    r"make(\[\d+\])?: Entering directory|^\s*(ccache\s+)?(g\+\+|clang\+\+)"
+)
+_VERILATOR_WALLTIME = re.compile(
+    r"^- Verilator: Walltime [\d.]+ s \(elab=([\d.]+), cvt=([\d.]+)"
+)
+_SIMULATION_REPORT = re.compile(r"^- S i m u l a t i o n\s+R e p o r t")
+
+# ccache statistics log counters of a compiler call served from the cache
+# (ccache 4.x names, then the older ones)
+_CACHE_HITS = frozenset(
+    (
+        "direct_cache_hit",
+        "preprocessed_cache_hit",
+        "cache_hit_direct",
+        "cache_hit_cpp",
+    )
+)
+_CACHE_MISS = "cache_miss"
+
+_metrics_lock = threading.Lock()
+
+
+@dataclass
+class RunReport:
+    """Outcome and timing breakdown of one simulation run.
+
+    Phase times are wall-clock seconds. Elaboration produces no output of
+    its own, so it is taken from Verilator's walltime summary when present
+    and subtracted from the startup phase. Teardown covers the time after
+    the simulation reports ``$finish``: the final VCD flush, process exit
+    and container removal. ``settings`` records the build jobs, model
+    threads and optimization level the run used, and ``cache_hits`` and
+    ``cache_misses`` count the compiler calls of its build that ccache
+    answered or had to run. ``vcd_changes`` is None when the waveform's
+    changes were not counted.
+    """
+
+    target_dir: str
+    backend: str
+    returncode: int = 1
+    started: str = ""
+    duration: float = 0.0
+    phases: Dict[str, float] = field(default_factory=dict)
+    settings: Dict[str, object] = field(default_factory=dict)
+    build_reused: bool = False
+    output_lines: int = 0
+    vcd_file: str = ""
+    vcd_bytes: int = 0
+    vcd_changes: Optional[int] = None
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.returncode == 0
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+class PhaseTimer:
+    """Attribute wall-clock time to run phases from a stream of output."""
+
+    def __init__(self, build: bool = True):
+        """Start timing in the startup phase.
+
+        Args:
+            build: Whether the run builds the model. Without a build, the
+                first output line already belongs to the simulation.
+        """
+        self.build = build
+        self.phases: Dict[str, float] = {}
+        self.phase = "startup"
+        self._started = time.perf_counter()
+        self._phase_started = self._started
+        self._verilator_elaboration: Optional[float] = None
+
+    def _enter(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases[self.phase] = (
+            self.phases.get(self.phase, 0.0) + now - self._phase_started
+        )
+        self.phase = phase
+        self._phase_started = now
+
+    def observe(self, line: str) -> None:
+        """Advance the current phase based on one output line."""
+        line = line.rstrip()
+        if self.phase == "startup":
+            if _COMPILE_START.search(line):
+                self._enter("compile")
+            elif not self.build and line:
+                self._enter("simulation")
+        elif self.phase == "compile":
+            walltime = _VERILATOR_WALLTIME.match(line)
+            if walltime:
+                self._verilator_elaboration = float(walltime.group(1)) + float(
+                    walltime.group(2)
+                )
+                self._enter("simulation")
+        elif self.phase == "simulation":
+            if _SIMULATION_REPORT.match(line):
+                self._enter("teardown")
+
+    def finish(self) -> Tuple[float, Dict[str, float]]:
+        """Stop timing.
+
+        Returns:
+            Tuple of (total seconds, seconds per phase in PHASES order).
+        """
+        self._enter(self.phase)
+        elaboration = self._verilator_elaboration
+        if elaboration is not None:
+            elaboration = min(elaboration, self.phases.get("startup", 0.0))
+            self.phases["startup"] -= elaboration
+            self.phases["elaboration"] = elaboration
+        total = self._phase_started - self._started
+        return total, {
+            phase: round(self.phases[phase], 6)
+            for phase in PHASES
+            if phase in self.phases
+        }
+
+
+def vcd_statistics(
+    vcd_path: str, count_changes: bool = True
+) -> Tuple[int, Optional[int]]:
+    """Return the size in bytes and the number of value changes of a VCD.
+
+    FST files are counted too. Missing or unreadable files, and FST files
+    without the pylibfst package, count as (0, 0). Counting the changes
+    reads the whole file again; without ``count_changes`` only the size
+    is taken and the change count is None.
+    """
+    from vcd_stream import open_vcd
+
+    try:
+        size = os.path.getsize(vcd_path)
+        if not count_changes:
+            return size, None
+        with open_vcd(vcd_path) as stream:
+            changes = sum(1 for _ in stream.changes())
+    except (ImportError, OSError, ValueError):
+        return 0, 0
+    return size, changes
+
+
+def compiler_cache_statistics(stats_log: str) -> Tuple[int, int]:
+    """Count the cache hits and misses in a ccache statistics log.
+
+    ccache appends a "# <source file>" line per compiler call, followed by
+    the names of the counters the call incremented. Calls that could not
+    be cached count as neither. A missing log counts as (0, 0).
+
+    Returns:
+        Tuple of (hits, misses).
+    """
+    try:
+        with open(stats_log, "r", encoding="utf-8", errors="replace") as log:
+            lines = log.read().splitlines()
+    except OSError:
+        return 0, 0
+    calls: List[set] = []
+    for line in lines:
+        if line.startswith("#"):
+            calls.append(set())
+        elif calls:
+            calls[-1].add(line.strip())
+    hits = sum(1 for counters in calls if counters & _CACHE_HITS)
+    misses = sum(
+        1
+        for counters in calls
+        if _CACHE_MISS in counters and not counters & _CACHE_HITS
+    )
+    return hits, misses
+
+
+def start_report(
+    target_dir: str, backend: str, settings: Optional[dict] = None
+) -> RunReport:
+    """Create a report stamped with the current UTC time."""
+    return RunReport(
+        target_dir=target_dir,
+        backend=backend,
+        started=datetime.now(timezone.utc).isoformat(),
+        settings=dict(settings or {}),
+    )
+
+
+def finish_report(
+    report: RunReport,
+    timer: PhaseTimer,
+    returncode: int,
+    output_lines: int,
+    vcd_path: str = "",
+    metrics_file: Optional[str] = None,
+    cache_stats_log: str = "",
+    count_changes: bool = True,
+) -> RunReport:
+    """Fill in the results of a run and optionally log the report.
+
+    Args:
+        report: Report created by start_report.
+        timer: Timer that observed the run's output.
+        returncode: Return code of the run.
+        output_lines: Number of raw output lines.
+        vcd_path: Waveform file the run should have written.
+        metrics_file: JSON-lines file the report is appended to.
+        cache_stats_log: ccache statistics log written by the build.
+        count_changes: Whether to count the waveform's value changes,
+            which parses the whole file.
+
+    Returns:
+        The completed report.
+    """
+    report.returncode = returncode
+    report.duration, report.phases = timer.finish()
+    report.build_reused = not timer.build
+    report.output_lines = output_lines
+    if vcd_path:
+        report.vcd_file = vcd_path
+        report.vcd_bytes, report.vcd_changes = vcd_statistics(
+            vcd_path, count_changes
+        )
+    if cache_stats_log:
+        report.cache_hits, report.cache_misses = compiler_cache_statistics(
+            cache_stats_log
+        )
+    if metrics_file:
+        append_metrics(report, metrics_file)
+    return report
+
+
+def append_metrics(report: RunReport, metrics_file: str) -> None:
+    """Append a report as one JSON line. Safe to call from many threads."""
+    line = json.dumps(report.to_dict(), sort_keys=True) + "\n"
+    with _metrics_lock:
+        with open(metrics_file, "a", encoding="utf-8") as file:
+            file.write(line)
+
+
+def read_metrics(metrics_file: str) -> list:
+    """Load every report from a JSON-lines metrics file."""
+    with open(metrics_file, "r", encoding="utf-8") as file:
+        return [
+            RunReport(**json.loads(line)) for line in file if line.strip()
+        ]
+
+
+def settings_label(report: RunReport) -> str:
+    """Describe the build settings of a run, e.g. "jobs=8 threads=1 O-".
+
+    Runs tracing to FST get a " fst" suffix, runs built through the
+    compiler cache a " ccache" suffix.
+    """
+    if not report.settings:
+        return "unknown"
+    opt_level = report.settings.get("opt_level")
+    label = (
+        f"jobs={report.settings.get('jobs')} "
+        f"threads={report.settings.get('threads')} "
+        f"O{'-' if opt_level is None else opt_level}"
+    )
+    if report.settings.get("trace_format") == "fst":
+        label += " fst"
+    if report.settings.get("compiler_cache"):
+        label += " ccache"
+    return label
+
+
+def print_metrics_summary(reports: list, top: int = 10) -> None:
+    """Print total time per phase and the slowest examples.
+
+    Runs made with different build settings are also compared by their
+    mean compile and simulation times.
+
+    Args:
+        reports: RunReports, e.g. from read_metrics.
+        top: Number of slowest examples to list.
+    """
+    totals = {phase: 0.0 for phase in PHASES}
+    for report in reports:
+        for phase, seconds in report.phases.items():
+            totals[phase] = totals.get(phase, 0.0) + seconds
+    overall = sum(totals.values()) or 1.0
+
+    print("=" * 80)
+    print(f"Run Metrics Summary ({len(reports)} runs)")
+    print("=" * 80)
+    for phase, seconds in totals.items():
+        print(f"{phase:<12}{seconds:10.1f} s  {seconds / overall:6.1%}")
+    hits = sum(report.cache_hits for report in reports)
+    misses = sum(report.cache_misses for report in reports)
+    if hits + misses:
+        print(
+            f"compiler cache: {hits} hits, {misses} misses "
+            f"({hits / (hits + misses):.1%} hit rate)"
+        )
+    by_settings: Dict[str, list] = {}
+    for report in reports:
+        by_settings.setdefault(settings_label(report), []).append(report)
+    if len(by_settings) > 1:
+        print("-" * 80)
+        print(f"{'settings':<32}{'runs':>6}{'compile':>12}{'simulation':>12}")
+        for label, group in sorted(by_settings.items()):
+            compile_time = sum(r.phases.get("compile", 0.0) for r in group)
+            simulation = sum(r.phases.get("simulation", 0.0) for r in group)
+            print(
+                f"{label:<32}{len(group):>6}"
+                f"{compile_time / len(group):10.2f} s"
+                f"{simulation / len(group):10.2f} s"
+            )
+    print("-" * 80)
+    slowest = sorted(reports, key=lambda report: report.duration)[::-1]
+    for report in slowest[:top]:
+        dominant = max(
+            report.phases, key=report.phases.get, default="unknown"
+        )
+        print(
+            f"{report.duration:8.1f} s  {dominant:<12}{report.target_dir}"
+        )
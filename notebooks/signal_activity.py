@@ -0,0 +1,416 @@
+"""
+Signal Activity Statistics Module
+
+This module estimates the switching activity of every signal in a VCD or
+FST file, as a quick input for power estimates without exporting the
+waveform to external tools. For each bit it reports the toggle count and
+rate, the time spent low, high, X and Z, the duty cycle, the narrowest
+complete pulse and the pulses narrow enough to be glitches.
+
+The waveform is loaded through waveform_store, so repeated analyses reuse
+its columnar cache. Each signal's values are unpacked into a (changes x
+bits) state array once, and the statistics of all its bits come from
+run-length operations over that array. There are no per-bit or per-change
+Python loops.
+
+Usage:
+    python signal_activity.py dump.vcd [--sort toggles] [--top 20]
+"""
+
+import argparse
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from vcd_stream import SignalSelector
+from waveform_store import KIND_REAL, bit_matrix, load_waveform
+
+# Bit states, also the column order of the dwell times
+LOW, HIGH, UNKNOWN, HIGH_Z = 0, 1, 2, 3
+STATE_NAMES = ("low", "high", "x", "z")
+
+# ASCII bit value -> state. Weak FST values count as their strong level,
+# anything else that is not 0, 1 or Z as X.
+_STATES = np.full(256, UNKNOWN, dtype=np.uint8)
+for _chars, _state in (("0lL", LOW), ("1hH", HIGH), ("zZ", HIGH_Z)):
+    _STATES[np.frombuffer(_chars.encode(), dtype=np.uint8)] = _state
+
+ACTIVITY_COLUMNS = (
+    "reference",
+    "toggles",
+    "toggle_rate",
+    "low",
+    "high",
+    "x",
+    "z",
+    "duty_cycle",
+    "min_pulse",
+    "glitches",
+    "activity",
+)
+
+
+@dataclass
+class ActivityRow:
+    """Switching statistics of one bit, or of a whole signal.
+
+    Times are in the file's time units; the dwell times of a whole-signal
+    row are summed over its ``width`` bits. Toggles are 0 -> 1 and 1 -> 0
+    transitions; changes into or out of X and Z are not counted. A pulse
+    is a 0 or 1 level entered and left by a toggle, and pulses no wider
+    than the glitch width are counted as glitches.
+    """
+
+    reference: str
+    bit: Optional[int]
+    width: int
+    observed: int
+    toggles: int
+    toggle_rate: float
+    low: int
+    high: int
+    x: int
+    z: int
+    duty_cycle: Optional[float]
+    min_pulse: Optional[int]
+    glitches: int
+    activity: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        """The reference, narrowed to the bit for per-bit rows."""
+        if self.bit is None:
+            return self.reference
+        base = self.reference
+        if base.endswith("]") and "[" in base:
+            base = base[: base.rindex("[")]
+        return f"{base}[{self.bit}]"
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def bit_states(signal) -> np.ndarray:
+    """Return the values of a waveform_store signal as an (n, width)
+    array of LOW, HIGH, UNKNOWN and HIGH_Z states, MSB first."""
+    return _STATES[bit_matrix(signal)]
+
+
+def bit_activity(
+    times: np.ndarray,
+    states: np.ndarray,
+    end_time: int,
+    glitch_width: int = 0,
+) -> Dict[str, np.ndarray]:
+    """Compute the switching statistics of every bit of a signal.
+
+    Args:
+        times: int64 array of the n change times.
+        states: (n, width) state array, see bit_states().
+        end_time: Time the last values are held until.
+        glitch_width: Pulses this wide or narrower count as glitches.
+
+    Returns:
+        Dictionary of per-bit arrays: "toggles", "rises", "glitches",
+        "min_pulse" (-1 without a complete pulse) and "dwell", a
+        (width, 4) array of the time spent in each state.
+    """
+    count, width = states.shape
+    if count == 0:
+        zeros = np.zeros(width, dtype=np.int64)
+        return {
+            "toggles": zeros,
+            "rises": zeros,
+            "glitches": zeros,
+            "min_pulse": np.full(width, -1, dtype=np.int64),
+            "dwell": np.zeros((width, 4), dtype=np.int64),
+        }
+
+    times = times.astype(np.int64, copy=False)
+    # The last values last at least until their own change
+    end_time = max(end_time, int(times[-1]))
+    durations = np.diff(times, append=end_time)
+    dwell = np.stack(
+        [
+            (states == state).T.astype(np.int64) @ durations
+            for state in range(4)
+        ],
+        axis=1,
+    )
+
+    # Runs of equal states, bit after bit in one flat array
+    flat = states.T.ravel()
+    starts_run = np.ones(flat.size, dtype=bool)
+    starts_run[1:] = flat[1:] != flat[:-1]
+    starts_run[::count] = True
+    starts = np.flatnonzero(starts_run)
+    run_bit = starts // count
+    run_index = starts % count
+    run_state = flat[starts]
+    previous_state = np.where(
+        run_index > 0, flat[np.maximum(starts - 1, 0)], UNKNOWN
+    )
+    same_bit_next = np.append(run_bit[1:] == run_bit[:-1], False)
+    next_state = np.where(
+        same_bit_next, np.append(run_state[1:], UNKNOWN), UNKNOWN
+    )
+    run_end = np.where(
+        same_bit_next, times[np.append(run_index[1:], 0)], end_time
+    )
+    run_width = run_end - times[run_index]
+
+    entered_by_toggle = (run_state <= HIGH) & (previous_state <= HIGH)
+    toggles = np.bincount(run_bit[entered_by_toggle], minlength=width)
+    rises = np.bincount(
+        run_bit[entered_by_toggle & (run_state == HIGH)], minlength=width
+    )
+
+    pulse = entered_by_toggle & (next_state <= HIGH)
+    min_pulse = np.full(width, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(min_pulse, run_bit[pulse], run_width[pulse])
+    min_pulse[min_pulse == np.iinfo(np.int64).max] = -1
+    glitch = pulse & (run_width <= glitch_width)
+    glitches = np.bincount(run_bit[glitch], minlength=width)
+
+    return {
+        "toggles": toggles,
+        "rises": rises,
+        "glitches": glitches,
+        "min_pulse": min_pulse,
+        "dwell": dwell,
+    }
+
+
+def _bit_numbers(reference: str, width: int) -> List[int]:
+    """Bit numbers of the state columns, from a "[msb:lsb]" suffix."""
+    msb, lsb = width - 1, 0
+    if reference.endswith("]") and "[" in reference:
+        bounds = reference[reference.rindex("[") + 1 : -1].split(":")
+        try:
+            msb, lsb = int(bounds[0]), int(bounds[-1])
+        except ValueError:
+            pass
+    step = -1 if msb >= lsb else 1
+    return [msb + step * column for column in range(width)]
+
+
+def _row(
+    reference: str,
+    bit: Optional[int],
+    width: int,
+    observed: int,
+    seconds_per_unit: float,
+    toggles: int,
+    dwell: np.ndarray,
+    min_pulse: int,
+    glitches: int,
+    clock_rises: Optional[int],
+) -> ActivityRow:
+    low, high, unknown, high_z = (int(value) for value in dwell)
+    seconds = observed * seconds_per_unit
+    return ActivityRow(
+        reference=reference,
+        bit=bit,
+        width=width,
+        observed=observed,
+        toggles=int(toggles),
+        toggle_rate=toggles / seconds if seconds else 0.0,
+        low=low,
+        high=high,
+        x=unknown,
+        z=high_z,
+        duty_cycle=high / (low + high) if low + high else None,
+        min_pulse=None if min_pulse < 0 else int(min_pulse),
+        glitches=int(glitches),
+        activity=toggles / clock_rises if clock_rises else None,
+    )
+
+
+def signal_activity(
+    vcd_filename: str,
+    signals: Optional[Iterable[SignalSelector]] = None,
+    per_bit: bool = True,
+    glitch_width: int = 0,
+    clock: Optional[str] = None,
+    use_cache: bool = True,
+) -> List[ActivityRow]:
+    """Compute the activity statistics of the signals of a waveform file.
+
+    Args:
+        vcd_filename: VCD (plain or compressed) or FST file.
+        signals: Optional selectors (see vcd_stream.select_variables).
+        per_bit: One row per bit of vector signals. When False, vectors
+            get a single row with the toggles, glitches and dwell times
+            summed over their bits and the narrowest pulse of any bit.
+        glitch_width: Pulses this many time units wide or narrower count
+            as glitches. The default only flags zero-width pulses.
+        clock: Reference of a clock signal. Its rising edges give each
+            row's activity factor, in toggles per clock cycle.
+        use_cache: Whether to use the waveform_store sidecar cache.
+
+    Returns:
+        ActivityRows in header order. Real signals are skipped.
+    """
+    if signals is not None and clock is not None:
+        signals = [*signals, clock]
+    waveform = load_waveform(vcd_filename, use_cache, signals)
+    end_time = waveform.endtime
+    seconds_per_unit = float(waveform.header.timescale["timescale"])
+
+    statistics: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def statistics_for(code: str) -> Dict[str, np.ndarray]:
+        if code not in statistics:
+            signal = waveform.signals[code]
+            statistics[code] = bit_activity(
+                signal.times, bit_states(signal), end_time, glitch_width
+            )
+        return statistics[code]
+
+    clock_rises = None
+    if clock is not None:
+        clock_code = waveform.references_to_ids.get(clock)
+        if clock_code not in waveform.signals:
+            raise ValueError(f"Clock signal not found: {clock}")
+        clock_rises = int(statistics_for(clock_code)["rises"].sum())
+
+    rows = []
+    for variable in waveform.header.variables:
+        signal = waveform.signals.get(variable.identifier_code)
+        if signal is None or signal.kind == KIND_REAL:
+            continue
+        stats = statistics_for(variable.identifier_code)
+        observed = end_time - int(signal.times[0]) if len(signal) else 0
+        common = dict(
+            reference=variable.reference,
+            observed=observed,
+            seconds_per_unit=seconds_per_unit,
+            clock_rises=clock_rises,
+        )
+        if per_bit and signal.size > 1:
+            numbers = _bit_numbers(variable.reference, signal.size)
+            for column, bit in enumerate(numbers):
+                rows.append(
+                    _row(
+                        bit=bit,
+                        width=1,
+                        toggles=stats["toggles"][column],
+                        dwell=stats["dwell"][column],
+                        min_pulse=stats["min_pulse"][column],
+                        glitches=stats["glitches"][column],
+                        **common,
+                    )
+                )
+            continue
+        pulses = stats["min_pulse"][stats["min_pulse"] >= 0]
+        rows.append(
+            _row(
+                bit=None,
+                width=signal.size,
+                toggles=stats["toggles"].sum(),
+                dwell=stats["dwell"].sum(axis=0),
+                min_pulse=pulses.min() if len(pulses) else -1,
+                glitches=stats["glitches"].sum(),
+                **common,
+            )
+        )
+    return rows
+
+
+def sort_activity(
+    rows: List[ActivityRow], key: str = "toggles", descending: bool = True
+) -> List[ActivityRow]:
+    """Sort rows by one of ACTIVITY_COLUMNS. Missing values go last."""
+    if key not in ACTIVITY_COLUMNS:
+        raise ValueError(f"key must be one of {ACTIVITY_COLUMNS}")
+    if key == "reference":
+        return sorted(
+            rows, key=lambda row: (row.name, row.bit), reverse=descending
+        )
+    present = [row for row in rows if getattr(row, key) is not None]
+    missing = [row for row in rows if getattr(row, key) is None]
+    present.sort(key=lambda row: getattr(row, key), reverse=descending)
+    return present + missing
+
+
+def _fraction(part: int, whole: int) -> str:
+    return f"{part / whole:6.1%}" if whole else f"{'-':>6}"
+
+
+def print_activity_table(
+    rows: List[ActivityRow],
+    sort_by: str = "toggles",
+    descending: bool = True,
+    top: Optional[int] = None,
+) -> None:
+    """Print the rows as a table sorted by one of ACTIVITY_COLUMNS.
+
+    Dwell times are shown as fractions of each row's observed time.
+    """
+    rows = sort_activity(rows, sort_by, descending)[:top]
+    show_activity = any(row.activity is not None for row in rows)
+    name_width = max([len(row.name) for row in rows] + [6])
+    header = (
+        f"{'signal':<{name_width}} {'toggles':>8} {'rate/s':>9} "
+        f"{'low':>6} {'high':>6} {'x':>6} {'z':>6} {'duty':>6} "
+        f"{'min pulse':>10} {'glitches':>8}"
+    )
+    if show_activity:
+        header += f" {'activity':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        duty = f"{row.duty_cycle:6.1%}" if row.duty_cycle is not None else "-"
+        pulse = "-" if row.min_pulse is None else str(row.min_pulse)
+        bit_time = row.observed * row.width
+        line = (
+            f"{row.name:<{name_width}} {row.toggles:>8} "
+            f"{row.toggle_rate:>9.3g} "
+            f"{_fraction(row.low, bit_time)} "
+            f"{_fraction(row.high, bit_time)} "
+            f"{_fraction(row.x, bit_time)} "
+            f"{_fraction(row.z, bit_time)} {duty:>6} "
+            f"{pulse:>10} {row.glitches:>8}"
+        )
+        if show_activity:
+            activity = "-" if row.activity is None else f"{row.activity:.3f}"
+            line += f" {activity:>8}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Print switching activity statistics of a waveform."
+    )
+    parser.add_argument("vcd_file")
+    parser.add_argument(
+        "--signals", nargs="*", help="signal selectors (default: all)"
+    )
+    parser.add_argument(
+        "--sort", choices=ACTIVITY_COLUMNS, default="toggles"
+    )
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--top", type=int)
+    parser.add_argument(
+        "--per-signal",
+        action="store_true",
+        help="one row per vector instead of one per bit",
+    )
+    parser.add_argument("--glitch-width", type=int, default=0)
+    parser.add_argument("--clock", help="clock reference for activity")
+    args = parser.parse_args(argv)
+
+    rows = signal_activity(
+        args.vcd_file,
+        signals=args.signals,
+        per_bit=not args.per_signal,
+        glitch_width=args.glitch_width,
+        clock=args.clock,
+    )
+    print_activity_table(rows, args.sort, not args.ascending, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,776 @@
+"""
+Simulation Backends Module
+
+This module provides the execution backends behind the Verilator and
+GTKWave runners. The Docker Compose backend runs the services defined in
+docker-compose.yml, the local backend runs a natively installed toolchain
+directly, and the scripted backend stands in for both in tests. All of
+them share the same .env parsing and Verilator command line, and describe
+each run as a list of commands so the blocking and the asyncio runners
+execute exactly the same processes.
+"""
+
+import functools
+import os
+import shutil
+import subprocess
+import sys
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# A command line and the working directory it runs in (None: current)
+Command = Tuple[List[str], Optional[str]]
+
+# Must match the verilator service command in docker-compose.yml
+VERILATOR_FLAGS = "--binary --trace"
+
+# Optional .env settings controlling the build, see build_settings()
+JOBS_SETTING = "VERILATOR_JOBS"
+THREADS_SETTING = "VERILATOR_THREADS"
+OPT_SETTING = "VERILATOR_OPT"
+OPT_LEVELS = (0, 1, 2, 3)
+TRACE_SETTING = "VERILATOR_TRACE"
+TRACE_FORMATS = ("vcd", "fst")
+CACHE_SETTING = "VERILATOR_CCACHE"
+CACHE_DIR_SETTING = "VERILATOR_CCACHE_DIR"
+
+# Image of the verilator service in docker-compose.yml
+VERILATOR_IMAGE = "verilator/verilator:latest"
+# ccache directory in the verilator_cache volume, see docker-compose.yml
+CONTAINER_CACHE_DIR = "/tmp/verilator_cache"
+# Per-run ccache statistics log, written next to the example's .env file
+CACHE_STATS_FILE = ".ccache_stats.log"
+
+
+def read_env_file(env_file_path: str) -> dict:
+    """
+    Read KEY=VALUE pairs from a docker-compose .env file.
+
+    Args:
+        env_file_path (str): Path to the .env file
+
+    Returns:
+        dict: Mapping of variable names to values
+    """
+    env = {}
+    with open(env_file_path, "r", encoding="utf-8") as env_file:
+        for line in env_file:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            env[key.strip()] = value.strip().strip("\"'")
+    return env
+
+
+def _count_setting(name: str, value, default) -> int:
+    if value is None or str(value).strip() == "":
+        value = default
+    if str(value).strip().lower() == "auto":
+        return os.cpu_count() or 1
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise ValueError(
+            f"{name} must be a positive integer or 'auto', got {value!r}"
+        )
+    return count
+
+
+def _opt_setting(value) -> Optional[int]:
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        level = int(value)
+    except ValueError:
+        level = -1
+    if level not in OPT_LEVELS:
+        raise ValueError(
+            f"{OPT_SETTING} must be one of {OPT_LEVELS}, got {value!r}"
+        )
+    return level
+
+
+def _trace_setting(value) -> str:
+    if value is None or str(value).strip() == "":
+        return TRACE_FORMATS[0]
+    trace_format = str(value).strip().lower()
+    if trace_format not in TRACE_FORMATS:
+        raise ValueError(
+            f"{TRACE_SETTING} must be one of {TRACE_FORMATS}, got {value!r}"
+        )
+    return trace_format
+
+
+def _switch_setting(name: str, value, default: bool) -> bool:
+    if value is None or str(value).strip() == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "on", "true", "yes"):
+        return True
+    if text in ("0", "off", "false", "no"):
+        return False
+    raise ValueError(f"{name} must be 'on' or 'off', got {value!r}")
+
+
+def build_settings(
+    env: dict,
+    jobs=None,
+    threads=None,
+    opt_level=None,
+    trace_format=None,
+    compiler_cache=None,
+    compiler_cache_default: bool = False,
+) -> dict:
+    """
+    Resolve the build parallelism, model threads, optimization level,
+    waveform format and compiler cache use.
+
+    Keyword values take precedence over the VERILATOR_JOBS,
+    VERILATOR_THREADS, VERILATOR_OPT, VERILATOR_TRACE and
+    VERILATOR_CCACHE entries of the .env file. Without either, the build
+    uses one job per host core and produces a single-threaded model with
+    Verilator's default optimization that writes VCD, which suits the
+    small examples; "auto" selects the host core count. The compiler
+    cache is used only where it is known to exist, see
+    compiler_cache_default().
+
+    Args:
+        env (dict): Settings read from the example's .env file
+        jobs: Parallel Verilator and C++ compile jobs (-j)
+        threads: Threads of the simulation model (--threads)
+        opt_level: Optimization level 0-3 for Verilator (-O) and the C++
+            compiler (OPT_FAST), None for the defaults
+        trace_format: "vcd" or "fst" (--trace-fst, see
+            fst_reader.store_fst_trace)
+        compiler_cache: Whether the C++ compiler runs through ccache (see
+            compiler_cache_variables)
+        compiler_cache_default (bool): Compiler cache use when neither
+            the keyword nor VERILATOR_CCACHE sets it
+
+    Returns:
+        dict: "jobs" and "threads" as ints, "opt_level" as an int or None,
+            "trace_format" as a string, "compiler_cache" as a bool
+    """
+
+    def pick(value, key):
+        return env.get(key) if value is None else value
+
+    return {
+        "jobs": _count_setting(JOBS_SETTING, pick(jobs, JOBS_SETTING), "auto"),
+        "threads": _count_setting(
+            THREADS_SETTING, pick(threads, THREADS_SETTING), 1
+        ),
+        "opt_level": _opt_setting(pick(opt_level, OPT_SETTING)),
+        "trace_format": _trace_setting(pick(trace_format, TRACE_SETTING)),
+        "compiler_cache": _switch_setting(
+            CACHE_SETTING,
+            pick(compiler_cache, CACHE_SETTING),
+            compiler_cache_default,
+        ),
+    }
+
+
+def apply_build_settings(
+    env: dict,
+    jobs=None,
+    threads=None,
+    opt_level=None,
+    trace_format=None,
+    compiler_cache=None,
+    compiler_cache_default: bool = False,
+) -> dict:
+    """
+    Return a copy of ``env`` with the resolved build settings filled in.
+
+    Every backend reads the settings from the .env mapping, so keyword
+    overrides are applied once, here, and reach all of them.
+    """
+    settings = build_settings(
+        env,
+        jobs,
+        threads,
+        opt_level,
+        trace_format,
+        compiler_cache,
+        compiler_cache_default,
+    )
+    env = dict(env)
+    env[JOBS_SETTING] = str(settings["jobs"])
+    env[THREADS_SETTING] = str(settings["threads"])
+    env[OPT_SETTING] = (
+        "" if settings["opt_level"] is None else str(settings["opt_level"])
+    )
+    env[TRACE_SETTING] = settings["trace_format"]
+    env[CACHE_SETTING] = "on" if settings["compiler_cache"] else "off"
+    return env
+
+
+def verilator_flags(env: dict) -> List[str]:
+    """
+    Base Verilator flags of an example, tracing in its waveform format.
+
+    Args:
+        env (dict): Settings read from the example's .env file
+
+    Returns:
+        list: VERILATOR_FLAGS, with --trace-fst replacing --trace for FST
+    """
+    flags = VERILATOR_FLAGS.split()
+    if build_settings(env)["trace_format"] == "fst":
+        flags = [
+            "--trace-fst" if flag == "--trace" else flag for flag in flags
+        ]
+    return flags
+
+
+def verilator_option_args(env: dict, model_only: bool = False) -> List[str]:
+    """
+    Verilator arguments for the build settings of an example.
+
+    Args:
+        env (dict): Settings read from the example's .env file
+        model_only (bool): Leave out -j and the compiler cache, which
+            only change build speed
+
+    Returns:
+        list: Arguments to add to the Verilator command line
+    """
+    settings = build_settings(env)
+    args = [] if model_only else ["-j", str(settings["jobs"])]
+    args += ["--threads", str(settings["threads"])]
+    if settings["opt_level"] is not None:
+        level = settings["opt_level"]
+        args += [f"-O{level}", "-MAKEFLAGS", f"OPT_FAST=-O{level}"]
+    if settings["compiler_cache"] and not model_only:
+        # verilated.mk prefixes every compiler call with $(OBJCACHE)
+        args += ["-MAKEFLAGS", "OBJCACHE=ccache"]
+    return args
+
+
+def compiler_cache_default(backend) -> bool:
+    """
+    Whether a backend builds through ccache unless told otherwise.
+
+    A local toolchain needs ccache on PATH, and the Docker backend needs
+    it in the Verilator image (see image_has_ccache). VERILATOR_CCACHE or
+    the compiler_cache keyword override this default either way.
+
+    Args:
+        backend: Backend object, see select_backend
+
+    Returns:
+        bool: The default of the compiler_cache setting
+    """
+    if isinstance(backend, DockerComposeBackend):
+        return backend.is_available() and image_has_ccache(VERILATOR_IMAGE)
+    return isinstance(backend, LocalBackend) and backend.is_available(
+        "ccache"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def image_has_ccache(image: str) -> bool:
+    """
+    Check whether a Docker image has ccache installed.
+
+    Runs ``command -v ccache`` in a throwaway container. The answer is
+    cached for the rest of the process, so only the first run of a
+    session pays for the extra container.
+
+    Args:
+        image (str): Docker image to check
+
+    Returns:
+        bool: True if ccache is on the image's PATH. False when it is
+            not, or when Docker is missing or the check fails.
+    """
+    if shutil.which("docker") is None:
+        return False
+    try:
+        result = subprocess.run(
+            [
+                "docker",
+                "run",
+                "--rm",
+                "--entrypoint",
+                "sh",
+                image,
+                "-c",
+                "command -v ccache",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=300,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+def compiler_cache_variables(
+    env: dict, stats_log: str, cache_dir: Optional[str] = None
+) -> List[str]:
+    """
+    Environment assignments that route an example's C++ build through
+    ccache.
+
+    The Verilated runtime and much of the generated code are the same
+    for every example, so a cache shared by all runs turns most compiler
+    calls after the first examples into cache hits. Every compiler call
+    appends its outcome to ``stats_log``, which gives per-run hit and
+    miss counts even while other runs use the same cache (see
+    run_metrics.compiler_cache_statistics).
+
+    Args:
+        env (dict): Settings read from the example's .env file
+        stats_log (str): Statistics log of this run (CCACHE_STATSLOG)
+        cache_dir (str): Cache directory (CCACHE_DIR). None keeps the one
+            configured for ccache.
+
+    Returns:
+        list: "NAME=value" strings, empty when the cache is disabled
+    """
+    if not build_settings(env)["compiler_cache"]:
+        return []
+    variables = [f"CCACHE_STATSLOG={stats_log}"]
+    if cache_dir:
+        variables.append(f"CCACHE_DIR={cache_dir}")
+    return variables
+
+
+def verilator_build_args(env: dict) -> List[str]:
+    """
+    Build the Verilator command line for an example.
+
+    Args:
+        env (dict): Settings read from the example's .env file
+
+    Returns:
+        list: Verilator executable and arguments
+    """
+    return [
+        "verilator",
+        *verilator_flags(env),
+        *verilator_option_args(env),
+        env.get("DESIGN_FILE", ""),
+        env.get("TESTBENCH_FILE", ""),
+        "--top",
+        env.get("TOP_MODULE", ""),
+    ]
+
+
+def verilator_shell_command(env: dict) -> str:
+    """
+    Build the shell command that the verilator service runs.
+
+    Args:
+        env (dict): Settings read from the example's .env file
+
+    Returns:
+        str: Command that builds the model and runs the simulation
+    """
+    # The containers set CCACHE_DIR to the verilator_cache volume
+    build = " ".join(
+        [
+            *compiler_cache_variables(env, f"$PWD/{CACHE_STATS_FILE}"),
+            *verilator_build_args(env),
+        ]
+    )
+    return f"{build} && ./obj_dir/V{env.get('TOP_MODULE', '')}"
+
+
+def stream_process(
+    command: Sequence[str],
+    on_line: Callable[[str], None],
+    cwd: Optional[str] = None,
+) -> int:
+    """
+    Run a command and pass each output line to a callback as it arrives.
+
+    Args:
+        command (list): Executable and arguments
+        on_line (callable): Called with every stdout/stderr line
+        cwd (str): Working directory for the command
+
+    Returns:
+        int: Return code of the command
+    """
+    process = subprocess.Popen(
+        list(command),
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        bufsize=1,
+    )
+    for line in process.stdout:
+        on_line(line)
+    return process.wait()
+
+
+def run_commands(
+    commands: Sequence[Command], on_line: Callable[[str], None]
+) -> int:
+    """
+    Run commands one after another, stopping at the first failure.
+
+    Args:
+        commands (list): (command, cwd) pairs
+        on_line (callable): Called with every stdout/stderr line
+
+    Returns:
+        int: Return code of the last command that ran
+    """
+    returncode = 0
+    for command, cwd in commands:
+        returncode = stream_process(command, on_line, cwd=cwd)
+        if returncode != 0:
+            break
+    return returncode
+
+
+class DockerComposeBackend:
+    """Run the verilator and gtkwave services from docker-compose.yml."""
+
+    name = "docker"
+
+    def is_available(self, tool: str = "verilator") -> bool:
+        return shutil.which("docker-compose") is not None
+
+    def _compose_command(
+        self,
+        env_file_path: str,
+        service: str,
+        container_name: Optional[str] = None,
+    ) -> list:
+        command = ["docker-compose", "--env-file", env_file_path, "run"]
+        if container_name:
+            command += ["--name", container_name]
+        return command + ["--rm", service]
+
+    def simulation_commands(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        build: bool = True,
+        container_name: Optional[str] = None,
+    ) -> List[Command]:
+        """
+        Describe the commands that build (optionally) and run a simulation.
+
+        Args:
+            target_dir (str): Example directory containing the .env file
+            env_file_path (str): Path to the example's .env file
+            env (dict): Settings read from the .env file
+            build (bool): Whether to run Verilator before the simulation
+            container_name (str): Name for the container, so that it can
+                be removed with cleanup() if the run is interrupted
+
+        Returns:
+            list: (command, cwd) pairs to run in order
+        """
+        command = self._compose_command(
+            env_file_path, "verilator", container_name
+        )
+        # The service entrypoint is bash, so this replaces the service's
+        # default command with one carrying the build settings, or with
+        # running the binary only
+        if build:
+            command += ["-c", verilator_shell_command(env)]
+        else:
+            command += ["-c", f"./obj_dir/V{env.get('TOP_MODULE', '')}"]
+        return [(command, None)]
+
+    def waveform_commands(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        container_name: Optional[str] = None,
+    ) -> List[Command]:
+        """Describe the command that opens the waveform in GTKWave."""
+        command = self._compose_command(
+            env_file_path, "gtkwave", container_name
+        )
+        # Name the file explicitly, since VCD_FILE in env may have been
+        # resolved to a different waveform than the .env file's entry
+        return [(command + [env.get("VCD_FILE", "")], None)]
+
+    def run_simulation(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        on_line: Callable[[str], None],
+        build: bool = True,
+    ) -> int:
+        """
+        Build (optionally) and run the simulation for an example.
+
+        Args:
+            target_dir (str): Example directory containing the .env file
+            env_file_path (str): Path to the example's .env file
+            env (dict): Settings read from the .env file
+            on_line (callable): Called with every output line
+            build (bool): Whether to run Verilator before the simulation
+
+        Returns:
+            int: Return code of the run
+        """
+        return run_commands(
+            self.simulation_commands(target_dir, env_file_path, env, build),
+            on_line,
+        )
+
+    def view_waveform(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        on_line: Callable[[str], None],
+    ) -> int:
+        """Open the example's waveform file in GTKWave."""
+        return run_commands(
+            self.waveform_commands(target_dir, env_file_path, env), on_line
+        )
+
+    def cleanup(self, container_name: str) -> None:
+        """Force-remove a container left behind by an interrupted run."""
+        subprocess.run(
+            ["docker", "rm", "--force", container_name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def explain_failure(self, recent_lines: List[str], print_fn) -> None:
+        """Print hints for a failed run based on its last output lines."""
+        output_text = " ".join(recent_lines)
+        if (
+            "dockerDesktopLinuxEngine" in output_text
+            or "cannot find the file specified" in output_text
+        ):
+            print_fn("\n🐳 Docker Connection Error Detected:")
+            print_fn("- Please start Docker Desktop")
+            print_fn("- Wait for Docker to fully initialize")
+            print_fn("- Try running 'docker ps' to verify Docker is working")
+        else:
+            print_fn("\nDocker command failed. Common issues:")
+            print_fn("- Docker Desktop is not running")
+            print_fn("- Docker daemon is not accessible")
+            print_fn("- Docker service needs to be started")
+
+
+class LocalBackend:
+    """Run a natively installed Verilator and GTKWave directly."""
+
+    name = "local"
+
+    def is_available(self, tool: str = "verilator") -> bool:
+        return shutil.which(tool) is not None
+
+    def simulation_commands(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        build: bool = True,
+        container_name: Optional[str] = None,
+    ) -> List[Command]:
+        """Describe the build (optional) and simulation commands.
+
+        The build uses ccache when it is installed, with the cache
+        directory from VERILATOR_CCACHE_DIR or ccache's own default.
+        """
+        binary = os.path.join(".", "obj_dir", f"V{env.get('TOP_MODULE', '')}")
+        commands = [([binary], target_dir)]
+        if build:
+            if not self.is_available("ccache"):
+                env = dict(env, **{CACHE_SETTING: "off"})
+            stats_log = os.path.abspath(
+                os.path.join(target_dir, CACHE_STATS_FILE)
+            )
+            variables = compiler_cache_variables(
+                env, stats_log, env.get(CACHE_DIR_SETTING)
+            )
+            build_args = verilator_build_args(env)
+            if variables:
+                build_args = ["env", *variables, *build_args]
+            commands.insert(0, (build_args, target_dir))
+        return commands
+
+    def waveform_commands(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        container_name: Optional[str] = None,
+    ) -> List[Command]:
+        """Describe the command that opens the waveform in GTKWave."""
+        return [(["gtkwave", env.get("VCD_FILE", "")], target_dir)]
+
+    def run_simulation(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        on_line: Callable[[str], None],
+        build: bool = True,
+    ) -> int:
+        """Build (optionally) and run the simulation in target_dir."""
+        return run_commands(
+            self.simulation_commands(target_dir, env_file_path, env, build),
+            on_line,
+        )
+
+    def view_waveform(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        on_line: Callable[[str], None],
+    ) -> int:
+        """Open the example's waveform file in a local GTKWave."""
+        return run_commands(
+            self.waveform_commands(target_dir, env_file_path, env), on_line
+        )
+
+    def cleanup(self, container_name: str) -> None:
+        """Nothing outlives a killed local process."""
+
+    def explain_failure(self, recent_lines: List[str], print_fn) -> None:
+        print_fn("\nLocal toolchain command failed. Common issues:")
+        print_fn("- Syntax or elaboration errors reported above")
+        print_fn("- Verilator version differs from the Docker image")
+
+
+class ScriptedBackend:
+    """Stand-in backend that replays scripted output, for tests.
+
+    Every call is recorded in ``calls`` as (action, target_dir, build).
+    """
+
+    name = "scripted"
+
+    def __init__(
+        self,
+        output: Sequence[str] = (),
+        returncode: int = 0,
+        available: bool = True,
+    ):
+        """
+        Configure the scripted responses.
+
+        Args:
+            output (list): Lines emitted by every run
+            returncode (int): Return code of every run
+            available (bool): Value reported by is_available
+        """
+        self.output = list(output)
+        self.returncode = returncode
+        self.available = available
+        self.calls: List[tuple] = []
+
+    def is_available(self, tool: str = "verilator") -> bool:
+        return self.available
+
+    def _replay(self, on_line: Callable[[str], None]) -> int:
+        for line in self.output:
+            on_line(line)
+        return self.returncode
+
+    def _replay_command(self) -> Command:
+        # A child process that prints the scripted output, for the
+        # runners that need real commands
+        script = (
+            "import sys\n"
+            f"sys.stdout.writelines({self.output!r})\n"
+            f"sys.exit({self.returncode})\n"
+        )
+        return [sys.executable, "-c", script], None
+
+    def simulation_commands(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        build: bool = True,
+        container_name: Optional[str] = None,
+    ) -> List[Command]:
+        self.calls.append(("simulate", target_dir, build))
+        return [self._replay_command()]
+
+    def waveform_commands(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        container_name: Optional[str] = None,
+    ) -> List[Command]:
+        self.calls.append(("view", target_dir, False))
+        return [self._replay_command()]
+
+    def run_simulation(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        on_line: Callable[[str], None],
+        build: bool = True,
+    ) -> int:
+        self.calls.append(("simulate", target_dir, build))
+        return self._replay(on_line)
+
+    def view_waveform(
+        self,
+        target_dir: str,
+        env_file_path: str,
+        env: dict,
+        on_line: Callable[[str], None],
+    ) -> int:
+        self.calls.append(("view", target_dir, False))
+        return self._replay(on_line)
+
+    def cleanup(self, container_name: str) -> None:
+        self.calls.append(("cleanup", container_name, False))
+
+    def explain_failure(self, recent_lines: List[str], print_fn) -> None:
+        print_fn("\nScripted run failed.")
+
+
+BACKENDS = {
+    DockerComposeBackend.name: DockerComposeBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+
+def select_backend(backend="auto", tool: str = "verilator"):
+    """
+    Resolve a backend name or instance to a backend object.
+
+    Args:
+        backend: "auto", "docker", "local" or a backend instance. "auto"
+            uses the local toolchain when ``tool`` is on PATH and falls
+            back to Docker Compose otherwise.
+        tool (str): Executable the local backend needs, "verilator" or
+            "gtkwave"
+
+    Returns:
+        The backend object.
+    """
+    if not isinstance(backend, str):
+        return backend
+    if backend == "auto":
+        local = LocalBackend()
+        return local if local.is_available(tool) else DockerComposeBackend()
+    try:
+        return BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown backend '{backend}', expected one of "
+            f"{['auto', *BACKENDS]}"
+        ) from None
@@ -0,0 +1,268 @@
+"""
+SystemVerilog Dependency Graph Module
+
+This module scans SystemVerilog sources for module, interface, package,
+program and class declarations, for references to those names
+(instantiations, ``import`` statements, class uses) and for ``include``
+directives. It builds a file dependency graph, keeps the per-file scan
+results in a JSON cache keyed by mtime, and answers which example .env
+targets are affected by a set of changed files.
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from simulation_backends import read_env_file
+
+SV_EXTENSIONS = (".sv", ".svh", ".v", ".vh")
+DEFAULT_CACHE_FILE = ".sv_dependencies_cache.json"
+CACHE_VERSION = 2
+
+_COMMENT_PATTERN = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"')
+_DECLARATION_PATTERN = re.compile(
+    r"^\s*(?:virtual\s+)?(?:module|macromodule|interface|package|program"
+    r"|class)\s+(?:(?:automatic|static)\s+)?(\w+)",
+    re.MULTILINE,
+)
+_INCLUDE_PATTERN = re.compile(r'`include\s+"([^"]+)"')
+_IMPORT_PATTERN = re.compile(r"\bimport\s+(\w+)\s*::")
+_SCOPE_PATTERN = re.compile(r"\b(\w+)\s*::")
+_INSTANCE_PATTERN = re.compile(
+    r"^\s*(\w+)\s*(?:#\s*\(|\w+\s*(?:\[[^\]]*\]\s*)?\()", re.MULTILINE
+)
+_IDENTIFIER_PATTERN = re.compile(r"\b[A-Za-z_]\w*\b")
+
+
+def scan_sv_source(text: str) -> Dict[str, List[str]]:
+    """Extract declarations, references, includes and imports from source.
+
+    Args:
+        text: SystemVerilog source text.
+
+    Returns:
+        Dictionary with "declarations", "identifiers", "references",
+        "includes" and "imports" lists. Identifiers are every distinct
+        word outside comments and strings; they are matched against names
+        declared in the same directory, which over-approximates uses
+        safely. References are the names used in instantiations and
+        ``name::`` scopes, the only ones resolved across directories.
+    """
+    includes = _INCLUDE_PATTERN.findall(_COMMENT_PATTERN.sub(" ", text))
+    code = _STRING_PATTERN.sub('""', _COMMENT_PATTERN.sub(" ", text))
+    declarations = _DECLARATION_PATTERN.findall(code)
+    return {
+        "declarations": sorted(set(declarations)),
+        "identifiers": sorted(set(_IDENTIFIER_PATTERN.findall(code))),
+        "references": sorted(
+            set(_INSTANCE_PATTERN.findall(code))
+            | set(_SCOPE_PATTERN.findall(code))
+        ),
+        "includes": includes,
+        "imports": sorted(set(_IMPORT_PATTERN.findall(code))),
+    }
+
+
+class DependencyGraph:
+    """File level dependency graph over the SystemVerilog sources in a tree.
+
+    Scan results are cached per file and only refreshed for files whose
+    mtime or size changed since the previous scan.
+    """
+
+    def __init__(self, root: str = ".", cache_path: Optional[str] = None):
+        """Load the cache for a source tree.
+
+        Args:
+            root: Directory containing the example directories.
+            cache_path: JSON cache location. Defaults to a hidden file in
+                ``root``; pass an empty string to disable caching.
+        """
+        self.root = os.path.abspath(root)
+        self.cache_path = (
+            os.path.join(self.root, DEFAULT_CACHE_FILE)
+            if cache_path is None
+            else cache_path
+        )
+        self.files: Dict[str, Dict] = {}
+        self._declared_in: Dict[str, Set[str]] = {}
+        self._load_cache()
+
+    def _load_cache(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        if cached.get("version") == CACHE_VERSION:
+            self.files = cached.get("files", {})
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(
+                    {"version": CACHE_VERSION, "files": self.files},
+                    cache_file,
+                )
+            os.replace(temp_path, self.cache_path)
+        except OSError as error:
+            print(f"Warning: could not write {self.cache_path}: {error}")
+
+    def scan(self) -> int:
+        """Rescan new and modified source files and drop deleted ones.
+
+        Returns:
+            Number of files that were (re)parsed.
+        """
+        seen = set()
+        parsed = 0
+        for directory, subdirs, files in os.walk(self.root):
+            subdirs[:] = [
+                name
+                for name in subdirs
+                if name != "obj_dir" and not name.startswith(".")
+            ]
+            for name in files:
+                if not name.endswith(SV_EXTENSIONS):
+                    continue
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                seen.add(path)
+                entry = self.files.get(path)
+                if (
+                    entry is not None
+                    and entry["mtime_ns"] == stat.st_mtime_ns
+                    and entry["size"] == stat.st_size
+                ):
+                    continue
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    entry = scan_sv_source(f.read())
+                entry["mtime_ns"] = stat.st_mtime_ns
+                entry["size"] = stat.st_size
+                self.files[path] = entry
+                parsed += 1
+
+        removed = set(self.files) - seen
+        for path in removed:
+            del self.files[path]
+        if parsed or removed:
+            self._save_cache()
+
+        self._declared_in = {}
+        for path, entry in self.files.items():
+            for name in entry["declarations"]:
+                self._declared_in.setdefault(name, set()).add(path)
+        return parsed
+
+    def _resolve_name(
+        self, name: str, from_path: str, explicit: bool
+    ) -> Set[str]:
+        """Find the files declaring ``name`` as seen from ``from_path``.
+
+        Declarations in the same directory win, mirroring Verilator's
+        search of the working directory. Explicit references
+        (instantiations, imports, ``name::``) to a name declared in exactly
+        one file elsewhere in the tree resolve to that file.
+        """
+        candidates = self._declared_in.get(name, set())
+        local = {
+            path
+            for path in candidates
+            if os.path.dirname(path) == os.path.dirname(from_path)
+        }
+        if local or not explicit:
+            return local
+        return set(candidates) if len(candidates) == 1 else set()
+
+    def dependencies(self, path: str) -> Set[str]:
+        """Return the files that ``path`` directly depends on."""
+        entry = self.files.get(path)
+        if entry is None:
+            return set()
+        directory = os.path.dirname(path)
+        dependencies = set()
+        for include in entry["includes"]:
+            included = os.path.normpath(os.path.join(directory, include))
+            if included in self.files:
+                dependencies.add(included)
+        own = set(entry["declarations"])
+        explicit = set(entry["references"]) | set(entry["imports"])
+        for name in set(entry["identifiers"]) | explicit:
+            if name in self._declared_in and name not in own:
+                dependencies |= self._resolve_name(
+                    name, path, name in explicit
+                )
+        dependencies.discard(path)
+        return dependencies
+
+    def files_for_target(self, target_dir: str) -> Set[str]:
+        """Return every source file an example build depends on.
+
+        The roots are the .sv files named in the example's .env file; the
+        result is their transitive closure over the dependency graph.
+        """
+        target_dir = os.path.abspath(target_dir)
+        env = read_env_file(os.path.join(target_dir, ".env"))
+        pending = [
+            os.path.normpath(os.path.join(target_dir, value))
+            for key, value in env.items()
+            if key.endswith("_FILE") and value.endswith(SV_EXTENSIONS)
+        ]
+        closure: Set[str] = set()
+        while pending:
+            path = pending.pop()
+            if path in closure:
+                continue
+            closure.add(path)
+            pending.extend(self.dependencies(path) - closure)
+        return closure
+
+    def affected_targets(
+        self, changed_files: Iterable[str], target_dirs: Iterable[str]
+    ) -> List[str]:
+        """Select the example targets affected by a set of changed files.
+
+        A target is affected when one of its .env file or its transitive
+        source files changed.
+
+        Args:
+            changed_files: Paths of modified, added or deleted files.
+            target_dirs: Candidate example directories.
+
+        Returns:
+            The affected subset of ``target_dirs``, in the given order.
+        """
+        changed = {os.path.abspath(path) for path in changed_files}
+        affected = []
+        for target_dir in target_dirs:
+            env_file_path = os.path.abspath(os.path.join(target_dir, ".env"))
+            sources = self.files_for_target(target_dir)
+            if env_file_path in changed or changed & sources:
+                affected.append(target_dir)
+        return affected
+
+
+def affected_example_dirs(
+    changed_files: Iterable[str], root: str = "."
+) -> List[str]:
+    """Return the example directories under ``root`` that need rerunning.
+
+    Args:
+        changed_files: Paths of modified, added or deleted files.
+        root: Directory containing the example directories.
+
+    Returns:
+        Example directory paths in the format used by batch_runner.
+    """
+    from batch_runner import discover_example_dirs
+
+    graph = DependencyGraph(root)
+    graph.scan()
+    return graph.affected_targets(changed_files, discover_example_dirs(root))
@@ -0,0 +1,81 @@
+"""
+Notebook Helper Package
+
+This package gathers the public API of the notebook helper modules under
+one name while keeping kernel start and ``python -c`` invocations fast.
+Nothing is imported up front: each attribute loads its helper module on
+first access, so ``from sv_helpers import run_docker_compose`` only pays
+for the runner and never touches IPython, NumPy, Plotly or LangGraph.
+
+The helper modules stay next to the notebooks, which import them directly
+(``from verilator_runner import run_docker_compose``), and they remain
+runnable as scripts. Those direct imports are just as lazy.
+
+Usage:
+    from sv_helpers import read_sv_files, run_docker_compose
+    import sv_helpers; sv_helpers.plot_waveform("dump.vcd")
+"""
+
+import importlib
+from typing import Dict, List
+
+# Public name -> (helper module, attribute in that module)
+_EXPORTS: Dict[str, tuple] = {
+    # Simulation
+    "run_docker_compose": ("verilator_runner", "run_docker_compose"),
+    "run_simulation_report": ("verilator_runner", "run_simulation_report"),
+    "run_gtkwave": ("gtkwave_runner", "run_docker_compose"),
+    "run_in_pool": ("container_pool", "run_in_pool"),
+    "run_batch": ("batch_runner", "run_batch"),
+    "run_docker_compose_async": ("async_runner", "run_docker_compose_async"),
+    "view_waveform_async": ("async_runner", "view_waveform_async"),
+    "run_batch_async": ("async_runner", "run_batch_async"),
+    "AsyncSimulation": ("async_runner", "AsyncSimulation"),
+    "discover_example_dirs": ("batch_runner", "discover_example_dirs"),
+    "affected_example_dirs": ("sv_dependencies", "affected_example_dirs"),
+    "RunReport": ("run_metrics", "RunReport"),
+    "read_metrics": ("run_metrics", "read_metrics"),
+    "print_metrics_summary": ("run_metrics", "print_metrics_summary"),
+    # Sources
+    "read_sv_files": ("read_files_utils", "read_sv_files"),
+    # Waveforms
+    "list_vcd_signals": ("list_vcd_signals", "list_vcd_signals"),
+    "list_signals_by_hierarchy": (
+        "list_vcd_signals",
+        "list_signals_by_hierarchy",
+    ),
+    "open_vcd": ("vcd_stream", "open_vcd"),
+    "open_fst": ("fst_reader", "open_fst"),
+    "select_variables": ("vcd_stream", "select_variables"),
+    "load_waveform": ("waveform_store", "load_waveform"),
+    "read_window": ("vcd_index", "read_window"),
+    "read_fst_window": ("fst_reader", "read_fst_window"),
+    "plot_waveform": ("waveform_plot", "plot_waveform"),
+    "compare_vcd_files": ("vcd_diff", "compare_vcd_files"),
+    "signal_activity": ("signal_activity", "signal_activity"),
+    "print_activity_table": ("signal_activity", "print_activity_table"),
+    "archive_vcd_files": ("vcd_compression", "archive_vcd_files"),
+    "restore_vcd_files": ("vcd_compression", "restore_vcd_files"),
+    # Notebooks
+    "NotebookSplitter": ("notebook_spliter", "NotebookSplitter"),
+    "split_notebooks_batch": ("notebook_spliter", "split_notebooks_batch"),
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    try:
+        module_name, attribute = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r}"
+        ) from None
+    value = getattr(importlib.import_module(module_name), attribute)
+    # Later lookups find the attribute without going through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
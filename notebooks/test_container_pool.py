@@ -0,0 +1,247 @@
+"""
+Tests for container_pool
+
+The pool is driven through FakeExecutor, whose "containers" are plain
+ids and whose commands are answered by a handler, so Docker is not
+needed.
+"""
+
+import threading
+import time
+
+import container_pool
+import pytest
+from container_pool import ContainerPool, FakeExecutor, run_in_pool
+
+ENV_TEXT = """PROJECT_DIR=.
+DESIGN_FILE=design.sv
+TESTBENCH_FILE=testbench.sv
+TOP_MODULE=testbench
+VCD_FILE=testbench.vcd
+VERILATOR_THREADS=2
+"""
+
+
+class RecordingExecutor(FakeExecutor):
+    """FakeExecutor that also records started and stopped containers."""
+
+    def __init__(self, project_root=".", handler=None):
+        super().__init__(
+            project_root, handler or (lambda command, workdir: (0, []))
+        )
+        self.started = []
+        self.stopped = []
+
+    def start(self):
+        container_id = super().start()
+        self.started.append(container_id)
+        return container_id
+
+    def stop(self, container_id):
+        self.stopped.append(container_id)
+        super().stop(container_id)
+
+
+@pytest.fixture
+def executor():
+    return RecordingExecutor()
+
+
+@pytest.fixture
+def pool(executor):
+    pool = ContainerPool(executor=executor, size=1, idle_timeout=None)
+    yield pool
+    pool.shutdown()
+
+
+def test_released_container_is_reused(pool, executor):
+    with pool.acquire() as first:
+        assert pool.container_count == 1
+    with pool.acquire() as second:
+        pass
+
+    assert first == second
+    assert executor.started == [first]
+    assert pool.container_count == 1
+
+
+def test_full_pool_blocks_until_release(pool):
+    acquired = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def hold():
+        with pool.acquire() as container_id:
+            order.append(("first", container_id))
+            acquired.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait(5)
+
+    waiter_done = threading.Event()
+
+    def wait_for_container():
+        with pool.acquire() as container_id:
+            order.append(("second", container_id))
+        waiter_done.set()
+
+    waiter = threading.Thread(target=wait_for_container)
+    waiter.start()
+    assert not waiter_done.wait(0.2)
+
+    release.set()
+    holder.join(5)
+    waiter.join(5)
+    assert [name for name, _ in order] == ["first", "second"]
+    assert order[0][1] == order[1][1]
+
+
+def test_dead_container_is_replaced(pool, executor):
+    with pool.acquire() as first:
+        pass
+    executor.running[first] = False
+
+    with pool.acquire() as second:
+        pass
+
+    assert second != first
+    assert executor.stopped == [first]
+    assert executor.started == [first, second]
+
+
+def test_stop_idle(pool, executor):
+    with pool.acquire() as container_id:
+        pass
+
+    assert pool.stop_idle(older_than=60) == 0
+    assert pool.stop_idle() == 1
+    assert executor.stopped == [container_id]
+    assert pool.container_count == 0
+
+
+def test_idle_reaper_stops_unused_containers(executor):
+    pool = ContainerPool(executor=executor, size=1, idle_timeout=0.1)
+    try:
+        with pool.acquire() as container_id:
+            pass
+        deadline = time.monotonic() + 5
+        while pool.container_count and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        assert pool.container_count == 0
+        assert executor.stopped == [container_id]
+    finally:
+        pool.shutdown()
+
+
+def test_shutdown(pool, executor):
+    with pool.acquire() as busy:
+        pool.shutdown()
+        assert executor.stopped == []
+
+    assert executor.stopped == [busy]
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+
+
+def test_run_in_pool_applies_build_settings(tmp_path):
+    (tmp_path / ".env").write_text(ENV_TEXT)
+    commands = []
+
+    def handler(command, workdir):
+        commands.append((command, workdir))
+        return 0, ["simulated\n"]
+
+    pool = ContainerPool(
+        executor=RecordingExecutor(str(tmp_path), handler), idle_timeout=None
+    )
+    printed = []
+    try:
+        returncode = run_in_pool(
+            target_dir=str(tmp_path) + "/",
+            pool=pool,
+            print_fn=printed.append,
+            jobs=3,
+            opt_level=2,
+            trace_format="fst",
+            compiler_cache=True,
+        )
+    finally:
+        pool.shutdown()
+
+    assert returncode == 0
+    assert "simulated" in printed
+    [(command, workdir)] = commands
+    assert workdir == "."
+    for argument in (
+        "--trace-fst",
+        "-j 3",
+        "--threads 2",
+        "-O2",
+        "OBJCACHE=ccache",
+        "CCACHE_STATSLOG=",
+    ):
+        assert argument in command
+    assert command.endswith("rm -rf obj_dir; exit $status")
+
+
+def test_run_in_pool_without_cache(tmp_path):
+    (tmp_path / ".env").write_text(ENV_TEXT)
+    commands = []
+
+    def handler(command, workdir):
+        commands.append(command)
+        return 1, []
+
+    pool = ContainerPool(
+        executor=RecordingExecutor(str(tmp_path), handler), idle_timeout=None
+    )
+    try:
+        returncode = run_in_pool(
+            target_dir=str(tmp_path) + "/",
+            pool=pool,
+            print_fn=lambda line: None,
+            compiler_cache=False,
+        )
+    finally:
+        pool.shutdown()
+
+    assert returncode == 1
+    assert "ccache" not in commands[0].lower()
+
+
+@pytest.mark.parametrize("has_ccache", [True, False])
+def test_cache_default_follows_executor_image(
+    tmp_path, monkeypatch, has_ccache
+):
+    (tmp_path / ".env").write_text(ENV_TEXT)
+    commands = []
+    checked = []
+
+    def handler(command, workdir):
+        commands.append(command)
+        return 0, []
+
+    def image_has_ccache(image):
+        checked.append(image)
+        return has_ccache
+
+    monkeypatch.setattr(container_pool, "image_has_ccache", image_has_ccache)
+    executor = RecordingExecutor(str(tmp_path), handler)
+    pool = ContainerPool(executor=executor, idle_timeout=None)
+    target_dir = str(tmp_path) + "/"
+    printed = []
+    try:
+        # A FakeExecutor has no image, so the cache stays off by default
+        run_in_pool(target_dir=target_dir, pool=pool, print_fn=printed.append)
+        executor.image = "verilator/verilator:ccache"
+        run_in_pool(target_dir=target_dir, pool=pool, print_fn=printed.append)
+    finally:
+        pool.shutdown()
+
+    assert checked == ["verilator/verilator:ccache"]
+    assert "OBJCACHE=ccache" not in commands[0]
+    assert ("OBJCACHE=ccache" in commands[1]) == has_ccache
@@ -0,0 +1,66 @@
+"""
+Tests for list_vcd_signals
+
+The streaming summary and the columnar waveform cache must list a VCD
+file identically, with the values as written in the file, including
+values shorter than the declared width.
+"""
+
+from list_vcd_signals import list_vcd_signals
+
+VCD_TEXT = """$timescale 1ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$var wire 8 " count [7:0] $end
+$var wire 4 # bus [3:0] $end
+$var real 64 $ level $end
+$var wire 70 % wide [69:0] $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+b0 "
+bz #
+r1.000000 $
+b1 %
+#5
+1!
+b101 "
+bx1 #
+r2.5 $
+b10x %
+#10
+0!
+b11111111 "
+b1 #
+"""
+
+
+def test_cached_listing_matches_streaming(tmp_path, capsys):
+    vcd_file = tmp_path / "short_values.vcd"
+    vcd_file.write_text(VCD_TEXT)
+
+    list_vcd_signals(str(vcd_file), use_cache=False)
+    streamed = capsys.readouterr().out
+    list_vcd_signals(str(vcd_file), use_cache=True)
+    cached = capsys.readouterr().out
+
+    assert streamed == cached
+    # Values are listed as written in the file
+    assert "  Initial value: 0\n  Final value: 11111111\n" in streamed
+    assert "  Initial value: z\n  Final value: 1\n" in streamed
+    assert "  Initial value: 1.000000\n  Final value: 2.5\n" in streamed
+    assert "  Initial value: 1\n  Final value: 10x\n" in streamed
+
+
+def test_selected_signals_match(tmp_path, capsys):
+    vcd_file = tmp_path / "short_values.vcd"
+    vcd_file.write_text(VCD_TEXT)
+
+    list_vcd_signals(str(vcd_file), use_cache=False, signals=["tb.count*"])
+    streamed = capsys.readouterr().out
+    list_vcd_signals(str(vcd_file), use_cache=True, signals=["tb.count*"])
+    cached = capsys.readouterr().out
+
+    assert streamed == cached
+    assert "tb.clk" not in streamed
@@ -0,0 +1,133 @@
+"""
+Tests for notebook_spliter
+
+Splitting the same notebook again must only rewrite sections whose
+content changed, and remove the notebooks of sections that are gone.
+"""
+
+import json
+import os
+
+import pytest
+from notebook_spliter import MANIFEST_FILE, NotebookSplitter
+
+
+def _markdown(text):
+    return {"cell_type": "markdown", "metadata": {}, "source": [text]}
+
+
+def _code(text):
+    return {
+        "cell_type": "code",
+        "execution_count": None,
+        "metadata": {},
+        "outputs": [],
+        "source": [text],
+    }
+
+
+def _write_notebook(path, sections):
+    cells = []
+    for title, code in sections:
+        cells.append(_markdown(f"# {title}"))
+        cells.append(_code(code))
+    path.write_text(
+        json.dumps(
+            {
+                "cells": cells,
+                "metadata": {},
+                "nbformat": 4,
+                "nbformat_minor": 2,
+            }
+        )
+    )
+    return str(path)
+
+
+SECTIONS = [
+    ("Setup", "import numpy"),
+    ("Counter", "count = 0"),
+    ("Results", "print(count)"),
+]
+
+
+@pytest.fixture
+def notebook(tmp_path):
+    return _write_notebook(tmp_path / "chapter.ipynb", SECTIONS)
+
+
+def _split(notebook, output_dir):
+    state = NotebookSplitter().split_notebook(notebook, str(output_dir))
+    assert state["error_message"] == ""
+    return state
+
+
+def _mtimes(output_dir):
+    return {
+        name: os.stat(output_dir / name).st_mtime_ns
+        for name in os.listdir(output_dir)
+    }
+
+
+def test_second_split_leaves_files_untouched(notebook, tmp_path):
+    output_dir = tmp_path / "split"
+    first = _split(notebook, output_dir)
+    assert len(first["written_notebooks"]) == 3
+    assert (output_dir / MANIFEST_FILE).exists()
+    before = _mtimes(output_dir)
+
+    second = _split(notebook, output_dir)
+
+    assert second["created_notebooks"] == first["created_notebooks"]
+    assert second["written_notebooks"] == []
+    assert second["removed_notebooks"] == []
+    assert _mtimes(output_dir) == before
+
+
+def test_only_changed_section_is_rewritten(notebook, tmp_path):
+    output_dir = tmp_path / "split"
+    _split(notebook, output_dir)
+    before = _mtimes(output_dir)
+
+    _write_notebook(
+        tmp_path / "chapter.ipynb",
+        [SECTIONS[0], ("Counter", "count = 1"), SECTIONS[2]],
+    )
+    state = _split(notebook, output_dir)
+
+    assert state["written_notebooks"] == [str(output_dir / "Counter.ipynb")]
+    after = _mtimes(output_dir)
+    assert after["Setup.ipynb"] == before["Setup.ipynb"]
+    assert after["Results.ipynb"] == before["Results.ipynb"]
+
+
+def test_removed_section_file_is_deleted(notebook, tmp_path):
+    output_dir = tmp_path / "split"
+    _split(notebook, output_dir)
+    (output_dir / "notes.txt").write_text("kept\n")
+
+    _write_notebook(tmp_path / "chapter.ipynb", [SECTIONS[0], SECTIONS[2]])
+    state = _split(notebook, output_dir)
+
+    assert state["removed_notebooks"] == [str(output_dir / "Counter.ipynb")]
+    assert sorted(os.listdir(output_dir)) == [
+        MANIFEST_FILE,
+        "Results.ipynb",
+        "Setup.ipynb",
+        "notes.txt",
+    ]
+    manifest = json.loads((output_dir / MANIFEST_FILE).read_text())
+    assert sorted(manifest) == ["Results.ipynb", "Setup.ipynb"]
+
+
+def test_shared_output_keeps_other_sources(notebook, tmp_path):
+    output_dir = tmp_path / "split"
+    other = _write_notebook(tmp_path / "other.ipynb", [("Appendix", "pass")])
+    _split(notebook, output_dir)
+    _split(other, output_dir)
+
+    _write_notebook(tmp_path / "chapter.ipynb", [SECTIONS[0]])
+    state = _split(notebook, output_dir)
+
+    assert len(state["removed_notebooks"]) == 2
+    assert (output_dir / "Appendix.ipynb").exists()
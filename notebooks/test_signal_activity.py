@@ -0,0 +1,147 @@
+"""
+Tests for signal_activity
+
+A hand-written VCD with a clock and a 4-bit bus whose statistics were
+worked out by hand: a one unit pulse on d[0], a rise on d[1], X and Z
+states on d[2] and a bit that never changes.
+"""
+
+import numpy as np
+import pytest
+from signal_activity import (
+    HIGH,
+    LOW,
+    bit_activity,
+    main,
+    signal_activity,
+)
+
+VCD_TEXT = """$timescale 1ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$var wire 4 " d [3:0] $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+b0000 "
+#10
+1!
+b0001 "
+#11
+b0000 "
+#20
+0!
+b0x10 "
+#30
+1!
+#40
+0!
+b0z10 "
+#50
+"""
+
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    path = tmp_path / "activity.vcd"
+    path.write_text(VCD_TEXT)
+    return str(path)
+
+
+def _rows_by_name(rows):
+    return {row.name: row for row in rows}
+
+
+def test_per_bit_statistics(vcd_file):
+    rows = _rows_by_name(
+        signal_activity(vcd_file, glitch_width=1, use_cache=False)
+    )
+
+    clk = rows["tb.clk"]
+    assert clk.toggles == 4
+    assert (clk.low, clk.high, clk.x, clk.z) == (30, 20, 0, 0)
+    assert clk.duty_cycle == pytest.approx(0.4)
+    assert clk.min_pulse == 10
+    assert clk.glitches == 0
+    assert clk.toggle_rate == pytest.approx(4 / 50e-9)
+
+    d0 = rows["tb.d[0]"]
+    assert d0.toggles == 2
+    assert (d0.low, d0.high) == (49, 1)
+    assert d0.duty_cycle == pytest.approx(0.02)
+    assert d0.min_pulse == 1
+    assert d0.glitches == 1
+
+    d1 = rows["tb.d[1]"]
+    assert d1.toggles == 1
+    assert (d1.low, d1.high) == (20, 30)
+    assert d1.duty_cycle == pytest.approx(0.6)
+    assert d1.min_pulse is None
+
+    d2 = rows["tb.d[2]"]
+    assert d2.toggles == 0
+    assert (d2.low, d2.high, d2.x, d2.z) == (20, 0, 20, 10)
+    assert d2.duty_cycle == 0.0
+
+    d3 = rows["tb.d[3]"]
+    assert (d3.toggles, d3.low, d3.glitches) == (0, 50, 0)
+
+
+def test_glitch_width(vcd_file):
+    rows = _rows_by_name(signal_activity(vcd_file, use_cache=False))
+
+    assert rows["tb.d[0]"].glitches == 0
+    assert rows["tb.d[0]"].min_pulse == 1
+
+
+def test_per_signal_rows(vcd_file):
+    rows = _rows_by_name(
+        signal_activity(
+            vcd_file, per_bit=False, glitch_width=1, use_cache=False
+        )
+    )
+
+    bus = rows["tb.d[3:0]"]
+    assert bus.width == 4
+    assert bus.toggles == 3
+    assert (bus.low, bus.high, bus.x, bus.z) == (139, 31, 20, 10)
+    assert bus.min_pulse == 1
+    assert bus.glitches == 1
+
+
+def test_clock_activity_factor(vcd_file):
+    rows = _rows_by_name(
+        signal_activity(vcd_file, clock="tb.clk", use_cache=False)
+    )
+
+    assert rows["tb.clk"].toggles == 4
+    assert rows["tb.clk"].activity == 2.0
+    assert rows["tb.d[0]"].activity == 1.0
+    assert rows["tb.d[3]"].activity == 0.0
+
+
+def test_missing_clock(vcd_file):
+    with pytest.raises(ValueError):
+        signal_activity(vcd_file, clock="tb.missing", use_cache=False)
+
+
+def test_end_time_before_last_change():
+    times = np.array([0, 10, 12], dtype=np.int64)
+    states = np.array([[LOW], [HIGH], [LOW]], dtype=np.uint8)
+
+    early = bit_activity(times, states, end_time=5, glitch_width=100)
+    exact = bit_activity(times, states, end_time=12, glitch_width=100)
+
+    for key in ("toggles", "glitches", "min_pulse", "dwell"):
+        assert np.array_equal(early[key], exact[key])
+    assert early["min_pulse"][0] == 2
+    assert early["glitches"][0] == 1
+
+
+def test_command_line(vcd_file, capsys):
+    assert main([vcd_file, "--clock", "tb.clk", "--sort", "reference"]) == 0
+
+    output = capsys.readouterr().out
+    assert "activity" in output
+    assert "tb.d[0]" in output
@@ -0,0 +1,121 @@
+"""
+Tests for simulation_backends
+
+Backend selection and the compiler cache default are checked with
+shutil.which and the Docker image check patched, so the results do not
+depend on the tools installed on the machine.
+"""
+
+import subprocess
+
+import pytest
+import simulation_backends
+from simulation_backends import (
+    DockerComposeBackend,
+    LocalBackend,
+    ScriptedBackend,
+    compiler_cache_default,
+    image_has_ccache,
+    select_backend,
+)
+
+
+@pytest.fixture
+def installed(monkeypatch):
+    tools = set()
+
+    def which(tool):
+        return f"/usr/bin/{tool}" if tool in tools else None
+
+    monkeypatch.setattr(simulation_backends.shutil, "which", which)
+    image_has_ccache.cache_clear()
+    yield tools
+    image_has_ccache.cache_clear()
+
+
+class DockerRuns(list):
+    """Commands given to subprocess.run, answered with ``returncode``."""
+
+    returncode = 0
+
+    def __call__(self, command, **kwargs):
+        self.append(command)
+        return subprocess.CompletedProcess(command, self.returncode)
+
+
+@pytest.fixture
+def docker_runs(monkeypatch):
+    runs = DockerRuns()
+    monkeypatch.setattr(simulation_backends.subprocess, "run", runs)
+    return runs
+
+
+def test_auto_prefers_local_toolchain(installed):
+    installed.update({"verilator", "docker-compose"})
+
+    assert isinstance(select_backend("auto"), LocalBackend)
+
+
+def test_auto_falls_back_to_docker(installed):
+    installed.add("docker-compose")
+
+    assert isinstance(select_backend("auto"), DockerComposeBackend)
+    assert isinstance(
+        select_backend("auto", tool="gtkwave"), DockerComposeBackend
+    )
+
+
+def test_auto_checks_the_requested_tool(installed):
+    installed.add("gtkwave")
+
+    assert isinstance(select_backend("auto", tool="gtkwave"), LocalBackend)
+    assert isinstance(select_backend("auto"), DockerComposeBackend)
+
+
+def test_named_and_object_backends(installed):
+    scripted = ScriptedBackend()
+
+    assert isinstance(select_backend("local"), LocalBackend)
+    assert isinstance(select_backend("docker"), DockerComposeBackend)
+    assert select_backend(scripted) is scripted
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown backend"):
+        select_backend("podman")
+
+
+@pytest.mark.parametrize("returncode, expected", [(0, True), (1, False)])
+def test_docker_cache_default_checks_image_once(
+    installed, docker_runs, returncode, expected
+):
+    installed.update({"docker", "docker-compose"})
+    docker_runs.returncode = returncode
+    backend = DockerComposeBackend()
+
+    assert compiler_cache_default(backend) is expected
+    assert compiler_cache_default(backend) is expected
+
+    [command] = docker_runs
+    assert command[:2] == ["docker", "run"]
+    assert command[-3:] == [
+        simulation_backends.VERILATOR_IMAGE,
+        "-c",
+        "command -v ccache",
+    ]
+
+
+def test_docker_cache_default_without_docker(installed, docker_runs):
+    assert compiler_cache_default(DockerComposeBackend()) is False
+    installed.add("docker-compose")
+    assert compiler_cache_default(DockerComposeBackend()) is False
+    assert docker_runs == []
+
+
+def test_local_cache_default_follows_path(installed):
+    installed.add("verilator")
+    assert compiler_cache_default(LocalBackend()) is False
+
+    installed.add("ccache")
+    assert compiler_cache_default(LocalBackend()) is True
+    assert compiler_cache_default(ScriptedBackend()) is False
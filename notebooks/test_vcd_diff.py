@@ -0,0 +1,160 @@
+"""
+Tests for vcd_diff
+
+Small golden and actual VCD pairs with a clock and a 4-bit bus, checked
+for value mismatches, each X/Z mode and the edge timing tolerance.
+"""
+
+import pytest
+from vcd_diff import (
+    XZ_EXACT,
+    XZ_GOLDEN,
+    XZ_IGNORE,
+    compare_signal,
+    compare_vcd_files,
+    main,
+)
+from waveform_store import load_waveform
+
+HEADER = """$timescale 1ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$var wire 4 " data [3:0] $end
+$upscope $end
+$enddefinitions $end
+"""
+
+
+def _write_vcd(path, clk_rise=10, data_late="b0101"):
+    path.write_text(
+        HEADER
+        + "#0\n0!\nb0000 \"\n"
+        + f"#{clk_rise}\n1!\n"
+        + f"#20\n{data_late} \"\n"
+        + "#30\n0!\n#40\n"
+    )
+    return str(path)
+
+
+@pytest.fixture
+def golden(tmp_path):
+    return _write_vcd(tmp_path / "golden.vcd")
+
+
+def test_identical_files(golden, tmp_path):
+    actual = _write_vcd(tmp_path / "actual.vcd")
+
+    result = compare_vcd_files(golden, actual)
+
+    assert result.passed
+    assert result.signals_compared == 2
+    assert result.mismatches == []
+
+
+def test_value_mismatch(golden, tmp_path):
+    actual = _write_vcd(tmp_path / "actual.vcd", data_late="b0110")
+
+    result = compare_vcd_files(golden, actual)
+
+    assert not result.passed
+    [mismatch] = result.mismatches
+    assert mismatch.reference == "tb.data[3:0]"
+    assert mismatch.time == 20
+    assert (mismatch.golden_value, mismatch.actual_value) == ("0101", "0110")
+
+
+@pytest.mark.parametrize(
+    "golden_value, actual_value, xz_mode, passed",
+    [
+        # X in the golden file against a 0 or 1
+        ("bx101", "b1101", XZ_EXACT, False),
+        ("bx101", "b0101", XZ_GOLDEN, True),
+        ("bx101", "b1101", XZ_IGNORE, True),
+        # X in the new run against a golden 0 or 1
+        ("b0101", "bx101", XZ_EXACT, False),
+        ("b1101", "bx101", XZ_GOLDEN, False),
+        ("b0101", "bx101", XZ_IGNORE, True),
+        # Z behaves like X, and X against X always matches
+        ("bz101", "b1101", XZ_GOLDEN, True),
+        ("bx101", "bX101", XZ_EXACT, True),
+        # Only the X/Z bits are don't-care
+        ("bx101", "b1100", XZ_IGNORE, False),
+    ],
+)
+def test_xz_modes(tmp_path, golden_value, actual_value, xz_mode, passed):
+    golden = _write_vcd(tmp_path / "golden.vcd", data_late=golden_value)
+    actual = _write_vcd(tmp_path / "actual.vcd", data_late=actual_value)
+
+    result = compare_vcd_files(golden, actual, xz_mode=xz_mode)
+
+    assert result.passed == passed
+
+
+@pytest.mark.parametrize(
+    "clk_rise, tolerance, passed",
+    [
+        (12, 2, True),
+        (8, 2, True),
+        (12, 1, False),
+        (15, 2, False),
+    ],
+)
+def test_time_tolerance(golden, tmp_path, clk_rise, tolerance, passed):
+    actual = _write_vcd(tmp_path / "actual.vcd", clk_rise=clk_rise)
+
+    result = compare_vcd_files(golden, actual, time_tolerance=tolerance)
+
+    assert result.passed == passed
+    if not passed:
+        [mismatch] = result.mismatches
+        assert mismatch.reference == "tb.clk"
+        assert mismatch.time == min(10, clk_rise)
+
+
+def test_trailing_mismatch_always_counts(tmp_path):
+    golden = _write_vcd(tmp_path / "golden.vcd")
+    actual = tmp_path / "actual.vcd"
+    actual.write_text(
+        (tmp_path / "golden.vcd").read_text().replace("#40\n", "#40\n1!\n")
+    )
+
+    result = compare_vcd_files(golden, str(actual), time_tolerance=100)
+
+    assert [mismatch.time for mismatch in result.mismatches] == [40]
+
+
+def test_missing_signal_and_timescale(golden, tmp_path):
+    actual = tmp_path / "actual.vcd"
+    actual.write_text(
+        (tmp_path / "golden.vcd").read_text().replace("1ns", "1ps")
+    )
+    assert "Timescale differs" in compare_vcd_files(golden, str(actual)).error
+
+    actual.write_text(
+        HEADER.replace('$var wire 4 " data [3:0] $end\n', "")
+        + "#0\n0!\n#10\n1!\n#30\n0!\n#40\n"
+    )
+    result = compare_vcd_files(golden, str(actual))
+    assert result.missing == ["tb.data[3:0]"]
+    assert not result.passed
+
+
+def test_unknown_xz_mode(golden):
+    signal = load_waveform(golden, use_cache=False)["tb.clk"]
+
+    with pytest.raises(ValueError):
+        compare_signal(signal, signal, xz_mode="maybe")
+
+
+def test_update_then_compare(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    _write_vcd(tmp_path / "run.vcd")
+
+    assert main(["--update", "run.vcd"]) == 0
+    assert main(["run.vcd", "-j", "1"]) == 0
+
+    _write_vcd(tmp_path / "run.vcd", data_late="b1111")
+    assert main(["run.vcd", "-j", "1"]) == 1
+    assert "tb.data[3:0] @ 20: expected 0101, got 1111" in (
+        capsys.readouterr().out
+    )
@@ -0,0 +1,122 @@
+"""
+Tests for vcd_index
+
+Windows read through the checkpoint index must equal a full scan of the
+file, for plain and compressed VCD files, wherever the window falls
+relative to the checkpoints.
+"""
+
+import pytest
+from vcd_compression import compress_file
+from vcd_index import load_vcd_index, read_window
+from vcd_stream import open_vcd
+
+STEPS = 600
+STEP = 5
+
+
+def _vcd_text():
+    lines = [
+        "$timescale 1ns $end",
+        "$scope module tb $end",
+        "$var wire 1 ! clk $end",
+        '$var wire 8 " count [7:0] $end',
+        "$var wire 1 # flag $end",
+        "$upscope $end",
+        "$enddefinitions $end",
+    ]
+    for step in range(1, STEPS + 1):
+        lines.append(f"#{step * STEP}")
+        lines.append(f"{step % 2}!")
+        if step % 2 == 0:
+            lines.append(f'b{format(step // 2 % 256, "b")} "')
+        if step % 7 == 0:
+            lines.append("x#" if step % 3 == 0 else f"{step % 2}#")
+    return "\n".join(lines) + "\n"
+
+
+def _full_scan(vcd_filename, t_start, t_end):
+    """Window semantics of read_window, by scanning the whole file."""
+    with open_vcd(vcd_filename) as stream:
+        references = stream.header.references_to_ids
+        current, changes = {}, {code: [] for code in references.values()}
+        for time, code, value in stream.changes():
+            if time > t_end:
+                break
+            if time <= t_start:
+                current[code] = value
+            else:
+                changes[code].append((time, value))
+    return {
+        reference: ([(t_start, current[code])] if code in current else [])
+        + changes[code]
+        for reference, code in references.items()
+    }
+
+
+@pytest.fixture(params=["plain", "gzip", "zstd"])
+def vcd_file(request, tmp_path):
+    path = tmp_path / "index.vcd"
+    path.write_text(_vcd_text())
+    if request.param == "plain":
+        return str(path)
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    return compress_file(str(path), request.param)
+
+
+@pytest.fixture
+def index(vcd_file):
+    # Small spacing, so the file gets many checkpoints
+    index = load_vcd_index(vcd_file, checkpoint_bytes=256, use_cache=False)
+    assert len(index.checkpoints) > 10
+    return index
+
+
+def _windows(index):
+    first = index.checkpoints[0].time
+    middle = index.checkpoints[len(index.checkpoints) // 2].time
+    last_change = STEPS * STEP
+    return [
+        (0, first - 1),  # entirely before the first change
+        (0, first + 40),  # starts before the first checkpoint
+        (middle, middle + 100),  # starts exactly on a checkpoint
+        (middle - 100, middle),  # ends exactly on a checkpoint
+        (middle + 1, middle + 1),  # a single time step
+        (first, last_change),  # the whole file
+        (last_change - 20, last_change + 100),  # past the last change
+        (last_change + 50, last_change + 500),  # after the last change
+    ]
+
+
+def test_windows_match_full_scan(vcd_file, index):
+    for t_start, t_end in _windows(index):
+        assert read_window(index, t_start, t_end) == _full_scan(
+            vcd_file, t_start, t_end
+        ), (t_start, t_end)
+
+
+def test_windows_from_path_use_sidecar(vcd_file, index):
+    middle = index.checkpoints[len(index.checkpoints) // 2].time
+    expected = _full_scan(vcd_file, middle, middle + 100)
+
+    assert read_window(vcd_file, middle, middle + 100) == expected
+    assert read_window(vcd_file, middle, middle + 100) == expected
+
+
+def test_selected_signals(vcd_file, index):
+    middle = index.checkpoints[len(index.checkpoints) // 2].time
+    expected = _full_scan(vcd_file, middle, middle + 200)
+
+    window = read_window(index, middle, middle + 200, signals=["tb.flag"])
+
+    assert window == {"tb.flag": expected["tb.flag"]}
+
+
+def test_after_last_change_holds_final_values(index):
+    last_change = STEPS * STEP
+
+    window = read_window(index, last_change + 50, last_change + 500)
+
+    assert all(len(changes) == 1 for changes in window.values())
+    assert window["tb.clk"] == [(last_change + 50, "0")]
@@ -0,0 +1,175 @@
+"""
+Tests for verilator_runner
+
+Runs go through simulation_backends.ScriptedBackend, so neither Docker
+nor Verilator is needed.
+"""
+
+import os
+import textwrap
+
+import pytest
+from simulation_backends import ScriptedBackend
+from verilator_runner import (
+    OutputStripper,
+    StreamingOutput,
+    build_fingerprint,
+    run_docker_compose,
+)
+
+ENV_TEXT = """PROJECT_DIR=.
+DESIGN_FILE=design.sv
+TESTBENCH_FILE=testbench.sv
+TOP_MODULE=testbench
+VCD_FILE=testbench.vcd
+"""
+
+SOURCES = {
+    "design.sv": '`include "package.sv"\nmodule design; endmodule\n',
+    "package.sv": "package units_pkg; parameter int N = 4; endpackage\n",
+    "testbench.sv": "module testbench; design dut(); endmodule\n",
+}
+
+
+class BuildingBackend(ScriptedBackend):
+    """Scripted backend that leaves a simulation binary behind."""
+
+    def run_simulation(self, target_dir, env_file_path, env, on_line, build):
+        if build:
+            os.makedirs(os.path.join(target_dir, "obj_dir"), exist_ok=True)
+            binary = os.path.join(target_dir, "obj_dir", "Vtestbench")
+            with open(binary, "w") as binary_file:
+                binary_file.write("")
+        return super().run_simulation(
+            target_dir, env_file_path, env, on_line, build
+        )
+
+
+@pytest.fixture
+def example_dir(tmp_path):
+    (tmp_path / ".env").write_text(ENV_TEXT)
+    for name, text in SOURCES.items():
+        (tmp_path / name).write_text(text)
+    return str(tmp_path) + os.sep
+
+
+def _env():
+    return dict(
+        line.split("=", 1) for line in ENV_TEXT.splitlines() if line
+    )
+
+
+def test_fingerprint_covers_included_files(example_dir):
+    before = build_fingerprint(example_dir, _env())
+    with open(os.path.join(example_dir, "package.sv"), "a") as package:
+        package.write("// changed\n")
+
+    assert build_fingerprint(example_dir, _env()) != before
+
+
+def test_fingerprint_ignores_unrelated_files(example_dir):
+    before = build_fingerprint(example_dir, _env())
+    with open(os.path.join(example_dir, "unused.sv"), "w") as unused:
+        unused.write("module unused; endmodule\n")
+
+    assert build_fingerprint(example_dir, _env()) == before
+
+
+def test_incremental_rebuilds_after_include_change(example_dir):
+    backend = BuildingBackend(["ok\n"])
+
+    def run():
+        return run_docker_compose(
+            target_dir=example_dir,
+            backend=backend,
+            incremental=True,
+            print_fn=lambda line: None,
+        )
+
+    assert run() == 0
+    assert run() == 0
+    with open(os.path.join(example_dir, "package.sv"), "a") as package:
+        package.write("// changed\n")
+    assert run() == 0
+
+    builds = [build for action, _, build in backend.calls]
+    assert builds == [True, False, True]
+
+
+def test_run_through_scripted_backend(example_dir):
+    backend = ScriptedBackend([f"line {index}\n" for index in range(3)])
+    printed = []
+
+    returncode = run_docker_compose(
+        target_dir=example_dir, backend=backend, print_fn=printed.append
+    )
+
+    assert returncode == 0
+    assert backend.calls == [("simulate", example_dir, True)]
+    assert printed[2:5] == ["line 0", "line 1", "line 2"]
+    assert "Process finished with return code: 0" in printed
+
+
+def test_failed_run_explains_failure(example_dir):
+    backend = ScriptedBackend(["error\n"], returncode=3)
+    printed = []
+
+    returncode = run_docker_compose(
+        target_dir=example_dir, backend=backend, print_fn=printed.append
+    )
+
+    assert returncode == 3
+    assert "\nScripted run failed." in printed
+
+
+def test_missing_env_file(tmp_path):
+    backend = ScriptedBackend()
+    printed = []
+
+    returncode = run_docker_compose(
+        target_dir=str(tmp_path) + os.sep,
+        backend=backend,
+        print_fn=printed.append,
+    )
+
+    assert returncode == 1
+    assert backend.calls == []
+    assert printed[0].startswith("Error: Environment file not found")
+
+
+def _sliced(lines):
+    """The whole-list stripping the runner used before streaming."""
+    return lines[14:-4] if len(lines) > 18 else lines
+
+
+@pytest.mark.parametrize("count", [0, 1, 18, 19, 20, 5000])
+def test_stripper_matches_list_slice(count):
+    lines = [f"line {index}\n" for index in range(count)]
+    stripper = OutputStripper()
+
+    emitted = []
+    for line in lines:
+        emitted.extend(stripper.push(line))
+        assert len(stripper._buffer) <= 19
+    emitted.extend(stripper.flush())
+
+    assert emitted == _sliced(lines)
+
+
+@pytest.mark.parametrize("count", [0, 18, 19, 5000])
+def test_streaming_output_matches_list_slice(count):
+    lines = [f"line {index}  \n" for index in range(count)]
+    lines[count // 2 : count // 2 + 1] = ["x" * 100 + "\n"] if count else []
+    printed = []
+
+    with StreamingOutput(strip_lines=True, print_fn=printed.append) as output:
+        for line in lines:
+            output.write(line)
+
+    expected = [line.rstrip() for line in _sliced(lines)]
+    expected = [
+        textwrap.fill(line, width=80) if len(line) > 80 else line
+        for line in expected
+    ]
+    assert printed == expected
+    assert output.line_count == count
@@ -0,0 +1,113 @@
+"""
+Tests for waveform_store
+
+The sidecar cache must return the same waveform as a fresh parse, accept
+a touched but unchanged VCD without hashing it on every load, and honour
+signal selectors.
+"""
+
+import os
+
+import numpy as np
+import pytest
+import waveform_store
+from waveform_store import cache_path_for, load_waveform
+
+VCD_TEXT = """$timescale 1ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$var wire 8 " count [7:0] $end
+$var wire 4 # bus [3:0] $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+b0 "
+bz #
+#5
+1!
+b101 "
+bx1 #
+#10
+0!
+b11111111 "
+"""
+
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    path = tmp_path / "store.vcd"
+    path.write_text(VCD_TEXT)
+    return str(path)
+
+
+@pytest.fixture
+def digest_calls(monkeypatch):
+    calls = []
+    file_digest = waveform_store._file_digest
+
+    def counting_digest(path):
+        calls.append(path)
+        return file_digest(path)
+
+    monkeypatch.setattr(waveform_store, "_file_digest", counting_digest)
+    return calls
+
+
+def _touch(path, seconds=100):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def test_cache_matches_parse(vcd_file):
+    parsed = load_waveform(vcd_file, use_cache=False)
+    load_waveform(vcd_file)
+    cached = load_waveform(vcd_file)
+
+    assert os.path.exists(cache_path_for(vcd_file))
+    assert cached.endtime == parsed.endtime == 10
+    for code, signal in parsed.signals.items():
+        assert cached.signals[code].tv == signal.tv
+    assert cached.summaries() == parsed.summaries()
+    count = cached["tb.count[7:0]"]
+    assert (count.first_value, count.last_value) == ("0", "11111111")
+    assert count.value_string(0) == "00000000"
+
+
+def test_touched_file_is_hashed_once(vcd_file, digest_calls):
+    load_waveform(vcd_file)
+    _touch(vcd_file)
+    digest_calls.clear()
+
+    load_waveform(vcd_file)
+    load_waveform(vcd_file)
+
+    assert len(digest_calls) == 1
+    metadata, _ = waveform_store._read_cache_metadata(
+        cache_path_for(vcd_file)
+    )
+    assert metadata["source"]["mtime_ns"] == os.stat(vcd_file).st_mtime_ns
+
+
+def test_changed_content_rebuilds(vcd_file):
+    load_waveform(vcd_file)
+    with open(vcd_file, "r+") as source:
+        text = source.read()
+        source.seek(0)
+        source.write(text.replace("b101", "b111"))
+    _touch(vcd_file)
+
+    waveform = load_waveform(vcd_file)
+
+    assert waveform["tb.count[7:0]"].value_string(1) == "00000111"
+
+
+def test_signals_filter_cached_waveform(vcd_file):
+    load_waveform(vcd_file)
+
+    waveform = load_waveform(vcd_file, signals=["tb.clk"])
+    parsed = load_waveform(vcd_file, use_cache=False, signals=["tb.clk"])
+
+    assert set(waveform.signals) == set(parsed.signals) == {"!"}
+    assert len(waveform.header.variables) == 3
+    assert np.array_equal(waveform["tb.clk"].times, [0, 5, 10])
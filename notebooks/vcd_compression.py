@@ -0,0 +1,269 @@
+"""
+Compressed VCD Files Module
+
+This module opens ``.vcd.gz``, ``.vcd.zst`` and ``.vcd.xz`` files through
+streaming decompressors, so the VCD readers can consume them line by line
+without writing out the plain file. It also provides an archive command
+that compresses every VCD file in the example tree, and a restore command
+that brings back the plain files (GTKWave and the .env VCD_FILE entries
+expect them).
+
+Usage:
+    python vcd_compression.py archive [--method zstd|gzip|xz] [--keep]
+    python vcd_compression.py restore
+"""
+
+import argparse
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+from typing import BinaryIO, List, Optional, Tuple
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "xz": ".xz"}
+VCD_SUFFIXES = (".vcd",) + tuple(
+    ".vcd" + suffix for suffix in COMPRESSION_SUFFIXES.values()
+)
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 10, "xz": 6}
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading or writing .zst files requires the zstandard package "
+            "from the zstd extra (uv sync --extra zstd, or pip install "
+            "zstandard)"
+        ) from None
+    return zstandard
+
+
+def compression_method(filename: str) -> Optional[str]:
+    """Return the compression method implied by a file name, if any."""
+    for method, suffix in COMPRESSION_SUFFIXES.items():
+        if filename.endswith(suffix):
+            return method
+    return None
+
+
+def is_vcd_file(filename: str) -> bool:
+    """Check whether a file name is a plain or compressed VCD file."""
+    return filename.endswith(VCD_SUFFIXES)
+
+
+def open_binary(filename: str) -> BinaryIO:
+    """Open a possibly compressed file for reading decompressed bytes.
+
+    Offsets refer to the decompressed data. Use seek_to() to position the
+    stream, since not every decompressor implements seek().
+    """
+    method = compression_method(filename)
+    if method == "gzip":
+        return gzip.open(filename, "rb")
+    if method == "xz":
+        return lzma.open(filename, "rb")
+    if method == "zstd":
+        zstandard = _import_zstandard()
+        # The zstd reader is neither iterable nor line buffered on its own
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(
+                open(filename, "rb"), closefd=True
+            ),
+            COPY_BUFFER_SIZE,
+        )
+    return open(filename, "rb")
+
+
+def seek_to(stream: BinaryIO, offset: int) -> None:
+    """Move a freshly opened stream from open_binary() to ``offset``.
+
+    Streams that cannot seek are advanced by decompressing and discarding
+    the data before ``offset``.
+    """
+    if stream.seekable():
+        stream.seek(offset)
+        return
+    remaining = offset
+    while remaining > 0:
+        chunk = stream.read(min(remaining, COPY_BUFFER_SIZE))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+
+
+def open_text(filename: str, errors: Optional[str] = None) -> io.TextIOBase:
+    """Open a possibly compressed file for reading decompressed text."""
+    if compression_method(filename) is None:
+        return open(filename, "r", errors=errors)
+    return io.TextIOWrapper(open_binary(filename), errors=errors)
+
+
+def _open_compressed_writer(filename: str, method: str, level: int):
+    if method == "gzip":
+        return gzip.open(filename, "wb", compresslevel=level)
+    if method == "xz":
+        return lzma.open(filename, "wb", preset=level)
+    zstandard = _import_zstandard()
+    return zstandard.ZstdCompressor(level=level).stream_writer(
+        open(filename, "wb"), closefd=True
+    )
+
+
+def default_method() -> str:
+    """Prefer zstd when the zstandard package is installed, else gzip."""
+    try:
+        _import_zstandard()
+    except ImportError:
+        return "gzip"
+    return "zstd"
+
+
+def compress_file(
+    filename: str,
+    method: Optional[str] = None,
+    level: Optional[int] = None,
+    keep: bool = False,
+) -> str:
+    """Compress a file next to itself, streaming in fixed-size chunks.
+
+    The compressed file is written under a temporary name and renamed
+    into place, and it inherits the original modification time.
+
+    Args:
+        filename: File to compress.
+        method: "zstd", "gzip" or "xz". Defaults to default_method().
+        level: Compression level. Defaults to a per-method setting.
+        keep: Whether to keep the original file.
+
+    Returns:
+        Path of the compressed file.
+    """
+    method = method or default_method()
+    if method not in COMPRESSION_SUFFIXES:
+        raise ValueError(
+            f"Unknown compression method '{method}', expected one of "
+            f"{list(COMPRESSION_SUFFIXES)}"
+        )
+    target = filename + COMPRESSION_SUFFIXES[method]
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    level = DEFAULT_LEVELS[method] if level is None else level
+    try:
+        with open(filename, "rb") as source:
+            with _open_compressed_writer(temp_path, method, level) as sink:
+                shutil.copyfileobj(source, sink, COPY_BUFFER_SIZE)
+        shutil.copystat(filename, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if not keep:
+        os.remove(filename)
+    return target
+
+
+def decompress_file(filename: str, keep: bool = False) -> str:
+    """Restore the plain file next to a compressed one.
+
+    Returns:
+        Path of the plain file.
+    """
+    if compression_method(filename) is None:
+        raise ValueError(f"Not a compressed file: {filename}")
+    target = os.path.splitext(filename)[0]
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open_binary(filename) as source:
+            with open(temp_path, "wb") as sink:
+                shutil.copyfileobj(source, sink, COPY_BUFFER_SIZE)
+        shutil.copystat(filename, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if not keep:
+        os.remove(filename)
+    return target
+
+
+def find_vcd_files(root: str = ".", compressed: bool = False) -> List[str]:
+    """Find plain (or compressed) VCD files below ``root``, sorted."""
+    found = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = [name for name in subdirs if name != "obj_dir"]
+        for name in files:
+            if name.endswith(VCD_SUFFIXES) and compressed == (
+                compression_method(name) is not None
+            ):
+                found.append(os.path.join(directory, name))
+    return sorted(found)
+
+
+def archive_vcd_files(
+    root: str = ".",
+    method: Optional[str] = None,
+    level: Optional[int] = None,
+    keep: bool = False,
+) -> Tuple[int, int, int]:
+    """Compress every plain VCD file below ``root``.
+
+    Returns:
+        Tuple of (files compressed, bytes before, bytes after).
+    """
+    count = before = after = 0
+    for vcd_filename in find_vcd_files(root):
+        size = os.path.getsize(vcd_filename)
+        compressed = compress_file(vcd_filename, method, level, keep)
+        count += 1
+        before += size
+        after += os.path.getsize(compressed)
+    return count, before, after
+
+
+def restore_vcd_files(root: str = ".", keep: bool = False) -> int:
+    """Decompress every compressed VCD file below ``root``.
+
+    Returns:
+        Number of files restored.
+    """
+    restored = 0
+    for filename in find_vcd_files(root, compressed=True):
+        decompress_file(filename, keep)
+        restored += 1
+    return restored
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compress or restore the example VCD files."
+    )
+    parser.add_argument("command", choices=("archive", "restore"))
+    parser.add_argument("root", nargs="?", default=".")
+    parser.add_argument("--method", choices=list(COMPRESSION_SUFFIXES))
+    parser.add_argument("--level", type=int)
+    parser.add_argument(
+        "--keep", action="store_true", help="keep the source files"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "restore":
+        restored = restore_vcd_files(args.root, args.keep)
+        print(f"Restored {restored} VCD files")
+        return 0
+
+    count, before, after = archive_vcd_files(
+        args.root, args.method, args.level, args.keep
+    )
+    ratio = before / after if after else 0.0
+    print(
+        f"Compressed {count} VCD files: {before / 1024:.1f} KB -> "
+        f"{after / 1024:.1f} KB ({ratio:.1f}x)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
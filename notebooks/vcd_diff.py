@@ -0,0 +1,387 @@
+"""
+Golden Waveform Comparison Module
+
+This module compares a freshly simulated VCD file against a stored golden
+VCD signal by signal. Both waveforms are loaded into columnar arrays, the
+value in effect at every change time of either file is looked up with
+vectorized searches, and the first time each signal differs is reported.
+Short mismatches caused by edge timing skew can be tolerated, and X/Z bits
+can be compared exactly or treated as don't-care. A batch mode checks every
+example VCD against its golden copy in parallel worker processes.
+
+Usage:
+    python vcd_diff.py --update           # record the current VCDs
+    python vcd_diff.py                    # compare against the goldens
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from fst_reader import is_fst_file
+from vcd_compression import is_vcd_file
+from waveform_store import (
+    KIND_INT,
+    KIND_REAL,
+    SignalWaveform,
+    bit_matrix,
+    load_waveform,
+)
+
+DEFAULT_GOLDEN_ROOT = "golden_vcd"
+
+# X/Z handling modes
+XZ_EXACT = "exact"  # x/z bits must match exactly (case-insensitive)
+XZ_GOLDEN = "golden"  # x/z bits in the golden file match any value
+XZ_IGNORE = "ignore"  # bits that are x/z in either file are not compared
+XZ_MODES = (XZ_EXACT, XZ_GOLDEN, XZ_IGNORE)
+
+_XZ_BYTES = np.frombuffer(b"xz", dtype=np.uint8)
+
+
+@dataclass
+class SignalMismatch:
+    """First difference found for one signal."""
+
+    reference: str
+    time: int
+    golden_value: str
+    actual_value: str
+
+
+@dataclass
+class DiffResult:
+    """Outcome of comparing one VCD file against its golden copy."""
+
+    golden_file: str
+    actual_file: str
+    mismatches: List[SignalMismatch] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    extra: List[str] = field(default_factory=list)
+    error: str = ""
+    signals_compared: int = 0
+    duration: float = 0.0
+
+    @property
+    def passed(self) -> bool:
+        return not (self.mismatches or self.missing or self.error)
+
+
+def _value_text(signal: SignalWaveform, index: int) -> str:
+    return "none" if index < 0 else signal.value_string(index)
+
+
+def compare_signal(
+    golden: SignalWaveform,
+    actual: SignalWaveform,
+    time_tolerance: int = 0,
+    xz_mode: str = XZ_EXACT,
+    end_time: Optional[int] = None,
+) -> Optional[Tuple[int, int, int]]:
+    """Find the first time two signals differ.
+
+    Args:
+        golden: Expected signal.
+        actual: Signal from the new run.
+        time_tolerance: Mismatches lasting this many time units or less are
+            ignored, which absorbs small edge offsets.
+        xz_mode: One of XZ_EXACT, XZ_GOLDEN or XZ_IGNORE.
+        end_time: Time the last value is held until, for the duration of
+            a trailing mismatch. Defaults to the last change time.
+
+    Returns:
+        None when the signals match, otherwise a tuple of (time, golden
+        change index, actual change index) for the first mismatch. An
+        index of -1 means the signal had no value yet.
+    """
+    if xz_mode not in XZ_MODES:
+        raise ValueError(f"xz_mode must be one of {XZ_MODES}")
+
+    times = np.union1d(golden.times, actual.times)
+    if len(times) == 0:
+        return None
+    golden_index = np.searchsorted(golden.times, times, side="right") - 1
+    actual_index = np.searchsorted(actual.times, times, side="right") - 1
+    golden_valid = golden_index >= 0
+    actual_valid = actual_index >= 0
+    both = golden_valid & actual_valid
+
+    kinds = {golden.kind, actual.kind}
+    if golden.size != actual.size:
+        differs = np.ones(len(times), dtype=bool)
+    elif kinds == {KIND_INT} or KIND_REAL in kinds:
+        golden_values = golden.values[np.maximum(golden_index, 0)]
+        actual_values = actual.values[np.maximum(actual_index, 0)]
+        differs = golden_values != actual_values
+    else:
+        golden_bits = bit_matrix(golden)[np.maximum(golden_index, 0)]
+        actual_bits = bit_matrix(actual)[np.maximum(actual_index, 0)]
+        bit_differs = golden_bits != actual_bits
+        if xz_mode != XZ_EXACT:
+            dont_care = np.isin(golden_bits, _XZ_BYTES)
+            if xz_mode == XZ_IGNORE:
+                dont_care |= np.isin(actual_bits, _XZ_BYTES)
+            bit_differs &= ~dont_care
+        differs = bit_differs.any(axis=1)
+    differs = np.where(both, differs, golden_valid != actual_valid)
+
+    if not differs.any():
+        return None
+
+    # Group consecutive mismatching intervals and measure each run
+    end_time = max(int(times[-1]), end_time or 0)
+    interval_ends = np.append(times[1:], end_time)
+    edges = np.diff(np.concatenate([[False], differs, [False]]).astype(int))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1) - 1
+    durations = interval_ends[run_ends] - times[run_starts]
+    # A mismatch still present at the end always counts
+    lasting = (durations > time_tolerance) | (run_ends == len(times) - 1)
+    if not lasting.any():
+        return None
+    first = run_starts[np.argmax(lasting)]
+    return (
+        int(times[first]),
+        int(golden_index[first]),
+        int(actual_index[first]),
+    )
+
+
+def compare_vcd_files(
+    golden_file: str,
+    actual_file: str,
+    signals: Optional[Iterable[str]] = None,
+    time_tolerance: int = 0,
+    xz_mode: str = XZ_EXACT,
+) -> DiffResult:
+    """Compare a VCD file against its golden copy, signal by signal.
+
+    Signals are matched by full hierarchical reference.
+
+    Args:
+        golden_file: Path to the golden VCD file.
+        actual_file: Path to the VCD file from the new run.
+        signals: Optional selectors (see vcd_stream.select_variables)
+            restricting the comparison.
+        time_tolerance: Mismatches lasting at most this many time units
+            are ignored.
+        xz_mode: How X/Z bits are compared, one of XZ_MODES.
+
+    Returns:
+        The comparison result.
+    """
+    start = time.perf_counter()
+    result = DiffResult(golden_file, actual_file)
+    try:
+        golden = load_waveform(golden_file, signals=signals)
+        actual = load_waveform(actual_file, use_cache=False, signals=signals)
+    except (OSError, KeyError, ValueError) as error:
+        result.error = f"{type(error).__name__}: {error}"
+        result.duration = time.perf_counter() - start
+        return result
+
+    if golden.header.timescale != actual.header.timescale:
+        result.error = (
+            f"Timescale differs: {golden.header.timescale} vs "
+            f"{actual.header.timescale}"
+        )
+        result.duration = time.perf_counter() - start
+        return result
+
+    golden_refs = {
+        reference: code
+        for reference, code in golden.references_to_ids.items()
+        if code in golden.signals
+    }
+    actual_refs = {
+        reference: code
+        for reference, code in actual.references_to_ids.items()
+        if code in actual.signals
+    }
+    result.missing = sorted(set(golden_refs) - set(actual_refs))
+    result.extra = sorted(set(actual_refs) - set(golden_refs))
+    end_time = max(golden.endtime, actual.endtime)
+
+    for reference in sorted(set(golden_refs) & set(actual_refs)):
+        golden_signal = golden.signals[golden_refs[reference]]
+        actual_signal = actual.signals[actual_refs[reference]]
+        result.signals_compared += 1
+        mismatch = compare_signal(
+            golden_signal, actual_signal, time_tolerance, xz_mode, end_time
+        )
+        if mismatch is not None:
+            mismatch_time, golden_index, actual_index = mismatch
+            result.mismatches.append(
+                SignalMismatch(
+                    reference,
+                    mismatch_time,
+                    _value_text(golden_signal, golden_index),
+                    _value_text(actual_signal, actual_index),
+                )
+            )
+
+    result.mismatches.sort(key=lambda mismatch: mismatch.time)
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def golden_path_for(
+    vcd_filename: str, golden_root: str = DEFAULT_GOLDEN_ROOT
+) -> str:
+    """Return where the golden copy of an example VCD file is stored."""
+    return os.path.join(golden_root, os.path.relpath(vcd_filename))
+
+
+def discover_vcd_files(
+    root: str = ".", golden_root: str = DEFAULT_GOLDEN_ROOT
+) -> List[str]:
+    """Find every plain or compressed VCD file and FST file below ``root``.
+
+    Files inside the golden store are skipped.
+    """
+    golden_root = os.path.abspath(golden_root)
+    vcd_files = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = [
+            name
+            for name in subdirs
+            if os.path.abspath(os.path.join(directory, name)) != golden_root
+            and name != "obj_dir"
+        ]
+        for name in files:
+            if is_vcd_file(name) or is_fst_file(name):
+                vcd_files.append(
+                    os.path.relpath(os.path.join(directory, name))
+                )
+    return sorted(vcd_files)
+
+
+def update_goldens(
+    vcd_files: Iterable[str], golden_root: str = DEFAULT_GOLDEN_ROOT
+) -> int:
+    """Copy VCD files into the golden store, replacing older copies.
+
+    Returns:
+        Number of files copied.
+    """
+    copied = 0
+    for vcd_filename in vcd_files:
+        golden_file = golden_path_for(vcd_filename, golden_root)
+        os.makedirs(os.path.dirname(golden_file), exist_ok=True)
+        shutil.copy2(vcd_filename, golden_file)
+        copied += 1
+    return copied
+
+
+def _compare_task(arguments) -> DiffResult:
+    return compare_vcd_files(*arguments)
+
+
+def compare_batch(
+    vcd_files: Iterable[str],
+    golden_root: str = DEFAULT_GOLDEN_ROOT,
+    time_tolerance: int = 0,
+    xz_mode: str = XZ_EXACT,
+    max_workers: Optional[int] = None,
+) -> List[DiffResult]:
+    """Compare many VCD files against their goldens in worker processes.
+
+    Args:
+        vcd_files: VCD files from the new run.
+        golden_root: Directory holding the golden copies.
+        time_tolerance: Mismatches lasting at most this many time units
+            are ignored.
+        xz_mode: How X/Z bits are compared, one of XZ_MODES.
+        max_workers: Number of worker processes. Defaults to the core
+            count; 1 compares in the current process.
+
+    Returns:
+        Results in the order of ``vcd_files``.
+    """
+    tasks = [
+        (
+            golden_path_for(vcd_filename, golden_root),
+            vcd_filename,
+            None,
+            time_tolerance,
+            xz_mode,
+        )
+        for vcd_filename in vcd_files
+    ]
+    workers = max(1, max_workers or os.cpu_count() or 1)
+    if workers == 1 or len(tasks) <= 1:
+        return [_compare_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        return list(executor.map(_compare_task, tasks, chunksize=chunksize))
+
+
+def print_diff_report(
+    results: List[DiffResult], show_passed: bool = False
+) -> None:
+    """Print the first mismatch per signal for every failing comparison."""
+    failed = [result for result in results if not result.passed]
+    print("=" * 80)
+    print("Golden Waveform Comparison")
+    print("=" * 80)
+    for result in results:
+        if result.passed:
+            if show_passed:
+                print(f"PASS  {result.actual_file}")
+            continue
+        print(f"FAIL  {result.actual_file}")
+        if result.error:
+            print(f"      {result.error}")
+        for reference in result.missing:
+            print(f"      missing signal: {reference}")
+        for mismatch in result.mismatches:
+            print(
+                f"      {mismatch.reference} @ {mismatch.time}: "
+                f"expected {mismatch.golden_value}, "
+                f"got {mismatch.actual_value}"
+            )
+    print("-" * 80)
+    signals = sum(result.signals_compared for result in results)
+    print(
+        f"{len(results) - len(failed)} passed, {len(failed)} failed, "
+        f"{signals} signals compared"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare example VCD files against golden copies."
+    )
+    parser.add_argument("vcd_files", nargs="*", help="default: all VCDs")
+    parser.add_argument("--golden-root", default=DEFAULT_GOLDEN_ROOT)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="copy the VCD files into the golden store instead",
+    )
+    parser.add_argument("--time-tolerance", type=int, default=0)
+    parser.add_argument("--xz", choices=XZ_MODES, default=XZ_EXACT)
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    vcd_files = args.vcd_files or discover_vcd_files(".", args.golden_root)
+    if args.update:
+        copied = update_goldens(vcd_files, args.golden_root)
+        print(f"Stored {copied} golden VCD files in {args.golden_root}")
+        return 0
+
+    results = compare_batch(
+        vcd_files, args.golden_root, args.time_tolerance, args.xz, args.jobs
+    )
+    print_diff_report(results)
+    return 0 if all(result.passed for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
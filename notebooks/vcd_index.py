@@ -0,0 +1,308 @@
+"""
+VCD Seek Index Module
+
+This module builds a checkpoint index over the value change section of a
+VCD file. Each checkpoint records the byte offset of a ``#time`` line and a
+snapshot of every signal's value just before it, so a time window can be
+read by seeking to the nearest checkpoint instead of parsing the whole file.
+"""
+
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from fst_reader import is_fst_file, read_fst_window
+from vcd_compression import open_binary, seek_to
+from vcd_stream import (
+    SCALAR_VALUE_CHARS,
+    VcdHeader,
+    VcdStream,
+    VcdVariable,
+    parse_timescale,
+    parse_vcd_header,
+    select_variables,
+)
+
+INDEX_SUFFIX = ".vcdidx"
+DEFAULT_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+_SCALAR_BYTES = frozenset(ord(char) for char in SCALAR_VALUE_CHARS)
+_VECTOR_BYTES = frozenset(b"bBrR")
+
+
+@dataclass
+class Checkpoint:
+    """Seek position of a ``#time`` line and the values in effect there."""
+
+    time: int
+    offset: int
+    values: Dict[str, str]
+
+
+@dataclass
+class VcdIndex:
+    """Checkpoints over one VCD file, ordered by time."""
+
+    vcd_filename: str
+    header: VcdHeader
+    endtime: int
+    source: Dict[str, int]
+    checkpoints: List[Checkpoint] = field(default_factory=list)
+
+    def checkpoint_before(self, time: int) -> Optional[Checkpoint]:
+        """Return the last checkpoint at or before ``time``."""
+        best = None
+        low, high = 0, len(self.checkpoints)
+        while low < high:
+            middle = (low + high) // 2
+            if self.checkpoints[middle].time <= time:
+                best = self.checkpoints[middle]
+                low = middle + 1
+            else:
+                high = middle
+        return best
+
+
+def _source_key(vcd_filename: str) -> Dict[str, int]:
+    stat = os.stat(vcd_filename)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_vcd_index(
+    vcd_filename: str, checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES
+) -> VcdIndex:
+    """Scan a VCD file once and record checkpoints at ``#time`` lines.
+
+    A checkpoint is taken at the first timestamp and then at the first
+    timestamp after every ``checkpoint_bytes`` of value change data.
+
+    Args:
+        vcd_filename: Path to the VCD file.
+        checkpoint_bytes: Approximate spacing between checkpoints.
+
+    Returns:
+        The index for the file.
+    """
+    source = _source_key(vcd_filename)
+    offset = 0
+
+    with open_binary(vcd_filename) as vcd_file:
+
+        def header_lines():
+            nonlocal offset
+            for raw_line in vcd_file:
+                offset += len(raw_line)
+                yield raw_line.decode("utf-8", "replace")
+
+        header = parse_vcd_header(header_lines())
+
+        values: Dict[str, str] = {}
+        checkpoints: List[Checkpoint] = []
+        next_checkpoint = offset
+        time = 0
+
+        for raw_line in vcd_file:
+            line = raw_line.strip()
+            if line:
+                first = line[0]
+                if first in _SCALAR_BYTES:
+                    values[line[1:].decode()] = chr(first)
+                elif first in _VECTOR_BYTES:
+                    value, identifier_code = line[1:].split()
+                    values[identifier_code.decode()] = value.decode()
+                elif first == 0x23:  # "#"
+                    words = line.split()
+                    time = int(words[0][1:])
+                    if offset >= next_checkpoint:
+                        checkpoints.append(
+                            Checkpoint(time, offset, dict(values))
+                        )
+                        next_checkpoint = offset + checkpoint_bytes
+                    for change in words[1:]:
+                        if change[0] in _SCALAR_BYTES:
+                            values[change[1:].decode()] = chr(change[0])
+            offset += len(raw_line)
+
+    return VcdIndex(vcd_filename, header, time, source, checkpoints)
+
+
+def index_path_for(vcd_filename: str) -> str:
+    """Return the sidecar index path for a VCD file."""
+    return vcd_filename + INDEX_SUFFIX
+
+
+def save_vcd_index(index: VcdIndex, index_path: str) -> None:
+    """Write an index as JSON, replacing any previous file atomically."""
+    header = index.header
+    payload = {
+        "source": index.source,
+        "endtime": index.endtime,
+        "header": {
+            "timescale": {
+                key: str(value) for key, value in header.timescale.items()
+            },
+            "version": header.version,
+            "date": header.date,
+            "scopes": header.scopes,
+            "variables": [
+                [
+                    var.reference,
+                    var.identifier_code,
+                    var.size,
+                    var.var_type,
+                    var.scope,
+                ]
+                for var in header.variables
+            ],
+        },
+        "checkpoints": [
+            [checkpoint.time, checkpoint.offset, checkpoint.values]
+            for checkpoint in index.checkpoints
+        ],
+    }
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as index_file:
+        json.dump(payload, index_file)
+    os.replace(temp_path, index_path)
+
+
+def _load_index_file(vcd_filename: str, index_path: str) -> VcdIndex:
+    with open(index_path, "r", encoding="utf-8") as index_file:
+        payload = json.load(index_file)
+
+    stored = payload["header"]
+    timescale = stored["timescale"]
+    header = VcdHeader(
+        timescale=parse_timescale(
+            f"{timescale['magnitude']}{timescale['unit']}"
+        )
+        if timescale
+        else {},
+        version=stored["version"],
+        date=stored["date"],
+        scopes=stored["scopes"],
+        variables=[VcdVariable(*fields) for fields in stored["variables"]],
+    )
+    return VcdIndex(
+        vcd_filename,
+        header,
+        payload["endtime"],
+        payload["source"],
+        [Checkpoint(*fields) for fields in payload["checkpoints"]],
+    )
+
+
+def load_vcd_index(
+    vcd_filename: str,
+    checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES,
+    use_cache: bool = True,
+) -> VcdIndex:
+    """Return the index for a VCD file, reusing its sidecar when current.
+
+    Args:
+        vcd_filename: Path to the VCD file.
+        checkpoint_bytes: Checkpoint spacing used when building the index.
+        use_cache: Whether to read and write the ``.vcdidx`` sidecar.
+
+    Returns:
+        The index for the file.
+    """
+    index_path = index_path_for(vcd_filename)
+    if use_cache and os.path.exists(index_path):
+        try:
+            index = _load_index_file(vcd_filename, index_path)
+            if index.source == _source_key(vcd_filename):
+                return index
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    index = build_vcd_index(vcd_filename, checkpoint_bytes)
+    if use_cache:
+        try:
+            save_vcd_index(index, index_path)
+        except OSError as error:
+            print(f"Warning: could not write index {index_path}: {error}")
+    return index
+
+
+def read_window(
+    vcd: Union[str, VcdIndex],
+    t_start: int,
+    t_end: int,
+    signals: Optional[Iterable[str]] = None,
+) -> Dict[str, List[Tuple[int, str]]]:
+    """Read the value changes of a time window from a VCD file.
+
+    Only the region between the nearest checkpoint before ``t_start`` and
+    ``t_end`` is decoded. FST files need no index and are handed to
+    fst_reader.read_fst_window.
+
+    Args:
+        vcd: Path to the VCD or FST file, or an index built for a VCD.
+        t_start: First time of the window, inclusive.
+        t_end: Last time of the window, inclusive.
+        signals: Signal references or selectors (see
+            vcd_stream.select_variables). Defaults to all signals.
+
+    Returns:
+        Dictionary mapping each reference to a list of (time, value)
+        tuples. The first tuple holds the value in effect at ``t_start``
+        (if the signal had one), followed by the changes in
+        (t_start, t_end].
+    """
+    if isinstance(vcd, str) and is_fst_file(vcd):
+        return read_fst_window(vcd, t_start, t_end, signals)
+    index = load_vcd_index(vcd) if isinstance(vcd, str) else vcd
+    references_to_ids = index.header.references_to_ids
+    if signals is None:
+        references = list(references_to_ids)
+    else:
+        references = list(
+            dict.fromkeys(
+                var.reference
+                for var in select_variables(index.header, signals)
+            )
+        )
+
+    wanted = {references_to_ids[ref] for ref in references}
+    checkpoint = index.checkpoint_before(t_start)
+    if checkpoint is None and index.checkpoints:
+        checkpoint = index.checkpoints[0]
+
+    current: Dict[str, str] = {}
+    changes: Dict[str, List[Tuple[int, str]]] = {
+        code: [] for code in wanted
+    }
+
+    if checkpoint is not None:
+        current = {
+            code: value
+            for code, value in checkpoint.values.items()
+            if code in wanted
+        }
+        with open_binary(index.vcd_filename) as raw_file:
+            seek_to(raw_file, checkpoint.offset)
+            text_file = io.TextIOWrapper(
+                raw_file, encoding="utf-8", errors="replace"
+            )
+            stream = VcdStream(
+                text_file, header=index.header, time=checkpoint.time
+            )
+            for time, identifier_code, value in stream.changes():
+                if time > t_end:
+                    break
+                if identifier_code not in wanted:
+                    continue
+                if time <= t_start:
+                    current[identifier_code] = value
+                else:
+                    changes[identifier_code].append((time, value))
+
+    window = {}
+    for reference in references:
+        code = references_to_ids[reference]
+        initial = [(t_start, current[code])] if code in current else []
+        window[reference] = initial + changes[code]
+    return window
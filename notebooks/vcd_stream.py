@@ -0,0 +1,379 @@
+"""
+Streaming VCD Reader Module
+
+This module provides a single-pass, generator based reader for Value Change
+Dump files. The header (timescale, scopes and variables) is parsed up front
+and value changes are then yielded one at a time, so memory use does not
+grow with the size of the dump.
+"""
+
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from decimal import Decimal
+from fnmatch import fnmatchcase
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
+
+from vcd_compression import open_text
+
+SCALAR_VALUE_CHARS = frozenset("01xXzZ")
+VECTOR_VALUE_CHARS = frozenset("bBrR")
+
+_GLOB_CHARS = frozenset("*?[")
+_BIT_RANGE = re.compile(r"\s*\[[^\]]*\]$")
+
+SignalSelector = Union[str, Pattern[str]]
+
+TIMESCALE_FACTORS = {
+    "s": "1e0",
+    "ms": "1e-3",
+    "us": "1e-6",
+    "ns": "1e-9",
+    "ps": "1e-12",
+    "fs": "1e-15",
+}
+
+
+@dataclass
+class VcdVariable:
+    """A single ``$var`` declaration from the VCD header."""
+
+    reference: str
+    identifier_code: str
+    size: int
+    var_type: str
+    scope: str
+
+
+@dataclass
+class VcdHeader:
+    """Everything declared before ``$enddefinitions``."""
+
+    timescale: Dict[str, object] = field(default_factory=dict)
+    version: str = ""
+    date: str = ""
+    scopes: List[str] = field(default_factory=list)
+    variables: List[VcdVariable] = field(default_factory=list)
+
+    @property
+    def references_to_ids(self) -> Dict[str, str]:
+        """Map each full signal reference to its identifier code."""
+        return {var.reference: var.identifier_code for var in self.variables}
+
+    @property
+    def identifier_codes(self) -> Dict[str, VcdVariable]:
+        """Map each identifier code to the first variable declaring it."""
+        codes = {}
+        for var in self.variables:
+            codes.setdefault(var.identifier_code, var)
+        return codes
+
+
+@dataclass
+class SignalSummary:
+    """Per identifier code statistics gathered in one pass."""
+
+    changes: int = 0
+    initial_value: Optional[str] = None
+    final_value: Optional[str] = None
+
+
+def _selector_matcher(selector: SignalSelector) -> Callable[[str], bool]:
+    if isinstance(selector, re.Pattern):
+        return lambda reference: selector.search(reference) is not None
+    if selector.startswith("re:"):
+        pattern = re.compile(selector[3:])
+        return lambda reference: pattern.search(reference) is not None
+
+    is_glob = not _GLOB_CHARS.isdisjoint(selector)
+
+    def matches(reference: str) -> bool:
+        if reference == selector or reference.startswith(selector + "."):
+            return True
+        if _BIT_RANGE.sub("", reference) == selector:
+            return True
+        return is_glob and fnmatchcase(reference, selector)
+
+    return matches
+
+
+def select_variables(
+    header: VcdHeader, selectors: Iterable[SignalSelector]
+) -> List[VcdVariable]:
+    """Resolve signal selectors against the variables of a VCD header.
+
+    Each selector is one of:
+
+    - an exact reference such as ``tb.dut.count[3:0]``, optionally
+      without its bit range (``tb.dut.count``);
+    - a scope path such as ``tb.dut``, selecting every signal below it;
+    - a glob such as ``*.dut.state*``;
+    - a regular expression, either compiled or as a string prefixed with
+      ``re:``, searched in the full reference.
+
+    Args:
+        header: Parsed VCD header.
+        selectors: Signal selectors, any mix of the forms above.
+
+    Returns:
+        Matching variables in header order.
+
+    Raises:
+        KeyError: If a selector matches no signal.
+    """
+    selectors = list(selectors)
+    matchers = [_selector_matcher(selector) for selector in selectors]
+    matched = [False] * len(matchers)
+    selected = []
+    for variable in header.variables:
+        hit = False
+        for index, matcher in enumerate(matchers):
+            if matcher(variable.reference):
+                matched[index] = hit = True
+        if hit:
+            selected.append(variable)
+
+    unmatched = [
+        getattr(selector, "pattern", selector)
+        for selector, found in zip(selectors, matched)
+        if not found
+    ]
+    if unmatched:
+        raise KeyError(f"Signals not found in VCD: {unmatched}")
+    return selected
+
+
+def parse_timescale(text: str) -> Dict[str, object]:
+    """Parse the body of a ``$timescale`` section.
+
+    Args:
+        text: Timescale text such as "1ps" or "10 ns".
+
+    Returns:
+        Dictionary with "timescale", "magnitude", "unit" and "factor" keys,
+        matching the layout used by vcdvcd.
+    """
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(fs|ps|ns|us|ms|s)", text)
+    if not match:
+        return {}
+    magnitude = Decimal(match.group(1))
+    unit = match.group(2)
+    factor = Decimal(TIMESCALE_FACTORS[unit])
+    return {
+        "timescale": magnitude * factor,
+        "magnitude": magnitude,
+        "unit": unit,
+        "factor": factor,
+    }
+
+
+def _read_section(first_line: str, lines: Iterator[str]) -> str:
+    """Collect a ``$keyword ... $end`` section that may span lines."""
+    text = first_line
+    while "$end" not in text:
+        try:
+            text += " " + next(lines).strip()
+        except StopIteration:
+            break
+    words = text.split()
+    return " ".join(words[1:-1] if words[-1] == "$end" else words[1:])
+
+
+def parse_vcd_header(lines: Iterator[str]) -> VcdHeader:
+    """Consume header lines up to and including ``$enddefinitions``.
+
+    Args:
+        lines: Iterator over the lines of a VCD file. It is left positioned
+            at the first line of the value change section.
+
+    Returns:
+        The parsed header.
+    """
+    header = VcdHeader()
+    hierarchy = []
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line.startswith("$var"):
+            words = line.split()
+            scope = ".".join(hierarchy)
+            name = "".join(words[4:-1])
+            header.variables.append(
+                VcdVariable(
+                    reference=f"{scope}.{name}" if scope else name,
+                    identifier_code=words[3],
+                    size=int(words[2]),
+                    var_type=words[1],
+                    scope=scope,
+                )
+            )
+        elif line.startswith("$scope"):
+            hierarchy.append(line.split()[2])
+            header.scopes.append(".".join(hierarchy))
+        elif line.startswith("$upscope"):
+            if hierarchy:
+                hierarchy.pop()
+        elif line.startswith("$enddefinitions"):
+            break
+        elif line.startswith("$timescale"):
+            header.timescale = parse_timescale(_read_section(line, lines))
+        elif line.startswith("$version"):
+            header.version = _read_section(line, lines)
+        elif line.startswith("$date"):
+            header.date = _read_section(line, lines)
+        elif line.startswith("$comment"):
+            _read_section(line, lines)
+
+    return header
+
+
+class VcdStream:
+    """Single-pass reader over the lines of a VCD file.
+
+    The header is parsed on construction. Value changes are produced lazily
+    by :meth:`changes`, which tracks the current and last seen timestamps.
+    """
+
+    def __init__(
+        self,
+        lines: Iterable[str],
+        header: Optional[VcdHeader] = None,
+        time: int = 0,
+    ):
+        """Parse the header from the given lines.
+
+        Args:
+            lines: Iterable over the text lines of a VCD file.
+            header: Already parsed header. When given, ``lines`` is taken
+                to start inside the value change section, e.g. after a
+                seek to a checkpoint.
+            time: Simulation time in effect at the first line.
+        """
+        self._lines = iter(lines)
+        if header is None:
+            header = parse_vcd_header(self._lines)
+        self.header = header
+        self.begintime: Optional[int] = None
+        self.endtime = time
+
+    def changes(
+        self, identifier_codes: Optional[Collection[str]] = None
+    ) -> Iterator[Tuple[int, str, str]]:
+        """Yield value changes in file order.
+
+        Args:
+            identifier_codes: When given, changes of any other identifier
+                code are dropped here, before consumers decode or store
+                them. Timestamps are still tracked for every line.
+
+        Yields:
+            Tuples of (time, identifier_code, value). Vector values are
+            yielded without their leading "b"/"r" marker.
+        """
+        time = self.endtime
+        scalar_chars = SCALAR_VALUE_CHARS
+        vector_chars = VECTOR_VALUE_CHARS
+        wanted = None if identifier_codes is None else set(identifier_codes)
+
+        for line in self._lines:
+            if line[:1] in (" ", "\t"):
+                line = line.lstrip()
+            if not line:
+                continue
+            first = line[0]
+            if first in scalar_chars:
+                identifier_code = line[1:].rstrip()
+                if wanted is None or identifier_code in wanted:
+                    yield time, identifier_code, first
+            elif first in vector_chars:
+                value, identifier_code = line[1:].split()
+                if wanted is None or identifier_code in wanted:
+                    yield time, identifier_code, value
+            elif first == "#":
+                words = line.split()
+                time = int(words[0][1:])
+                if self.begintime is None:
+                    self.begintime = time
+                self.endtime = time
+                # Some writers put scalar changes on the timestamp line
+                for change in words[1:]:
+                    if change[0] in scalar_chars and (
+                        wanted is None or change[1:] in wanted
+                    ):
+                        yield time, change[1:], change[0]
+            elif first == "$" and line.startswith("$comment"):
+                _read_section(line.strip(), self._lines)
+
+
+@contextmanager
+def open_vcd(vcd_filename: str) -> Iterator[VcdStream]:
+    """Open a VCD file for streaming.
+
+    Args:
+        vcd_filename: Path to the VCD file. ``.vcd.gz``, ``.vcd.zst`` and
+            ``.vcd.xz`` files are decompressed on the fly, and ``.fst``
+            files are read through fst_reader.FstStream.
+
+    Yields:
+        A VcdStream (or FstStream) whose header is already parsed. The
+        file is closed when the ``with`` block exits.
+    """
+    if vcd_filename.endswith(".fst"):
+        from fst_reader import open_fst
+
+        with open_fst(vcd_filename) as stream:
+            yield stream
+        return
+    with open_text(vcd_filename) as vcd_file:
+        yield VcdStream(vcd_file)
+
+
+def summarize_signals(
+    vcd_filename: str, signals: Optional[Iterable[SignalSelector]] = None
+) -> Tuple[VcdHeader, int, Dict[str, SignalSummary]]:
+    """Compute change counts and first/last values in a single pass.
+
+    Args:
+        vcd_filename: Path to the VCD file.
+        signals: Optional selectors (see select_variables). Only the
+            matching signals are summarized; other value changes are
+            skipped without being decoded.
+
+    Returns:
+        Tuple of (header, end time, summaries keyed by identifier code).
+    """
+    with open_vcd(vcd_filename) as stream:
+        if signals is None:
+            codes = None
+            summaries = {
+                code: SignalSummary()
+                for code in stream.header.identifier_codes
+            }
+        else:
+            codes = {
+                variable.identifier_code
+                for variable in select_variables(stream.header, signals)
+            }
+            summaries = {code: SignalSummary() for code in codes}
+        for _, identifier_code, value in stream.changes(codes):
+            summary = summaries.get(identifier_code)
+            if summary is None:
+                continue
+            if summary.changes == 0:
+                summary.initial_value = value
+            summary.changes += 1
+            summary.final_value = value
+        return stream.header, stream.endtime, summaries
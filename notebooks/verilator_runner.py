@@ -5,110 +5,485 @@ This module provides functionality to run Docker Compose with Verilator
 in a specified target directory with proper error handling and cleanup.
 """
 
+import hashlib
 import os
 import shutil
-import subprocess
 import textwrap
+from collections import deque
 
+from fst_reader import store_fst_trace
+from run_metrics import PhaseTimer, RunReport, finish_report, start_report
+from simulation_backends import (
+    CACHE_STATS_FILE,
+    apply_build_settings,
+    build_settings,
+    compiler_cache_default,
+    read_env_file,
+    select_backend,
+    verilator_flags,
+    verilator_option_args,
+)
+from sv_dependencies import DependencyGraph
 
-def run_docker_compose(*, target_dir=str, strip_lines=False) -> int:
+FINGERPRINT_FILE = ".build_fingerprint"
+
+# Docker and Verilator banner lines dropped by strip_lines
+STRIP_HEAD_LINES = 14
+STRIP_TAIL_LINES = 4
+
+
+def build_fingerprint(target_dir: str, env: dict) -> str:
     """
-    Run Docker Compose with Verilator in the specified target directory.
+    Fingerprint the inputs of a Verilator build.
+
+    The fingerprint covers the contents of every source file the build
+    reads: the .sv files named in the .env file and the files they
+    include, import or instantiate, as found by
+    sv_dependencies.DependencyGraph in the example directory. It also
+    covers the TOP_MODULE name, the Verilator flags and the settings that
+    change the model (threads, optimization level and waveform format,
+    not build jobs).
 
     Args:
-        target_dir (str): Path to the target directory containing .env file
-        strip_lines (bool): Whether to strip first and last lines from output
+        target_dir (str): Example directory containing the sources
+        env (dict): Settings read from the example's .env file
 
     Returns:
-        int:
-            Return code from the Docker process,
-            0 for success, non-zero for failure.
+        str: Hex digest identifying the build inputs
+    """
+    digest = hashlib.sha256()
+    flags = " ".join(
+        [*verilator_flags(env), *verilator_option_args(env, True)]
+    )
+    digest.update(f"{flags}\0{env.get('TOP_MODULE', '')}".encode())
+    # Scan only the example directory, which is all Verilator searches,
+    # and keep no scan cache there
+    graph = DependencyGraph(target_dir, cache_path="")
+    graph.scan()
+    root = os.path.abspath(target_dir)
+    for source_path in sorted(graph.files_for_target(target_dir)):
+        digest.update(f"\0{os.path.relpath(source_path, root)}\0".encode())
+        if os.path.isfile(source_path):
+            with open(source_path, "rb") as source_file:
+                digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def _read_stored_fingerprint(obj_dir: str) -> str:
+    try:
+        with open(os.path.join(obj_dir, FINGERPRINT_FILE), "r") as file:
+            return file.read().strip()
+    except OSError:
+        return ""
+
+
+def _write_stored_fingerprint(obj_dir: str, fingerprint: str) -> bool:
+    try:
+        with open(os.path.join(obj_dir, FINGERPRINT_FILE), "w") as file:
+            file.write(fingerprint)
+        return True
+    except OSError:
+        return False
+
+
+def _remove_cache_stats(stats_log: str) -> None:
+    try:
+        os.remove(stats_log)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_obj_dir(obj_dir: str, print_fn) -> None:
+    if os.path.isdir(obj_dir):
+        print_fn(f"Removing {obj_dir} directory...")
+        shutil.rmtree(obj_dir)
+        print_fn(f"{obj_dir} removed successfully.")
+    else:
+        print_fn(f"{obj_dir} directory not found, skipping cleanup.")
+
+
+class OutputStripper:
+    """
+    Drop the first and last lines of a stream with a fixed-size buffer.
+
+    Lines are held back only until it is known whether the stream is long
+    enough to strip, and then only the last ``tail`` lines are kept as
+    lookahead. Streams of ``head + tail`` lines or fewer pass through
+    unchanged, matching the previous whole-list behaviour.
+    """
+
+    def __init__(self, head=STRIP_HEAD_LINES, tail=STRIP_TAIL_LINES):
+        self.head = head
+        self.tail = tail
+        self._buffer = deque()
+        self._stripping = False
+
+    def push(self, line) -> list:
+        """Add a line and return the lines that can now be emitted."""
+        self._buffer.append(line)
+        if not self._stripping:
+            if len(self._buffer) <= self.head + self.tail:
+                return []
+            for _ in range(self.head):
+                self._buffer.popleft()
+            self._stripping = True
+
+        ready = []
+        while len(self._buffer) > self.tail:
+            ready.append(self._buffer.popleft())
+        return ready
+
+    def flush(self) -> list:
+        """Return the held-back lines once the stream has ended."""
+        remaining = [] if self._stripping else list(self._buffer)
+        self._buffer.clear()
+        return remaining
+
+
+class StreamingOutput:
+    """
+    Print process output live, with optional stripping and a log file.
+
+    Memory use is bounded: only the strip lookahead and the most recent
+    printed lines (for error diagnostics) are kept. When a log path is
+    given, every raw line is also written to it before stripping.
+    """
+
+    def __init__(
+        self, strip_lines=False, print_fn=print, log_file=None, recent=50
+    ):
+        """
+        Configure the output handler.
+
+        Args:
+            strip_lines (bool): Whether to strip first and last lines
+            print_fn (callable): Function receiving each printed line
+            log_file (str): Optional path receiving the full raw output
+            recent (int): Number of printed lines kept for diagnostics
+        """
+        self.print_fn = print_fn
+        self.stripper = OutputStripper() if strip_lines else None
+        self.recent_lines = deque(maxlen=recent)
+        self.line_count = 0
+        self._log = (
+            open(log_file, "w", encoding="utf-8") if log_file else None
+        )
+
+    def write(self, line) -> None:
+        """Handle one raw output line from the process."""
+        self.line_count += 1
+        if self._log is not None:
+            self._log.write(line if line.endswith("\n") else line + "\n")
+        if self.stripper is None:
+            self._emit(line)
+        else:
+            for ready in self.stripper.push(line):
+                self._emit(ready)
+
+    def close(self) -> None:
+        """Emit held-back lines and close the log file."""
+        if self.stripper is not None:
+            for ready in self.stripper.flush():
+                self._emit(ready)
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _emit(self, line) -> None:
+        clean_line = line.rstrip()
+        self.recent_lines.append(clean_line)
+        if len(clean_line) > 80:
+            wrapped_lines = textwrap.fill(clean_line, width=80)
+            self.print_fn(wrapped_lines)
+        else:
+            self.print_fn(clean_line)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _prepare_run(target_dir, print_fn, incremental, backend, settings=None):
+    """
+    Read an example's settings and decide whether its model must be built.
+
+    Prints the same messages as a full run up to the simulation output
+    header. ``settings`` holds the jobs, threads, opt_level, trace_format
+    and compiler_cache keyword overrides of the build settings.
+
+    Returns:
+        tuple: (env_file_path, env, backend object, build, fingerprint), or
+            None when the directory or its .env file does not exist
     """
     obj_dir = target_dir + "obj_dir"
 
-    if os.path.isdir(target_dir):
-        env_file_path = os.path.join(target_dir, ".env")
+    if not os.path.isdir(target_dir):
+        print_fn(f"Directory not found: {target_dir}")
+        return None
+    env_file_path = os.path.join(target_dir, ".env")
+    if not os.path.exists(env_file_path):
+        print_fn(f"Error: Environment file not found at {env_file_path}")
+        return None
 
-        if not os.path.exists(env_file_path):
-            print(f"Error: Environment file not found at {env_file_path}")
-            return 1
+    backend = select_backend(backend)
+    env = apply_build_settings(
+        read_env_file(env_file_path),
+        **settings or {},
+        compiler_cache_default=compiler_cache_default(backend),
+    )
+    build = True
+
+    fingerprint = ""
+    if incremental:
+        fingerprint = build_fingerprint(target_dir, env)
+        top_module = env.get("TOP_MODULE", "")
+        binary_path = os.path.join(obj_dir, f"V{top_module}")
+        if (
+            _read_stored_fingerprint(obj_dir) == fingerprint
+            and os.path.isfile(binary_path)
+        ):
+            print_fn("Sources unchanged, reusing existing build.")
+            build = False
         else:
-            print("Verilator Simulation Output:")
-            print("=" * 80)
-
-            docker_output = []
-            process = subprocess.Popen(
-                [
-                    "docker-compose",
-                    "--env-file",
-                    env_file_path,
-                    "run",
-                    "--rm",
-                    "verilator",
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1,
-            )
-
-            # Get all lines from process output
-            all_lines = list(process.stdout)
-
-            # Apply stripping if enabled
-            if (
-                strip_lines and len(all_lines) > 18
-            ):  # Need at least 18 lines to strip 14 from start and 4 from end
-                lines_to_process = all_lines[14:-4]
-            else:
-                lines_to_process = all_lines
-
-            # Process the lines
-            for line in lines_to_process:
-                clean_line = line.rstrip()
-                docker_output.append(clean_line)
-                if len(clean_line) > 80:
-                    wrapped_lines = textwrap.fill(clean_line, width=80)
-                    print(wrapped_lines)
-                else:
-                    print(clean_line)
-
-            process.wait()
-            print("=" * 80)
-            print(f"Process finished with return code: {process.returncode}")
-
-            # Check for specific Docker connection issues
-            if process.returncode != 0:
-                output_text = " ".join(docker_output)
-                if (
-                    "dockerDesktopLinuxEngine" in output_text
-                    or "cannot find the file specified" in output_text
-                ):
-                    print("\n🐳 Docker Connection Error Detected:")
-                    print("- Please start Docker Desktop")
-                    print("- Wait for Docker to fully initialize")
-                    print(
-                        "- Try running 'docker ps' "
-                        "to verify Docker is working"
-                    )
-                else:
-                    print("\nDocker command failed. Common issues:")
-                    print("- Docker Desktop is not running")
-                    print("- Docker daemon is not accessible")
-                    print("- Docker service needs to be started")
-
-            # Cleanup
             if os.path.isdir(obj_dir):
-                print(f"Removing {obj_dir} directory...")
-                shutil.rmtree(obj_dir)
-                print(f"{obj_dir} removed successfully.")
-            else:
-                print(f"{obj_dir} directory not found, skipping cleanup.")
+                print_fn("Sources changed, rebuilding.")
+                _remove_obj_dir(obj_dir, print_fn)
+    if build:
+        # ccache appends to the log, so drop one left by an aborted run
+        _remove_cache_stats(os.path.join(target_dir, CACHE_STATS_FILE))
+
+    print_fn("Verilator Simulation Output:")
+    print_fn("=" * 80)
+    return env_file_path, env, backend, build, fingerprint
+
 
-            return process.returncode
+def _complete_run(
+    *,
+    target_dir,
+    env,
+    backend,
+    report,
+    timer,
+    returncode,
+    output,
+    print_fn,
+    incremental,
+    fingerprint,
+    metrics_file,
+    explain_failure=True,
+    count_changes=True,
+) -> RunReport:
+    """
+    Report on a finished run and clean up or keep its obj_dir.
+
+    Args:
+        explain_failure (bool): Whether a failed run prints the backend's
+            hints, which do not apply to runs stopped by a timeout
+        count_changes (bool): Whether the report counts the waveform's
+            value changes
+
+    Returns:
+        RunReport: The completed report.
+    """
+    obj_dir = target_dir + "obj_dir"
+
+    print_fn("=" * 80)
+    print_fn(f"Process finished with return code: {returncode}")
+
+    vcd_file = env.get("VCD_FILE", "")
+    cache_stats_log = os.path.join(target_dir, CACHE_STATS_FILE)
+    finish_report(
+        report,
+        timer,
+        returncode,
+        output.line_count,
+        # Skip stale waveforms left behind by earlier runs
+        store_fst_trace(os.path.join(target_dir, vcd_file))
+        if vcd_file and returncode == 0
+        else "",
+        metrics_file,
+        cache_stats_log,
+        count_changes,
+    )
+    _remove_cache_stats(cache_stats_log)
+    if report.cache_hits or report.cache_misses:
+        print_fn(
+            f"Compiler cache: {report.cache_hits} hits, "
+            f"{report.cache_misses} misses"
+        )
+
+    # Check for specific backend issues
+    if returncode != 0 and explain_failure:
+        backend.explain_failure(list(output.recent_lines), print_fn)
+
+    # Keep a successful incremental build for the next run
+    if (
+        incremental
+        and returncode == 0
+        and os.path.isdir(obj_dir)
+        and _write_stored_fingerprint(obj_dir, fingerprint)
+    ):
+        print_fn(f"Keeping {obj_dir} for incremental builds.")
     else:
-        print(f"Directory not found: {target_dir}")
-        return 1
+        _remove_obj_dir(obj_dir, print_fn)
+
+    return report
+
+
+def run_simulation_report(
+    *,
+    target_dir=str,
+    strip_lines=False,
+    print_fn=print,
+    incremental=False,
+    log_file=None,
+    backend="auto",
+    metrics_file=None,
+    jobs=None,
+    threads=None,
+    opt_level=None,
+    trace_format=None,
+    compiler_cache=None,
+    count_changes=True,
+) -> RunReport:
+    """
+    Run Verilator in the specified target directory and report on the run.
+
+    Takes the same arguments as run_docker_compose, plus:
+
+    Args:
+        metrics_file (str): Optional JSON-lines file the report is
+            appended to
+        count_changes (bool): Whether to count the value changes of the
+            waveform, which reads the whole file once more after the run
+
+    Returns:
+        RunReport: Return code, wall-clock time per phase, the build
+            settings used and the size and change count of the waveform
+            (VCD or FST) written by the simulation.
+    """
+    prepared = _prepare_run(
+        target_dir,
+        print_fn,
+        incremental,
+        backend,
+        dict(
+            jobs=jobs,
+            threads=threads,
+            opt_level=opt_level,
+            trace_format=trace_format,
+            compiler_cache=compiler_cache,
+        ),
+    )
+    if prepared is None:
+        return start_report(target_dir, getattr(backend, "name", backend))
+    env_file_path, env, backend, build, fingerprint = prepared
+    report = start_report(target_dir, backend.name, build_settings(env))
+
+    timer = PhaseTimer(build=build)
+
+    def on_line(line):
+        timer.observe(line)
+        output.write(line)
+
+    # Stream lines from process output as they arrive
+    with StreamingOutput(strip_lines, print_fn, log_file) as output:
+        returncode = backend.run_simulation(
+            target_dir, env_file_path, env, on_line, build=build
+        )
+
+    return _complete_run(
+        target_dir=target_dir,
+        env=env,
+        backend=backend,
+        report=report,
+        timer=timer,
+        returncode=returncode,
+        output=output,
+        print_fn=print_fn,
+        incremental=incremental,
+        fingerprint=fingerprint,
+        metrics_file=metrics_file,
+        count_changes=count_changes,
+    )
+
+
+def run_docker_compose(
+    *,
+    target_dir=str,
+    strip_lines=False,
+    print_fn=print,
+    incremental=False,
+    log_file=None,
+    backend="auto",
+    metrics_file=None,
+    jobs=None,
+    threads=None,
+    opt_level=None,
+    trace_format=None,
+    compiler_cache=None,
+) -> int:
+    """
+    Run Docker Compose with Verilator in the specified target directory.
+
+    The build runs through a pluggable backend: a natively installed
+    Verilator when one is on PATH, Docker Compose otherwise. Use
+    run_simulation_report to get the per-phase timings as well.
+
+    Args:
+        target_dir (str): Path to the target directory containing .env file
+        strip_lines (bool): Whether to strip first and last lines from output
+        print_fn (callable): Function receiving each output line, print by
+            default. Batch runs pass a collector to keep outputs separate.
+        incremental (bool): Keep obj_dir between runs and only rebuild when
+            the sources, top module or Verilator flags changed. When the
+            build fingerprint matches, the existing simulation binary is
+            executed directly.
+        log_file (str): Optional path that receives the complete, unstripped
+            output. Printed output is streamed live either way.
+        backend: "auto", "docker", "local" or a backend object such as
+            simulation_backends.ScriptedBackend.
+        metrics_file (str): Optional JSON-lines file that receives the
+            run's RunReport
+        jobs: Parallel build jobs, overriding VERILATOR_JOBS in .env.
+            Defaults to the host core count.
+        threads: Simulation model threads, overriding VERILATOR_THREADS.
+            Defaults to 1; "auto" uses the host core count.
+        opt_level: Optimization level 0-3, overriding VERILATOR_OPT.
+            Defaults to Verilator's own settings.
+        trace_format: "vcd" or "fst", overriding VERILATOR_TRACE.
+            Defaults to "vcd". An FST trace is renamed from VCD_FILE to
+            its .fst name, which is smaller and faster to write.
+        compiler_cache: Whether to compile the C++ through ccache,
+            overriding VERILATOR_CCACHE. Defaults to on for a local
+            toolchain with ccache installed and off for Docker, whose
+            image is not checked for ccache. Docker runs keep the cache
+            in the verilator_cache volume. Hits and misses are printed
+            after the run.
+
+    Returns:
+        int:
+            Return code from the Docker process,
+            0 for success, non-zero for failure.
+    """
+    return run_simulation_report(
+        target_dir=target_dir,
+        strip_lines=strip_lines,
+        print_fn=print_fn,
+        incremental=incremental,
+        log_file=log_file,
+        backend=backend,
+        metrics_file=metrics_file,
+        jobs=jobs,
+        threads=threads,
+        opt_level=opt_level,
+        trace_format=trace_format,
+        compiler_cache=compiler_cache,
+        # Only a logged report needs the change count
+        count_changes=metrics_file is not None,
+    ).returncode
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+"""
+Decimated Waveform Plotting Module
+
+This module renders VCD signals with Plotly while keeping the number of
+plotted points proportional to the plot width instead of the number of
+value changes. Changes are grouped into one bucket per pixel column and
+each bucket is drawn from its first, minimum, maximum and last values, so
+every transition stays visible as an edge. Interactive figures re-query
+the columnar waveform store for the visible range whenever the x axis is
+zoomed or panned. Plotly is imported when the first figure is built.
+"""
+
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+from waveform_store import (
+    KIND_BITS,
+    KIND_INT,
+    SignalWaveform,
+    Waveform,
+    load_waveform,
+)
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+DEFAULT_WIDTH = 1000
+# Below this many changes per bucket the exact steps are plotted
+EXACT_POINTS_PER_BUCKET = 4
+
+
+def numeric_values(signal: SignalWaveform) -> np.ndarray:
+    """Convert a signal's stored values to float64 for plotting.
+
+    Values containing x or z bits become NaN, which Plotly draws as gaps.
+    """
+    if signal.kind == KIND_INT:
+        return signal.values.astype(np.float64)
+    if signal.kind != KIND_BITS:
+        return np.asarray(signal.values, dtype=np.float64)
+
+    # Convert each distinct bit pattern once
+    patterns, inverse = np.unique(signal.values, return_inverse=True)
+    converted = np.empty(len(patterns), dtype=np.float64)
+    for index, pattern in enumerate(patterns):
+        text = pattern.decode("ascii")
+        converted[index] = (
+            int(text, 2) if text and set(text) <= {"0", "1"} else np.nan
+        )
+    return converted[inverse]
+
+
+def decimate_steps(
+    times: np.ndarray,
+    values: np.ndarray,
+    t_start: int,
+    t_end: int,
+    buckets: int = DEFAULT_WIDTH,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce a step signal to at most four points per bucket.
+
+    Args:
+        times: Sorted change times.
+        values: Numeric value at each change time.
+        t_start: Start of the visible range.
+        t_end: End of the visible range.
+        buckets: Number of buckets, normally the plot width in pixels.
+
+    Returns:
+        Tuple of (x, y) arrays meant for a ``line_shape="hv"`` trace. The
+        value in effect at ``t_start`` is included and the last value is
+        held until ``t_end``.
+    """
+    t_end = max(t_end, t_start + 1)
+    first = np.searchsorted(times, t_start, side="right")
+    last = np.searchsorted(times, t_end, side="right")
+    if first == 0 and last == 0:
+        return np.array([], dtype=np.float64), np.array([], dtype=np.float64)
+
+    window_times = times[first:last]
+    window_values = values[first:last]
+    initial = values[first - 1] if first > 0 else window_values[0]
+    head_x = [t_start] if first > 0 else [window_times[0]]
+
+    if len(window_times) <= EXACT_POINTS_PER_BUCKET * buckets:
+        x = np.concatenate([head_x, window_times, [t_end]])
+        final = window_values[-1] if len(window_values) else initial
+        y = np.concatenate([[initial], window_values, [final]])
+        return x.astype(np.float64), y
+
+    span = t_end - t_start
+    bucket = ((window_times - t_start) * buckets) // span
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+    ends = np.concatenate([starts[1:], [len(window_times)]]) - 1
+
+    # first, min, max and last of every bucket keep all edges visible
+    x = np.empty(4 * len(starts) + 2, dtype=np.float64)
+    y = np.empty_like(x)
+    x[0], y[0] = head_x[0], initial
+    x[1:-1:4] = window_times[starts]
+    x[2:-1:4] = window_times[starts]
+    x[3:-1:4] = window_times[starts]
+    x[4:-1:4] = window_times[ends]
+    y[1:-1:4] = window_values[starts]
+    y[2:-1:4] = np.fmin.reduceat(window_values, starts)
+    y[3:-1:4] = np.fmax.reduceat(window_values, starts)
+    y[4:-1:4] = window_values[ends]
+    x[-1], y[-1] = t_end, window_values[-1]
+    return x, y
+
+
+class WaveformPlot:
+    """Level-of-detail Plotly view over signals of one VCD file."""
+
+    def __init__(
+        self,
+        waveform: Union[str, Waveform],
+        signals: Optional[Iterable[str]] = None,
+        width: int = DEFAULT_WIDTH,
+    ):
+        """Load the signals to plot.
+
+        Args:
+            waveform: VCD path (loaded through the sidecar cache) or an
+                already loaded Waveform.
+            signals: Full signal references, in plotting order. Defaults
+                to every signal in the file.
+            width: Plot width in pixels, which is also the bucket count.
+        """
+        if isinstance(waveform, str):
+            waveform = load_waveform(waveform)
+        self.waveform = waveform
+        self.references: List[str] = (
+            list(signals)
+            if signals is not None
+            else sorted(waveform.references_to_ids)
+        )
+        self.width = width
+        self._data: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for reference in self.references:
+            signal = waveform[reference]
+            self._data[reference] = (signal.times, numeric_values(signal))
+        self.t_start = waveform.begintime or 0
+        self.t_end = max(waveform.endtime, self.t_start + 1)
+        self.figure: Optional["go.Figure"] = None
+
+    def traces(
+        self, t_start: int, t_end: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Return the decimated (x, y) data of every signal for a range."""
+        return [
+            decimate_steps(times, values, t_start, t_end, self.width)
+            for times, values in self._data.values()
+        ]
+
+    def build_figure(self) -> "go.Figure":
+        """Create a static figure showing the whole time range."""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
+        rows = max(1, len(self.references))
+        figure = make_subplots(
+            rows=rows,
+            cols=1,
+            shared_xaxes=True,
+            vertical_spacing=min(0.02, 1 / (4 * rows)),
+        )
+        for row, (reference, (x, y)) in enumerate(
+            zip(self.references, self.traces(self.t_start, self.t_end)), 1
+        ):
+            figure.add_trace(
+                go.Scattergl(
+                    x=x, y=y, name=reference, mode="lines", line_shape="hv"
+                ),
+                row=row,
+                col=1,
+            )
+            figure.update_yaxes(
+                title_text=reference.split(".")[-1], row=row, col=1
+            )
+        figure.update_layout(
+            width=self.width + 200,
+            height=80 + 60 * rows,
+            showlegend=False,
+            margin=dict(l=120, r=20, t=20, b=40),
+        )
+        return figure
+
+    def update_range(self, t_start: float, t_end: float) -> None:
+        """Re-decimate every trace of the current figure for a new range."""
+        if self.figure is None:
+            return
+        t_start, t_end = int(t_start), int(np.ceil(t_end))
+        traces = self.traces(max(t_start, 0), t_end)
+        with self.figure.batch_update():
+            for trace, (x, y) in zip(self.figure.data, traces):
+                trace.x = x
+                trace.y = y
+
+    def _on_zoom(self, axis, x_range, *_):
+        if x_range is None:
+            # Autorange after a double click shows the whole run again
+            self.update_range(self.t_start, self.t_end)
+        else:
+            self.update_range(*x_range)
+
+    def show(self, interactive: bool = True) -> "go.Figure":
+        """Build the figure, wiring zoom re-queries when possible.
+
+        Args:
+            interactive: Return a FigureWidget that re-decimates on zoom.
+                Falls back to a static figure when Jupyter widget support
+                is not installed.
+
+        Returns:
+            The figure or figure widget.
+        """
+        import plotly.graph_objects as go
+
+        figure = self.build_figure()
+        if interactive:
+            try:
+                figure = go.FigureWidget(figure)
+            except (ImportError, ValueError) as error:
+                print(f"Interactive zoom unavailable ({error}), static plot")
+            else:
+                for axis in figure.layout:
+                    if axis.startswith("xaxis"):
+                        figure.layout[axis].on_change(self._on_zoom, "range")
+        self.figure = figure
+        return figure
+
+
+def plot_waveform(
+    vcd_filename: str,
+    signals: Optional[Iterable[str]] = None,
+    width: int = DEFAULT_WIDTH,
+    interactive: bool = True,
+) -> "go.Figure":
+    """Plot signals from a VCD file with level-of-detail decimation.
+
+    Args:
+        vcd_filename: Path to the VCD file.
+        signals: Full signal references to plot. Defaults to all signals.
+        width: Plot width in pixels.
+        interactive: Whether to re-query the data when zooming.
+
+    Returns:
+        The Plotly figure, ready to display in a notebook.
+    """
+    return WaveformPlot(vcd_filename, signals, width).show(interactive)
@@ -0,0 +1,513 @@
+"""
+Columnar Waveform Store Module
+
+This module loads VCD files into per-signal NumPy arrays: a contiguous int64
+time array plus a compact value array. The arrays are persisted to a
+memory-mappable sidecar file next to the VCD, so later loads skip parsing
+entirely as long as the VCD is unchanged.
+"""
+
+import hashlib
+import json
+import os
+from array import array
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from vcd_stream import (
+    SignalSelector,
+    SignalSummary,
+    VcdHeader,
+    VcdVariable,
+    open_vcd,
+    select_variables,
+)
+
+CACHE_SUFFIX = ".wfcache"
+CACHE_MAGIC = b"SVWFC002"
+CACHE_ALIGNMENT = 8
+
+# Value array layouts
+KIND_INT = "int"  # two-state values up to 64 bits, stored as uint64
+KIND_BITS = "bits"  # four-state or wide values, stored as fixed-width bytes
+KIND_REAL = "real"  # real variables, stored as float64
+
+
+class SignalWaveform:
+    """Time and value arrays for one VCD identifier code."""
+
+    def __init__(
+        self,
+        variable: VcdVariable,
+        kind: str,
+        times: np.ndarray,
+        values: np.ndarray,
+        first_value: Optional[str] = None,
+        last_value: Optional[str] = None,
+    ):
+        """Wrap the arrays of a single signal.
+
+        Args:
+            variable: First header variable declaring this identifier code.
+            kind: Value layout, one of KIND_INT, KIND_BITS or KIND_REAL.
+            times: int64 array of change times.
+            values: Value array of the same length as ``times``.
+            first_value: First value as written in the file.
+            last_value: Last value as written in the file.
+        """
+        self.variable = variable
+        self.kind = kind
+        self.times = times
+        self.values = values
+        self.first_value = first_value
+        self.last_value = last_value
+
+    @property
+    def size(self) -> int:
+        """Signal width in bits."""
+        return self.variable.size
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def value_string(self, index: int) -> str:
+        """Return the value at ``index`` as a VCD style string."""
+        value = self.values[index]
+        if self.kind == KIND_INT:
+            return format(int(value), f"0{self.size}b")
+        if self.kind == KIND_BITS:
+            return value.decode("ascii")
+        value = float(value)
+        return str(int(value)) if value.is_integer() else repr(value)
+
+    @property
+    def tv(self) -> List[Tuple[int, str]]:
+        """List of (time, value) tuples, as exposed by vcdvcd signals."""
+        return [
+            (int(self.times[index]), self.value_string(index))
+            for index in range(len(self))
+        ]
+
+
+class Waveform:
+    """All signals of a VCD file in columnar form."""
+
+    def __init__(
+        self,
+        header: VcdHeader,
+        begintime: Optional[int],
+        endtime: int,
+        signals: Dict[str, SignalWaveform],
+    ):
+        self.header = header
+        self.begintime = begintime
+        self.endtime = endtime
+        self.signals = signals
+        self.references_to_ids = header.references_to_ids
+
+    def __getitem__(self, reference: str) -> SignalWaveform:
+        """Look up a signal by its full hierarchical reference."""
+        return self.signals[self.references_to_ids[reference]]
+
+    def summaries(self) -> Dict[str, SignalSummary]:
+        """Build per identifier code summaries from the stored arrays.
+
+        The first and last values are the strings written in the file,
+        as vcd_stream.summarize_signals reports them, not the widened
+        values the arrays hold.
+        """
+        summaries = {}
+        for code, signal in self.signals.items():
+            summary = SignalSummary(changes=len(signal))
+            if len(signal):
+                summary.initial_value = signal.first_value
+                summary.final_value = signal.last_value
+            summaries[code] = summary
+        return summaries
+
+
+class _ColumnBuilder:
+    """Accumulate the value changes of one signal during parsing."""
+
+    def __init__(self, variable: VcdVariable):
+        self.variable = variable
+        self.times = array("q")
+        if variable.var_type == "real":
+            self.kind = KIND_REAL
+            self.values = array("d")
+        elif variable.size <= 64:
+            self.kind = KIND_INT
+            self.values = array("Q")
+        else:
+            self.kind = KIND_BITS
+            self.values = []
+        self.first_value: Optional[str] = None
+        self.last_value: Optional[str] = None
+
+    def append(self, time: int, value: str) -> None:
+        self.times.append(time)
+        if self.first_value is None:
+            self.first_value = value
+        self.last_value = value
+        if self.kind == KIND_INT:
+            try:
+                self.values.append(int(value, 2))
+                return
+            except ValueError:
+                self._switch_to_bits()
+        if self.kind == KIND_BITS:
+            self.values.append(_extend_bits(value, self.variable.size))
+        else:
+            self.values.append(float(value))
+
+    def _switch_to_bits(self) -> None:
+        """Fall back to byte strings once a four-state value shows up."""
+        width = self.variable.size
+        self.values = [
+            format(value, f"0{width}b").encode("ascii")
+            for value in self.values
+        ]
+        self.kind = KIND_BITS
+
+    def finish(self) -> SignalWaveform:
+        times = np.frombuffer(self.times, dtype=np.int64).copy()
+        if self.kind == KIND_INT:
+            values = np.frombuffer(self.values, dtype=np.uint64).copy()
+        elif self.kind == KIND_REAL:
+            values = np.frombuffer(self.values, dtype=np.float64).copy()
+        else:
+            values = np.array(self.values, dtype=f"S{self.variable.size}")
+        return SignalWaveform(
+            self.variable,
+            self.kind,
+            times,
+            values,
+            self.first_value,
+            self.last_value,
+        )
+
+
+def bit_matrix(signal: SignalWaveform) -> np.ndarray:
+    """Return the values as an (n, width) array of lowercase ASCII bits.
+
+    Column 0 holds the most significant bit. Real signals have no bits.
+    """
+    width = signal.size
+    if signal.kind == KIND_REAL:
+        raise ValueError(
+            f"{signal.variable.reference} is a real signal without bits"
+        )
+    if signal.kind == KIND_INT:
+        # Big-endian bytes unpacked to bits, keeping the low `width` bits
+        bits = np.unpackbits(
+            signal.values.astype(">u8").view(np.uint8).reshape(-1, 8),
+            axis=1,
+        )[:, 64 - width :]
+        return bits + np.uint8(ord("0"))
+    matrix = (
+        np.frombuffer(signal.values.tobytes(), dtype=np.uint8)
+        .reshape(-1, width)
+        .copy()
+    )
+    # Fold X/Z to lowercase, "X" | 0x20 == "x"
+    upper = (matrix == ord("X")) | (matrix == ord("Z"))
+    matrix[upper] |= 0x20
+    return matrix
+
+
+def _extend_bits(value: str, width: int) -> bytes:
+    """Left-extend a VCD vector value to the declared width."""
+    if len(value) < width:
+        fill = value[0] if value[0] in "xXzZ" else "0"
+        value = fill * (width - len(value)) + value
+    return value.encode("ascii")
+
+
+def _selected_codes(
+    header: VcdHeader, signals: Iterable[SignalSelector]
+) -> set:
+    """Identifier codes of the variables matching the selectors."""
+    return {
+        variable.identifier_code
+        for variable in select_variables(header, signals)
+    }
+
+
+def build_waveform(
+    vcd_filename: str, signals: Optional[Iterable[SignalSelector]] = None
+) -> Waveform:
+    """Parse a VCD file into a columnar Waveform without touching the cache.
+
+    Args:
+        vcd_filename: Path to the VCD file.
+        signals: Optional selectors (see vcd_stream.select_variables).
+            Only the matching signals get columns; value changes of the
+            others are skipped without being decoded or stored.
+
+    Returns:
+        The parsed waveform.
+    """
+    with open_vcd(vcd_filename) as stream:
+        identifier_codes = stream.header.identifier_codes
+        if signals is not None:
+            selected = _selected_codes(stream.header, signals)
+            identifier_codes = {
+                code: variable
+                for code, variable in identifier_codes.items()
+                if code in selected
+            }
+        builders = {
+            code: _ColumnBuilder(variable)
+            for code, variable in identifier_codes.items()
+        }
+        codes = None if signals is None else builders.keys()
+        for time, identifier_code, value in stream.changes(codes):
+            builders[identifier_code].append(time, value)
+
+        signals = {
+            code: builder.finish() for code, builder in builders.items()
+        }
+        return Waveform(
+            stream.header, stream.begintime, stream.endtime, signals
+        )
+
+
+def cache_path_for(vcd_filename: str) -> str:
+    """Return the sidecar cache path for a VCD file."""
+    return vcd_filename + CACHE_SUFFIX
+
+
+def _file_digest(path: str) -> str:
+    """Hash a file's content in fixed-size chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_key(vcd_filename: str) -> Dict[str, object]:
+    stat = os.stat(vcd_filename)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": _file_digest(vcd_filename),
+    }
+
+
+def _align(offset: int) -> int:
+    return (offset + CACHE_ALIGNMENT - 1) // CACHE_ALIGNMENT * CACHE_ALIGNMENT
+
+
+def save_waveform_cache(
+    waveform: Waveform, cache_path: str, source_key: Dict[str, object]
+) -> None:
+    """Write a waveform to a memory-mappable sidecar file.
+
+    The file holds a magic tag, a JSON header describing every array and
+    the raw arrays themselves at 8-byte aligned offsets. It is written to a
+    temporary file first and renamed into place.
+
+    Args:
+        waveform: Waveform to persist.
+        cache_path: Destination path of the sidecar file.
+        source_key: Size, mtime and digest of the VCD it was built from.
+    """
+    header = waveform.header
+    blobs = []
+    layout = {}
+    offset = 0
+    for code, signal in waveform.signals.items():
+        entry = {
+            "kind": signal.kind,
+            "count": len(signal),
+            "first_value": signal.first_value,
+            "last_value": signal.last_value,
+        }
+        for name, data in (("times", signal.times), ("values", signal.values)):
+            data = np.ascontiguousarray(data)
+            entry[f"{name}_dtype"] = data.dtype.str
+            entry[f"{name}_offset"] = offset
+            blobs.append((offset, data.tobytes()))
+            offset = _align(offset + data.nbytes)
+        layout[code] = entry
+
+    metadata = {
+        "source": source_key,
+        "timescale": {
+            key: str(value) for key, value in header.timescale.items()
+        },
+        "version": header.version,
+        "date": header.date,
+        "scopes": header.scopes,
+        "variables": [
+            [
+                var.reference,
+                var.identifier_code,
+                var.size,
+                var.var_type,
+                var.scope,
+            ]
+            for var in header.variables
+        ],
+        "begintime": waveform.begintime,
+        "endtime": waveform.endtime,
+        "signals": layout,
+    }
+    encoded = json.dumps(metadata).encode("utf-8")
+    data_start = _align(len(CACHE_MAGIC) + 8 + len(encoded))
+
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(CACHE_MAGIC)
+            cache_file.write(len(encoded).to_bytes(8, "little"))
+            cache_file.write(encoded)
+            for blob_offset, blob in blobs:
+                cache_file.seek(data_start + blob_offset)
+                cache_file.write(blob)
+            cache_file.truncate(data_start + offset)
+        os.replace(temp_path, cache_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _read_cache_metadata(cache_path: str) -> Tuple[Dict, int]:
+    """Return the JSON metadata and data start offset of a cache file."""
+    with open(cache_path, "rb") as cache_file:
+        if cache_file.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            raise ValueError(f"Not a waveform cache: {cache_path}")
+        length = int.from_bytes(cache_file.read(8), "little")
+        metadata = json.loads(cache_file.read(length).decode("utf-8"))
+    return metadata, _align(len(CACHE_MAGIC) + 8 + length)
+
+
+def load_waveform_cache(cache_path: str) -> Waveform:
+    """Open a sidecar file with all arrays memory-mapped read-only.
+
+    Args:
+        cache_path: Path of the sidecar file.
+
+    Returns:
+        Waveform whose arrays are views into the mapped file.
+    """
+    metadata, data_start = _read_cache_metadata(cache_path)
+    header = VcdHeader(
+        timescale={
+            key: value if key == "unit" else Decimal(value)
+            for key, value in metadata["timescale"].items()
+        },
+        version=metadata["version"],
+        date=metadata["date"],
+        scopes=metadata["scopes"],
+        variables=[VcdVariable(*fields) for fields in metadata["variables"]],
+    )
+
+    mapped = np.memmap(cache_path, dtype=np.uint8, mode="r")
+    variables = header.identifier_codes
+    signals = {}
+    for code, entry in metadata["signals"].items():
+        arrays = []
+        for name in ("times", "values"):
+            dtype = np.dtype(entry[f"{name}_dtype"])
+            start = data_start + entry[f"{name}_offset"]
+            stop = start + dtype.itemsize * entry["count"]
+            arrays.append(mapped[start:stop].view(dtype))
+        signals[code] = SignalWaveform(
+            variables[code],
+            entry["kind"],
+            *arrays,
+            entry["first_value"],
+            entry["last_value"],
+        )
+
+    return Waveform(
+        header, metadata["begintime"], metadata["endtime"], signals
+    )
+
+
+def _update_cache_metadata(cache_path: str, metadata: Dict) -> None:
+    """Rewrite the JSON metadata of a sidecar in place.
+
+    The arrays stay where they are, so the new metadata is padded with
+    spaces to the old length. Metadata that would grow is not written.
+    """
+    with open(cache_path, "r+b") as cache_file:
+        cache_file.seek(len(CACHE_MAGIC))
+        length = int.from_bytes(cache_file.read(8), "little")
+        encoded = json.dumps(metadata).encode("utf-8")
+        if len(encoded) <= length:
+            cache_file.seek(len(CACHE_MAGIC) + 8)
+            cache_file.write(encoded.ljust(length))
+
+
+def _cache_is_fresh(cache_path: str, vcd_filename: str) -> bool:
+    """Check a sidecar against the VCD's size, mtime and content hash."""
+    try:
+        metadata, _ = _read_cache_metadata(cache_path)
+    except (OSError, ValueError):
+        return False
+    source = metadata.get("source", {})
+    stat = os.stat(vcd_filename)
+    if source.get("size") != stat.st_size:
+        return False
+    if source.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    # Same size but touched (e.g. by a checkout): compare the content hash
+    if source.get("digest") != _file_digest(vcd_filename):
+        return False
+    # Remember the new mtime, so later loads skip the hash again
+    source["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _update_cache_metadata(cache_path, metadata)
+    except OSError:
+        pass
+    return True
+
+
+def load_waveform(
+    vcd_filename: str,
+    use_cache: bool = True,
+    signals: Optional[Iterable[SignalSelector]] = None,
+) -> Waveform:
+    """Load a VCD file as a columnar Waveform, using the sidecar if fresh.
+
+    Args:
+        vcd_filename: Path to the VCD file.
+        use_cache: Whether to read and write the sidecar cache file.
+        signals: Optional selectors limiting the signals of the result.
+            A fresh cache is mapped whole, which costs nothing per signal,
+            and the unselected signals are dropped; otherwise only the
+            selected signals are parsed and no cache is written, as it
+            would be incomplete.
+
+    Returns:
+        The waveform, memory-mapped from the cache when it was reused.
+        The header always lists every variable of the file.
+    """
+    if not use_cache:
+        return build_waveform(vcd_filename, signals)
+
+    cache_path = cache_path_for(vcd_filename)
+    if _cache_is_fresh(cache_path, vcd_filename):
+        waveform = load_waveform_cache(cache_path)
+        if signals is not None:
+            selected = _selected_codes(waveform.header, signals)
+            waveform.signals = {
+                code: signal
+                for code, signal in waveform.signals.items()
+                if code in selected
+            }
+        return waveform
+    if signals is not None:
+        return build_waveform(vcd_filename, signals)
+
+    source_key = _source_key(vcd_filename)
+    waveform = build_waveform(vcd_filename)
+    try:
+        save_waveform_cache(waveform, cache_path, source_key)
+    except OSError as error:
+        print(f"Warning: could not write cache {cache_path}: {error}")
+    return waveform